@@ -0,0 +1,258 @@
+from __future__ import annotations
+import asyncio
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional, Union
+from uuid import uuid4
+
+from enums import PaymentStatus
+from money import Money, as_money
+from payment import Payment
+from payment_ledger import PaymentLedger
+
+
+class GatewayError(Exception):
+    """A charge the gateway did not complete; ``retryable`` marks transient faults."""
+
+    def __init__(self, message: str, retryable: bool = True) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass(frozen=True, slots=True)
+class ChargeRequest:
+    idempotency_key: str
+    amount: Money
+    order_id: Optional[str] = None
+
+
+class PaymentGateway(ABC):
+    @abstractmethod
+    async def charge(self, request: ChargeRequest) -> str:
+        """Charge once per idempotency key; returns the gateway transaction id.
+
+        Repeating a key must return the original transaction rather than
+        charging again. Raise GatewayError when the charge did not happen.
+        """
+
+
+class FakeGateway(PaymentGateway):
+    """In-process gateway with simulated latency, faults and idempotency.
+
+    Each call draws an outcome: "ok", "error" (transient, nothing charged),
+    "decline" (permanent) or "lost" (charged, but the reply never arrives,
+    so the caller times out). ``script`` replays fixed outcomes before the
+    random ones, which keeps tests deterministic.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        jitter: float = 0.01,
+        error_rate: float = 0.0,
+        decline_rate: float = 0.0,
+        lost_rate: float = 0.0,
+        script: Optional[Iterable[str]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.decline_rate = decline_rate
+        self.lost_rate = lost_rate
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.charged: Dict[str, Money] = {}  # idempotency key -> amount captured
+        self._transactions: Dict[str, str] = {}
+        self._script: Iterator[str] = iter(script or ())
+        self._rng = random.Random(seed)
+
+    async def charge(self, request: ChargeRequest) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+            outcome = self._outcome()
+            if outcome == "error":
+                raise GatewayError("gateway unavailable")
+            if outcome == "decline":
+                raise GatewayError("card declined", retryable=False)
+            txn = self._capture(request)
+            if outcome == "lost":
+                await asyncio.Event().wait()  # never answers
+            return txn
+        finally:
+            self.in_flight -= 1
+
+    def _outcome(self) -> str:
+        scripted = next(self._script, None)
+        if scripted is not None:
+            return scripted
+        roll = self._rng.random()
+        for outcome, rate in (("error", self.error_rate), ("decline", self.decline_rate), ("lost", self.lost_rate)):
+            if roll < rate:
+                return outcome
+            roll -= rate
+        return "ok"
+
+    def _capture(self, request: ChargeRequest) -> str:
+        txn = self._transactions.get(request.idempotency_key)
+        if txn is None:
+            txn = self._transactions[request.idempotency_key] = f"txn-{len(self._transactions) + 1}"
+            self.charged[request.idempotency_key] = request.amount
+        elif self.charged[request.idempotency_key] != request.amount:
+            raise GatewayError("idempotency key reused with a different amount", retryable=False)
+        return txn
+
+
+@dataclass
+class PaymentStats:
+    attempts: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failed: int = 0
+    deduplicated: int = 0
+
+
+def _check_amount(key: str, charged: Money, amount: Money) -> None:
+    if charged != amount:
+        raise ValueError(f"Idempotency key {key!r} was used for {charged}, not {amount}")
+
+
+class AsyncPaymentService:
+    """asyncio payment pipeline in front of a PaymentGateway.
+
+    At most ``max_concurrency`` charges are in flight. Each attempt is
+    bounded by ``timeout``; timeouts and retryable GatewayErrors are
+    retried up to ``retries`` times with full-jitter exponential backoff,
+    always under the same idempotency key, so the gateway never charges
+    twice. Repeated or concurrent calls with one key share one result;
+    reusing a key for a different amount raises ValueError. Only PAID results are remembered: a FAILED payment (which may still
+    have been captured if every reply timed out) can be retried with the
+    same key, and the gateway then reports the original charge. PAID
+    payments are recorded in ``ledger`` when one is given.
+    """
+
+    def __init__(
+        self,
+        gateway: PaymentGateway,
+        max_concurrency: int = 16,
+        timeout: float = 2.0,
+        retries: int = 3,
+        backoff: float = 0.05,
+        max_backoff: float = 1.0,
+        max_keys: int = 100_000,
+        seed: Optional[int] = None,
+        ledger: Optional[PaymentLedger] = None,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be > 0")
+        self.gateway = gateway
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_keys = max_keys
+        self.ledger = ledger
+        self.stats = PaymentStats()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # idempotency key -> PAID Payment or in-flight task, oldest first
+        self._results: "OrderedDict[str, Union[Payment, asyncio.Future]]" = OrderedDict()
+        self._in_flight: Dict[str, Money] = {}  # idempotency key -> amount being charged
+        self._rng = random.Random(seed)
+
+    async def process_payment(
+        self, amount, idempotency_key: Optional[str] = None, order_id: Optional[str] = None
+    ) -> Payment:
+        key = idempotency_key or str(uuid4())
+        amount = as_money(amount)
+        known = self._results.get(key)
+        if known is not None:
+            _check_amount(key, known.amount if isinstance(known, Payment) else self._in_flight[key], amount)
+            self.stats.deduplicated += 1
+            self._results.move_to_end(key)
+            return known if isinstance(known, Payment) else await asyncio.shield(known)
+        if self.ledger is not None and key in self.ledger:
+            # Paid earlier and since evicted from the key cache.
+            paid = self.ledger.get(key)
+            _check_amount(key, paid.amount, amount)
+            self.stats.deduplicated += 1
+            return paid
+        task = asyncio.ensure_future(self._pay(ChargeRequest(key, amount, order_id)))
+        self._results[key] = task
+        self._in_flight[key] = amount
+        while len(self._results) > self.max_keys:
+            self._results.popitem(last=False)
+        return await asyncio.shield(task)
+
+    async def _pay(self, request: ChargeRequest) -> Payment:
+        try:
+            return await self._charge(request)
+        finally:
+            self._in_flight.pop(request.idempotency_key, None)
+
+    async def _charge(self, request: ChargeRequest) -> Payment:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        payment = Payment(payment_id=request.idempotency_key, amount=request.amount, order_id=request.order_id)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Back off outside the semaphore so waiting retries do not hold a slot.
+                self.stats.retries += 1
+                cap = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                await asyncio.sleep(self._rng.uniform(0, cap))
+            self.stats.attempts += 1
+            try:
+                async with self._semaphore:
+                    await asyncio.wait_for(self.gateway.charge(request), self.timeout)
+            except asyncio.TimeoutError:
+                self.stats.timeouts += 1
+                continue
+            except GatewayError as e:
+                if e.retryable:
+                    continue
+                break
+            payment.status = PaymentStatus.PAID
+            payment.paid_at = datetime.utcnow()
+            if self.ledger is not None:
+                self.ledger.record(payment)
+            if request.idempotency_key in self._results:
+                self._results[request.idempotency_key] = payment
+            return payment
+        self.stats.failed += 1
+        payment.status = PaymentStatus.FAILED
+        self._results.pop(request.idempotency_key, None)
+        return payment
+
+
+class BackgroundPayments:
+    """Runs an AsyncPaymentService on its own event-loop thread.
+
+    submit() returns a concurrent.futures.Future right away, so callers
+    such as the Tk main loop never wait on the gateway.
+    """
+
+    def __init__(self, service: AsyncPaymentService) -> None:
+        self.service = service
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="payments", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self, amount, idempotency_key: Optional[str] = None, order_id: Optional[str] = None
+    ) -> "Future[Payment]":
+        coro = self.service.process_payment(amount, idempotency_key, order_id)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
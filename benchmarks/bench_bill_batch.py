@@ -0,0 +1,77 @@
+"""Bills per second: Bill.generate_batch against a generate_from loop.
+
+    python benchmarks/bench_bill_batch.py [--sizes 500,10000,100000] [--distinct 40]
+
+Orders are drawn from ``--distinct`` basket shapes (a catering run or
+an end-of-day re-issue has many repeated subtotals). Both paths produce
+identical amounts; the script checks that before timing.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bill import Bill
+from menu_items import DrinkItem, FoodItem
+from order import Order
+
+ITEMS = [
+    DrinkItem(id="D1", name="Espresso", description="", price=2.50),
+    DrinkItem(id="D2", name="Latte", description="", price=3.20),
+    FoodItem(id="F1", name="Sandwich", description="", price=6.50),
+    FoodItem(id="F2", name="Muffin", description="", price=2.95),
+]
+TAX_RATE = 0.15
+
+
+def make_orders(n: int, distinct: int, seed: int):
+    rng = random.Random(seed)
+    shapes = [[(item, rng.randint(1, 3)) for item in rng.sample(ITEMS, rng.randint(1, 4))] for _ in range(distinct)]
+    orders = []
+    for i in range(n):
+        order = Order(order_id=f"O{i}")
+        for item, qty in rng.choice(shapes):
+            order.add_item(item, qty)
+        orders.append(order)
+    return orders
+
+
+def loop(orders):
+    return [Bill.generate_from(o, f"BILL-{o.order_id}", TAX_RATE) for o in orders]
+
+
+def batch(orders):
+    return list(Bill.generate_batch(orders, TAX_RATE))
+
+
+def best_of(fn, orders, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(orders)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="500,10000,100000")
+    parser.add_argument("--distinct", type=int, default=40, help="distinct basket shapes")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'orders':>8} {'loop bills/s':>14} {'batch bills/s':>14} {'speedup':>8}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        orders = make_orders(n, args.distinct, args.seed)
+        amounts = lambda bills: [(b.bill_id, b.sub_total, b.tax, b.total) for b in bills]
+        assert amounts(loop(orders)) == amounts(batch(orders))
+        t_loop, t_batch = best_of(loop, orders), best_of(batch, orders)
+        print(f"{n:>8} {n / t_loop:>14,.0f} {n / t_batch:>14,.0f} {t_loop / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
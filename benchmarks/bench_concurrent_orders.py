@@ -0,0 +1,64 @@
+"""ConcurrentOrderSystem throughput with 1..N terminal threads.
+
+    python benchmarks/bench_concurrent_orders.py [--ops 20000] [--threads 1,2,4,8]
+
+Each thread adds items to its own order ("private") or to one shared
+order ("shared") and the script reports total add_item calls per second
+and checks that no quantity update was lost. On CPython the GIL
+serialises pure-Python work, so expect flat rather than linear scaling.
+The point of the striped locks is correctness without a global lock.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent_order_system import ConcurrentOrderSystem
+from menu_items import DrinkItem
+
+ITEM = DrinkItem(id="D1", name="Espresso", description="", price=2.50)
+
+
+def run(threads: int, ops: int, shared: bool) -> float:
+    system = ConcurrentOrderSystem()
+    common = system.create_order(None)
+    orders = [common if shared else system.create_order(None) for _ in range(threads)]
+    start = threading.Barrier(threads + 1)
+
+    def terminal(n: int) -> None:
+        order = system.get_order(orders[n].order_id)
+        start.wait()
+        for _ in range(ops):
+            order.add_item(ITEM, 1)
+
+    workers = [threading.Thread(target=terminal, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - t0
+
+    expected = threads * ops if shared else ops
+    for o in orders:
+        assert o.get_line("D1").qty == expected, "lost update"
+    return threads * ops / elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ops", type=int, default=20_000)
+    ap.add_argument("--threads", default="1,2,4,8")
+    args = ap.parse_args()
+    print(f"{'threads':>8}{'private ops/s':>16}{'shared ops/s':>16}")
+    for n in (int(x) for x in args.threads.split(",")):
+        print(f"{n:>8}{run(n, args.ops, False):>16,.0f}{run(n, args.ops, True):>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
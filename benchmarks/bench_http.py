@@ -0,0 +1,108 @@
+"""Load test for the HTTP/JSON API: throughput and tail latency.
+
+    python benchmarks/bench_http.py [--connections 1 16 64] [--depth 1 8] [--seconds 3]
+
+Starts ``python -m cafe_service --http 127.0.0.1:0`` in a subprocess and
+drives it from this process over keep-alive connections. Each connection
+creates its own order and then alternates GET /orders/{id} with
+PUT /orders/{id}/items/D1, sending ``depth`` requests per write
+(pipelining) and waiting for all replies before the next batch. Latency
+is measured per request from the write of its batch to its reply; a
+"fresh" row opens a new connection for every request, for comparison.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def request(method: str, path: str, body=None, close: bool = False) -> bytes:
+    data = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(data)}\r\n"
+    if close:
+        head += "Connection: close\r\n"
+    return (head + "\r\n").encode() + data
+
+
+async def response(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+    return status, await reader.readexactly(length)
+
+
+async def client(port: int, depth: int, deadline: float, latencies: List[float], fresh: bool) -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request("POST", "/orders"))
+    order_id = json.loads((await response(reader))[1])["order"]["order_id"]
+    writer.write(request("POST", f"/orders/{order_id}/items", {"item_id": "D1", "qty": 1}))
+    await response(reader)
+    errors, n = 0, 0
+    while time.perf_counter() < deadline:
+        if fresh:
+            writer.close()
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        batch = b"".join(
+            request("GET", f"/orders/{order_id}", close=fresh) if (n + i) % 2 == 0
+            else request("PUT", f"/orders/{order_id}/items/D1", {"qty": (n + i) % 5 + 1}, close=fresh)
+            for i in range(depth)
+        )
+        t0 = time.perf_counter()
+        writer.write(batch)
+        for _ in range(depth):
+            status, _ = await response(reader)
+            latencies.append(time.perf_counter() - t0)
+            errors += status != 200
+        n += depth
+    writer.close()
+    return errors
+
+
+async def load(port: int, connections: int, depth: int, seconds: float, fresh: bool = False):
+    latencies: List[float] = []
+    t0 = time.perf_counter()
+    errors = await asyncio.gather(
+        *(client(port, depth, t0 + seconds, latencies, fresh) for _ in range(connections))
+    )
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3
+    return len(latencies) / elapsed, pick(0.5), pick(0.99), sum(errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "cafe_service", "--http", "127.0.0.1:0"],
+        cwd=ROOT, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        port = int(server.stdout.readline().rsplit(":", 1)[1])
+        print(f"{'mode':>10} {'conns':>6} {'depth':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for connections in args.connections:
+            rate, p50, p99, errors = asyncio.run(load(port, connections, 1, args.seconds, fresh=True))
+            print(f"{'fresh':>10} {connections:>6} {1:>6} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f} {errors:>7}")
+            for depth in args.depth:
+                rate, p50, p99, errors = asyncio.run(load(port, connections, depth, args.seconds))
+                mode = "keepalive" if depth == 1 else "pipelined"
+                print(f"{mode:>10} {connections:>6} {depth:>6} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f} {errors:>7}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
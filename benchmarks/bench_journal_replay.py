@@ -0,0 +1,95 @@
+"""Order journal: append cost and crash-recovery replay time.
+
+    python benchmarks/bench_journal_replay.py [--events 1000000]
+
+Writes a journal of ``--events`` records (create, add line, qty change,
+remove line, status change, payment) straight through the record
+encoders, then times JournaledOrderSystem recovery from it, with and
+without a snapshot.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enums import OrderStatus, PaymentStatus
+from order_journal import (
+    JournaledOrderSystem,
+    encode_add_line,
+    encode_create,
+    encode_payment,
+    encode_remove_line,
+    encode_set_qty,
+    encode_status,
+)
+from payment import Payment
+
+ITEMS = [(f"D{i}", f"Drink {i}", 2.0 + i / 10) for i in range(20)]
+
+
+def write_journal(path: str, events: int, seed: int = 1) -> int:
+    rnd = random.Random(seed)
+    now = datetime.utcnow()
+    written = 0
+    with open(path, "wb") as f:
+        n = 0
+        while written < events:
+            oid = f"order-{n:08d}"
+            n += 1
+            recs = [encode_create(oid, now, OrderStatus.NEW)]
+            lines = rnd.sample(ITEMS, 3)
+            for item_id, name, price in lines:
+                recs.append(encode_add_line(oid, item_id, name, price, 1))
+            recs.append(encode_set_qty(oid, lines[0][0], 2))
+            recs.append(encode_remove_line(oid, lines[2][0]))
+            recs.append(encode_status(oid, OrderStatus.PREPARING))
+            recs.append(encode_payment(oid, Payment(f"pay-{n}", 9.5, now, PaymentStatus.PAID)))
+            recs.append(encode_status(oid, OrderStatus.READY))
+            f.write(b"".join(recs))
+            written += len(recs)
+    return written
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="journal-bench-")
+    try:
+        path = os.path.join(directory, "journal.00000000.log")
+        t0 = time.perf_counter()
+        written = write_journal(path, args.events)
+        encode_s = time.perf_counter() - t0
+        size = os.path.getsize(path)
+        print(f"encoded {written} events ({size / written:.1f} B/event) in {encode_s:.2f}s")
+
+        t0 = time.perf_counter()
+        system = JournaledOrderSystem(directory, snapshot_every=0)
+        replay_s = time.perf_counter() - t0
+        print(f"replayed journal: {len(system.orders)} orders in {replay_s:.2f}s "
+              f"({written / replay_s:,.0f} events/s)")
+
+        t0 = time.perf_counter()
+        system.snapshot()
+        system.close()
+        print(f"snapshot written in {time.perf_counter() - t0:.2f}s")
+
+        t0 = time.perf_counter()
+        system = JournaledOrderSystem(directory, snapshot_every=0)
+        print(f"recovered from snapshot: {len(system.orders)} orders in "
+              f"{time.perf_counter() - t0:.2f}s")
+        system.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
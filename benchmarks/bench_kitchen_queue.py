@@ -0,0 +1,107 @@
+"""Rush-hour simulation for KitchenQueue ETAs.
+
+    python benchmarks/bench_kitchen_queue.py [--orders 5000] [--stations 1,2,4] [--rate 9]
+
+Orders arrive as a Poisson process (``--rate`` per hour per station) on a
+manual clock. Real prep times are the estimate times a random factor, and
+the kitchen reports completion through complete(), so quoted ETAs drift
+from reality the way they would in a cafe. For each station count the
+script reports the mean absolute error between the ETA quoted on
+enqueue and the actual ready time, plus the cost of enqueue and eta().
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enums import OrderStatus
+from kitchen_queue import KitchenQueue
+from menu_items import DrinkItem, FoodItem
+from order import Order
+from order_scheduler import ManualClock
+
+ITEMS = [
+    DrinkItem(id="D1", name="Espresso", description="", price=2.50),
+    DrinkItem(id="D2", name="Latte", description="", price=3.20),
+    FoodItem(id="F1", name="Sandwich", description="", price=6.50),
+]
+
+
+def simulate(n: int, stations: int, rate: float, seed: int):
+    rng = random.Random(seed)
+    clock = ManualClock()
+    kitchen = KitchenQueue(stations=stations, clock=clock, auto_complete=False)
+    arrivals = []
+    t = 0.0
+    for i in range(n):
+        t += rng.expovariate(rate * stations / 3600.0)
+        order = Order(order_id=f"O{i}", status=OrderStatus.PREPARING)
+        for item in rng.sample(ITEMS, rng.randint(1, 2)):
+            order.add_item(item, rng.randint(1, 2))
+        arrivals.append((t, order))
+
+    quoted = {}
+    ready = {}
+    finishing = []  # (actual finish, order_id)
+    started = set()
+    enqueue_s = eta_s = 0.0
+
+    def start_new(now):
+        for oid, (start, est, _) in kitchen._active.items():
+            if oid not in started:
+                started.add(oid)
+                actual = (est - start) * rng.uniform(0.7, 1.5)
+                heapq.heappush(finishing, (now + actual, oid))
+
+    i = 0
+    while i < len(arrivals) or finishing:
+        next_arrival = arrivals[i][0] if i < len(arrivals) else float("inf")
+        if finishing and finishing[0][0] <= next_arrival:
+            when, oid = heapq.heappop(finishing)
+            clock.now = when
+            kitchen.complete(oid)
+            ready[oid] = when
+        else:
+            clock.now = next_arrival
+            order = arrivals[i][1]
+            t0 = time.perf_counter()
+            kitchen.enqueue(order)
+            t1 = time.perf_counter()
+            quoted[order.order_id] = kitchen.eta(order.order_id)
+            t2 = time.perf_counter()
+            enqueue_s += t1 - t0
+            eta_s += t2 - t1
+            i += 1
+        start_new(clock.now)
+
+    errors = [abs(ready[oid] - quoted[oid]) for oid in quoted]
+    waits = [ready[o.order_id] - at for at, o in arrivals]
+    return (
+        sum(errors) / len(errors),
+        sum(waits) / len(waits),
+        enqueue_s / n * 1e6,
+        eta_s / n * 1e6,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--stations", default="1,2,4")
+    parser.add_argument("--rate", type=float, default=9.0, help="orders per hour per station")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'stations':>8} {'mean wait s':>12} {'ETA MAE s':>10} {'enqueue us':>11} {'eta us':>8}")
+    for stations in (int(s) for s in args.stations.split(",")):
+        mae, wait, enq_us, eta_us = simulate(args.orders, stations, args.rate, args.seed)
+        print(f"{stations:>8} {wait:>12.1f} {mae:>10.1f} {enq_us:>11.2f} {eta_us:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Bytes per order held in memory, with and without __slots__.
+
+    python benchmarks/bench_memory.py [--orders 1000000]
+
+Builds N paid two-line orders (Order + 2 OrderLines + Payment + Customer)
+and measures them with tracemalloc. "dict" rebuilds the same dataclasses
+without slots, i.e. the per-instance __dict__ layout the domain objects
+used to have; "slots" uses the classes as shipped. Menu items are shared
+between orders, as in a real menu, so they barely register per order.
+"""
+from __future__ import annotations
+import argparse
+import dataclasses
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from customer import Customer
+from enums import OrderStatus, PaymentStatus
+from menu_items import DrinkItem, FoodItem
+from money import Money
+from order import Order
+from order_line import OrderLine
+from payment import Payment
+
+ITEMS = [
+    DrinkItem(id="D1", name="Espresso", description="", price=2.50),
+    FoodItem(id="F1", name="Sandwich", description="", price=6.50),
+]
+
+
+def without_slots(cls):
+    """Same fields as ``cls`` in a plain (``__dict__``) dataclass."""
+    spec = []
+    for f in dataclasses.fields(cls):
+        kw = {"repr": f.repr, "compare": f.compare}
+        if f.default is not dataclasses.MISSING:
+            kw["default"] = f.default
+        if f.default_factory is not dataclasses.MISSING:
+            kw["default_factory"] = f.default_factory
+        spec.append((f.name, f.type, dataclasses.field(**kw)))
+    return dataclasses.make_dataclass(cls.__name__, spec)
+
+
+def build(n: int, order_cls, line_cls, payment_cls, customer_cls) -> list:
+    now = datetime.utcnow()
+    held = []
+    for i in range(n):
+        lines = {item.id: line_cls(item, 1 + i % 3) for item in ITEMS}
+        # Running totals in int cents, as Order.add_item keeps them (the
+        # "dict" classes are bare field copies without the methods).
+        totals = {k: line.item.price.cents * line.qty for k, line in lines.items()}
+        subtotal = sum(totals.values())
+        order = order_cls(
+            order_id=f"{i:032x}",
+            created_at=now.replace(microsecond=i % 1000000),
+            status=OrderStatus.PREPARING,
+            _lines=lines,
+            _line_totals=totals,
+            _subtotal=subtotal,
+            _item_count=sum(line.qty for line in lines.values()),
+        )
+        payment = payment_cls(f"P{i:031x}", Money.from_cents(subtotal), now, PaymentStatus.PAID)
+        customer = customer_cls(f"C{i:031x}", "Guest", "")
+        held.append((order, payment, customer))
+    return held
+
+
+def measure(n: int, classes) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    held = build(n, *classes)
+    elapsed = time.perf_counter() - t0
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The holder list and tuples are the same in both layouts.
+    overhead = sys.getsizeof(held) + n * sys.getsizeof((None, None, None))
+    del held
+    return (size - overhead) / n, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    slotted = (Order, OrderLine, Payment, Customer)
+    layouts = {
+        "dict": tuple(without_slots(c) for c in slotted),
+        "slots": slotted,
+    }
+    results = {}
+    print(f"{'layout':>8} {'bytes/order':>12} {'total MB':>10} {'build s':>9}")
+    for name, classes in layouts.items():
+        per_order, elapsed = measure(args.orders, classes)
+        results[name] = per_order
+        print(f"{name:>8} {per_order:>12.0f} {per_order * args.orders / 1e6:>10.1f} {elapsed:>9.2f}")
+    saved = 1 - results["slots"] / results["dict"]
+    print(f"slots save {saved:.0%} per order")
+
+
+if __name__ == "__main__":
+    main()
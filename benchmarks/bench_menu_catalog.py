@@ -0,0 +1,101 @@
+"""Menu catalog import/export throughput (CSV and JSONL).
+
+    python benchmarks/bench_menu_catalog.py [--items 100000] [--chunk 1000]
+
+Writes a synthetic catalog with export_catalog, then loads it back with
+load_catalog (streamed in chunks through MenuItemFactory.create_batch
+and Menu.add_items) and, for comparison, with one add_item per row. A
+small share of rows is corrupted to exercise per-row error reporting.
+"peak MB" is the traced peak of streaming the file through the parser
+and factory alone, to compare with the file size.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from menu import Menu
+from menu_catalog import export_catalog, iter_catalog, load_catalog
+from menu_items import DrinkItem, FoodItem
+
+WORDS = (
+    "espresso latte mocha matcha chai oat almond soy vanilla caramel hazelnut "
+    "chocolate cinnamon sandwich panini wrap salad soup bagel croissant muffin"
+).split()
+
+
+def make_items(n: int, seed: int):
+    rnd = random.Random(seed)
+    for i in range(n):
+        name = " ".join(rnd.sample(WORDS, 2))
+        price = rnd.randint(95, 1295) / 100
+        if i % 2:
+            yield DrinkItem(f"D{i}", name, f"{name} drink", price, size=rnd.choice("SML"), is_hot=i % 3 > 0)
+        else:
+            yield FoodItem(f"F{i}", name, f"{name} plate", price, dietary_info=rnd.choice(("", "vegan", "gluten")))
+
+
+def corrupt(path: str, every: int) -> None:
+    # Break the price (its only '.') of every ``every``-th data row.
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    for i in range(every, len(lines), every):
+        lines[i] = lines[i].replace(".", "x", 1)
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+def load_one_by_one(path: str) -> Menu:
+    menu = Menu("BENCH", "Benchmark Menu")
+    for items, _ in iter_catalog(path):
+        for item in items:
+            menu.add_item(item)
+    return menu
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--chunk", type=int, default=1000)
+    parser.add_argument("--bad-every", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'format':>6} {'export/s':>10} {'load/s':>10} {'add_item/s':>11} {'errors':>7} {'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("csv", "jsonl"):
+            path = os.path.join(tmp, f"catalog.{fmt}")
+            t0 = time.perf_counter()
+            export_catalog(make_items(args.items, args.seed), path)
+            t_export = time.perf_counter() - t0
+            corrupt(path, args.bad_every)
+
+            menu = Menu("BENCH", "Benchmark Menu")
+            t0 = time.perf_counter()
+            report = load_catalog(menu, path, chunk_size=args.chunk)
+            t_load = time.perf_counter() - t0
+
+            tracemalloc.start()
+            for _ in iter_catalog(path, chunk_size=args.chunk):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            t0 = time.perf_counter()
+            load_one_by_one(path)
+            t_single = time.perf_counter() - t0
+            print(
+                f"{fmt:>6} {args.items / t_export:>10,.0f} {report.loaded / t_load:>10,.0f} "
+                f"{report.loaded / t_single:>11,.0f} {len(report.errors):>7} {peak / 1e6:>8.1f} "
+                f"{os.path.getsize(path) / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Menu search: inverted index vs. a naive scan of Menu._items.
+
+    python benchmarks/bench_menu_search.py [--items 50000] [--repeat 200]
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from menu import Menu
+from menu_items import DrinkItem, FoodItem
+
+WORDS = (
+    "espresso latte mocha matcha chai oat almond soy vanilla caramel hazelnut "
+    "chocolate cinnamon ginger lemon berry mango banana sandwich panini wrap "
+    "salad soup bagel croissant muffin scone brownie cookie toast cheese ham "
+    "chicken tuna falafel halloumi avocado tomato basil pesto mushroom spinach"
+).split()
+ALLERGENS = ("gluten", "dairy", "nuts", "soy", "egg", "sesame", "vegan", "vegetarian")
+QUERIES = ("caramel latte", "glutn", "choc brownie", "vegan wrap", "hazelnt", "ses")
+
+
+def pseudo_words(rnd: random.Random, n: int):
+    # Stand-ins for the long tail of brand and flavour names in a real catalog.
+    syll = ("ka", "lo", "mi", "ra", "tu", "ve", "zo", "ne", "pa", "shi", "do", "ri")
+    return ["".join(rnd.choice(syll) for _ in range(rnd.randint(2, 4))) for _ in range(n)]
+
+
+def build_menu(n: int, seed: int = 1) -> Menu:
+    rnd = random.Random(seed)
+    tail = pseudo_words(rnd, 5000)
+    menu = Menu("BENCH", "Benchmark Menu")
+    for i in range(n):
+        name = f"{rnd.choice(tail)} {rnd.choice(WORDS)} {rnd.choice(tail)}"
+        desc = " ".join(rnd.sample(WORDS, 3) + rnd.sample(tail, 2))
+        if i % 2:
+            item = FoodItem(id=f"F{i}", name=name, description=desc, price=5.0,
+                            dietary_info=" ".join(rnd.sample(ALLERGENS, 2)))
+        else:
+            item = DrinkItem(id=f"D{i}", name=name, description=desc, price=3.0)
+        menu.add_item(item)
+    return menu
+
+
+def naive_search(menu: Menu, text: str, limit: int = 20):
+    words = text.lower().split()
+    out = []
+    for item in menu._items.values():
+        hay = f"{item.name} {item.description} {getattr(item, 'dietary_info', '')}".lower()
+        if all(w in hay for w in words):
+            out.append(item)
+            if len(out) >= limit:
+                break
+    return out
+
+
+def timeit(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    menu = build_menu(args.items)
+    print(f"built {args.items} items + index in {time.perf_counter() - t0:.2f}s")
+    print(f"{'query':<16}{'index ms':>10}{'scan ms':>10}{'hits':>6}")
+    for q in QUERIES:
+        menu.search(q)  # warm the per-term ranking cache
+        idx_ms = timeit(lambda: menu.search(q), args.repeat)
+        scan_ms = timeit(lambda: naive_search(menu, q), max(1, args.repeat // 20))
+        print(f"{q:<16}{idx_ms:>10.3f}{scan_ms:>10.3f}{len(menu.search(q)):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Cold start to a usable menu: catalog parse vs object rebuild vs binary snapshot.
+
+    python benchmarks/bench_menu_snapshot.py [--items 100000] [--runs 3]
+
+Each strategy runs in a fresh interpreter and is timed from before its
+imports until the menu has answered a get_item and an available-items
+query. "rebuild" constructs every item through MenuItemFactory the way
+CafeApp._seed_demo_data does; "csv" is load_catalog; "snapshot" is
+Menu.load_snapshot (content hash checked, items built lazily) and
+"cached" is menu_catalog.load_cached, which also hashes the CSV to
+validate the snapshot. The time of the first search() on the snapshot
+menu, which builds the remaining items and the search index, is shown
+separately.
+"""
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_menu_catalog import make_items
+from menu import Menu
+from menu_catalog import export_catalog, load_cached
+from menu_snapshot import source_digest
+
+PROLOGUE = f"import sys, time; t0 = time.perf_counter(); sys.path.insert(0, {ROOT!r})\n"
+EPILOGUE = (
+    "menu.get_item(probe); menu.query(only_available=True, max_price=5)\n"
+    "print(time.perf_counter() - t0)\n"
+    "t1 = time.perf_counter(); menu.search('latte'); print(time.perf_counter() - t1)\n"
+)
+
+SCRIPTS = {
+    "rebuild": (
+        "import pickle\n"
+        "from menu import Menu\n"
+        "from menu_item_factory import MenuItemFactory\n"
+        "rows = pickle.load(open({rows!r}, 'rb'))\n"
+        "menu = Menu('MENU', 'Menu')\n"
+        "for kind, kwargs in rows:\n"
+        "    menu.add_item(MenuItemFactory.create_menu_item(kind, **kwargs))\n"
+    ),
+    "csv": (
+        "from menu import Menu\n"
+        "from menu_catalog import load_catalog\n"
+        "menu = Menu('MENU', 'Menu'); load_catalog(menu, {csv!r})\n"
+    ),
+    "snapshot": (
+        "from menu import Menu\n"
+        "menu = Menu.load_snapshot({snapshot!r})\n"
+    ),
+    "cached": (
+        "from menu_catalog import load_cached\n"
+        "menu, _ = load_cached({csv!r}, {snapshot!r})\n"
+    ),
+}
+
+
+def write_rows(items, path: str) -> None:
+    import pickle
+    rows = []
+    for item in items:
+        kwargs = {"id": item.id, "name": item.name, "description": item.description,
+                  "price": float(item.price), "available": item.available}
+        if hasattr(item, "size"):
+            rows.append(("drink", {**kwargs, "size": item.size, "is_hot": item.is_hot}))
+        else:
+            rows.append(("food", {**kwargs, "dietary_info": item.dietary_info}))
+    with open(path, "wb") as f:
+        pickle.dump(rows, f)
+
+
+def run(script: str, probe: str):
+    out = subprocess.run(
+        [sys.executable, "-c", PROLOGUE + f"probe = {probe!r}\n" + script + EPILOGUE],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return float(out[0]), float(out[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, name) for name in ("rows", "csv", "snapshot")}
+        paths["csv"] += ".csv"
+        items = list(make_items(args.items, args.seed))
+        write_rows(items, paths["rows"])
+        export_catalog(items, paths["csv"])
+        load_cached(paths["csv"], paths["snapshot"])
+        sizes = {name: os.path.getsize(path) for name, path in paths.items()}
+        sizes["rebuild"], sizes["cached"] = sizes["rows"], sizes["snapshot"]
+        Menu.load_snapshot(paths["snapshot"], source_digest(paths["csv"]))  # cache is valid
+        probe = items[len(items) // 2].id
+
+        print(f"{'strategy':>9} {'start ms':>9} {'1st search ms':>14} {'file MB':>8}")
+        for name, script in SCRIPTS.items():
+            timings = [run(script.format(**paths), probe) for _ in range(args.runs)]
+            start, search = min(timings)
+            print(f"{name:>9} {start * 1e3:>9.0f} {search * 1e3:>14.0f} {sizes[name] / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
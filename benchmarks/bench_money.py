@@ -0,0 +1,180 @@
+"""Pricing throughput: float vs Decimal vs integer-cents Money.
+
+    python benchmarks/bench_money.py [--baskets 100000] [--rate 0.0725]
+
+Each kernel prices the same baskets: sum of unit price x qty, tax at
+``--rate`` rounded to the cent, and total. "float" is the old arithmetic
+(round() at each step), "Decimal" uses quantize with banker's rounding,
+"Money" does the same sums with Money objects, and "cents" is what Order
+and Bill actually do: add integer cents and wrap the result once. The
+script also counts baskets where the float result differs from the
+exact one.
+
+The billing rows run over built orders, against the same lines priced
+the way the float Order and Bill did (sum of float line totals, round()
+for tax and total, a Bill per order). "recompute total" sums every line
+in cents, which is the same work the float total did. Order now keeps that
+sum up to date, so calculate_total is timed on its own, along with
+building the orders with Order.add_item.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import ROUND_HALF_EVEN, Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bill import Bill
+from menu_items import DrinkItem
+from money import ZERO, Money, scale_cents
+from order import Order
+
+CENT = Decimal("0.01")
+
+
+def make_baskets(n: int, seed: int):
+    rng = random.Random(seed)
+    prices = [rng.randint(95, 1295) for _ in range(40)]  # cents
+    return [[(rng.choice(prices), rng.randint(1, 4)) for _ in range(rng.randint(1, 6))] for _ in range(n)]
+
+
+def run_float(baskets, rate):
+    out = []
+    for basket in baskets:
+        sub = 0.0
+        for price, qty in basket:
+            sub += price * qty
+        tax = round(sub * rate, 2)
+        out.append(round(sub + tax, 2))
+    return out
+
+
+def run_decimal(baskets, rate):
+    out = []
+    for basket in baskets:
+        sub = Decimal(0)
+        for price, qty in basket:
+            sub += price * qty
+        tax = (sub * rate).quantize(CENT, ROUND_HALF_EVEN)
+        out.append(sub + tax)
+    return out
+
+
+def run_money(baskets, rate):
+    out = []
+    for basket in baskets:
+        sub = ZERO
+        for price, qty in basket:
+            sub += price * qty
+        out.append(sub + sub.scaled(rate))
+    return out
+
+
+def run_cents(baskets, rate):
+    out = []
+    for basket in baskets:
+        cents = 0
+        for price, qty in basket:
+            cents += price * qty
+        out.append(Money.from_cents(cents + scale_cents(cents, rate)))
+    return out
+
+
+def build_orders(baskets, items):
+    orders = []
+    for i, basket in enumerate(baskets):
+        order = Order(order_id=str(i))
+        for price, qty in basket:
+            order.add_item(items[price], qty)
+        orders.append(order)
+    return orders
+
+
+def run_float_bills(lines, rate):
+    for order_lines in lines:
+        sub = sum(price * qty for price, qty in order_lines)
+        tax = round(sub * rate, 2)
+        Bill(bill_id="B1", issue_at=datetime.utcnow(), sub_total=round(sub, 2), tax=tax, total=round(sub + tax, 2))
+
+
+def run_money_bills(orders, rate):
+    for order in orders:
+        Bill.generate_from(order, "B1", rate)
+
+
+def run_float_totals(lines):
+    for order_lines in lines:
+        sum(price * qty for price, qty in order_lines)
+
+
+def run_cents_totals(orders):
+    for order in orders:
+        Money.from_cents(sum(line.line_cents() for line in order.get_lines()))
+
+
+def run_cached_totals(orders):
+    for order in orders:
+        order.calculate_total()
+
+
+def timed(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baskets", type=int, default=100_000)
+    parser.add_argument("--rate", default="0.0725")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    cents = make_baskets(args.baskets, args.seed)
+    as_float = [[(p / 100, q) for p, q in b] for b in cents]
+    as_decimal = [[(Decimal(p) / 100, q) for p, q in b] for b in cents]
+    as_money = [[(Money.from_cents(p), q) for p, q in b] for b in cents]
+    rate_f, rate_d = float(args.rate), Decimal(args.rate)
+
+    exact = [int(d * 100) for d in run_decimal(as_decimal, rate_d)]
+    assert [m.cents for m in run_money(as_money, rate_f)] == exact
+    assert [m.cents for m in run_cents(cents, rate_f)] == exact
+    off = sum(round(f * 100) != c for f, c in zip(run_float(as_float, rate_f), exact))
+
+    rows = [
+        ("float", timed(run_float, as_float, rate_f)),
+        ("Decimal", timed(run_decimal, as_decimal, rate_d)),
+        ("Money", timed(run_money, as_money, rate_f)),
+        ("cents", timed(run_cents, cents, rate_f)),
+    ]
+    base = rows[0][1]
+    print(f"{'kernel':>8} {'baskets/s':>12} {'vs float':>9}")
+    for name, t in rows:
+        print(f"{name:>8} {args.baskets / t:>12,.0f} {base / t:>8.2f}x")
+    print(f"float totals off by a cent vs exact: {off} of {args.baskets}")
+
+    items = {p: DrinkItem(id=f"I{p}", name="", description="", price=p / 100) for b in cents for p, _ in b}
+    t0 = time.perf_counter()
+    orders = build_orders(cents, items)
+    built = time.perf_counter() - t0
+    lines = [[(float(line.unit_price), line.qty) for line in order.get_lines()] for order in orders]
+
+    print(f"\n{'billing':>16} {'float':>12} {'Money':>12} {'vs float':>9}")
+    for name, slow, fast in (
+        ("recompute total", timed(run_float_totals, lines), timed(run_cents_totals, orders)),
+        ("generate_from", timed(run_float_bills, lines, rate_f), timed(run_money_bills, orders, rate_f)),
+    ):
+        print(f"{name:>16} {args.baskets / slow:>12,.0f} {args.baskets / fast:>12,.0f} {slow / fast:>8.2f}x")
+    print(f"Order.calculate_total (running total): {args.baskets / timed(run_cached_totals, orders):,.0f} orders/s")
+    print(f"Order.add_item (building the orders): {args.baskets / built:,.0f} orders/s")
+
+
+if __name__ == "__main__":
+    main()
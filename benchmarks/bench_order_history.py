@@ -0,0 +1,116 @@
+"""OrderHistory query latency over millions of order lines (needs numpy).
+
+    python benchmarks/bench_order_history.py [--lines 5000000] [--items 120] [--walk 200000]
+
+Fills the columnar store directly with a synthetic day (Zipf-ish item
+popularity, one order per ~2 lines) and times revenue per hour, top 10
+items and revenue per item. The same queries are then run as a Python
+walk over ``--walk`` real Order objects for comparison, scaled to the
+same number of lines.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from enums import OrderStatus
+from menu_items import DrinkItem
+from order import Order
+from order_history import COLUMNS, OrderHistory, _STATUS_CODE
+
+DAY = datetime(2024, 5, 1)
+
+
+def synthetic(lines: int, items: int, seed: int) -> OrderHistory:
+    rng = np.random.default_rng(seed)
+    history = OrderHistory()
+    history.item_ids = [f"I{i}" for i in range(items)]
+    history._item_index = {item_id: i for i, item_id in enumerate(history.item_ids)}
+    orders = lines // 2
+    history.order_ids = [f"O{i}" for i in range(orders)]
+    history._order_index = {}  # not needed for queries
+    order = np.sort(rng.integers(0, orders, lines))
+    weights = 1.0 / np.arange(1, items + 1)
+    cols = {
+        "order": order,
+        "item": rng.choice(items, lines, p=weights / weights.sum()),
+        "qty": rng.integers(1, 4, lines),
+        "price_cents": rng.integers(150, 900, lines),
+        "ts": int(DAY.timestamp()) + order * (16 * 3600) // orders,
+        "status": np.full(lines, _STATUS_CODE[OrderStatus.READY]),
+    }
+    history._cols = {name: cols[name].astype(dtype) for name, (_, dtype) in COLUMNS.items()}
+    return history
+
+
+def walk_orders(n: int, items: int, seed: int):
+    rng = random.Random(seed)
+    catalog = [DrinkItem(id=f"I{i}", name=f"Item {i}", description="", price=rng.randint(150, 900) / 100) for i in range(items)]
+    orders = []
+    for i in range(n):
+        order = Order(order_id=f"O{i}", created_at=DAY + timedelta(seconds=i * 16 * 3600 // n))
+        for item in rng.sample(catalog, 2):
+            order.add_item(item, rng.randint(1, 3))
+        order.status = OrderStatus.READY
+        orders.append(order)
+    return orders
+
+
+def walk_queries(orders):
+    by_hour, by_item, units = {}, {}, {}
+    for o in orders:
+        if o.status != OrderStatus.READY:
+            continue
+        hour = o.created_at.replace(minute=0, second=0, microsecond=0)
+        by_hour[hour] = by_hour.get(hour, 0.0) + o.calculate_total()
+        for line in o.get_lines():
+            by_item[line.item.id] = by_item.get(line.item.id, 0.0) + line.line_total()
+            units[line.item.id] = units.get(line.item.id, 0) + line.qty
+    top = sorted(units.items(), key=lambda kv: -kv[1])[:10]
+    return by_hour, by_item, top
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5_000_000)
+    parser.add_argument("--items", type=int, default=120)
+    parser.add_argument("--walk", type=int, default=200_000, help="orders for the object-walk baseline")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    history = synthetic(args.lines, args.items, args.seed)
+    queries = {
+        "revenue_by_hour": history.revenue_by_hour,
+        "top_items(10)": history.top_items,
+        "by_item(revenue)": history.by_item,
+        "total_revenue": history.total_revenue,
+    }
+    print(f"{len(history):,} lines")
+    print(f"{'query':>18} {'ms':>9}")
+    for name, fn in queries.items():
+        print(f"{name:>18} {timed(fn):>9.1f}")
+
+    orders = walk_orders(args.walk, args.items, args.seed)
+    walk_ms = timed(lambda: walk_queries(orders), repeat=1)
+    scaled = walk_ms * args.lines / (2 * args.walk)
+    print(f"object walk, {2 * args.walk:,} lines: {walk_ms:.0f} ms (~{scaled:.0f} ms scaled to {len(history):,} lines)")
+
+
+if __name__ == "__main__":
+    main()
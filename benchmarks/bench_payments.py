@@ -0,0 +1,80 @@
+"""AsyncPaymentService throughput and tail latency against FakeGateway.
+
+    python benchmarks/bench_payments.py [--payments 5000] [--concurrency 1,16,64,256]
+
+The gateway answers in ``--latency`` +/- ``--jitter`` seconds, fails
+transiently at ``--error-rate`` and loses replies (charged, then
+silent) at ``--lost-rate``. For each concurrency limit the script
+reports payments/s, p50/p99 latency per payment (including retries),
+retries, failures and "orphaned" charges: keys the gateway captured for
+a payment that still came back FAILED because every reply was lost.
+Retrying such a payment with its key returns the original charge; a key
+is never captured twice.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_payments import AsyncPaymentService, FakeGateway
+from enums import PaymentStatus
+
+
+def percentile(sorted_values, p: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+
+async def run(args, concurrency: int):
+    gateway = FakeGateway(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        lost_rate=args.lost_rate, seed=args.seed,
+    )
+    service = AsyncPaymentService(
+        gateway, max_concurrency=concurrency, timeout=args.timeout, backoff=0.01, seed=args.seed
+    )
+    latencies = []
+
+    async def pay(i: int):
+        t0 = time.perf_counter()
+        payment = await service.process_payment(4.20, idempotency_key=f"K{i}")
+        latencies.append(time.perf_counter() - t0)
+        return payment
+
+    t0 = time.perf_counter()
+    payments = await asyncio.gather(*(pay(i) for i in range(args.payments)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    failed = [p for p in payments if p.status != PaymentStatus.PAID]
+    orphaned = sum(p.payment_id in gateway.charged for p in failed)
+    return elapsed, latencies, service.stats, len(failed), orphaned
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=5000)
+    parser.add_argument("--concurrency", default="1,16,64,256")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--lost-rate", type=float, default=0.005)
+    parser.add_argument("--timeout", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'limit':>6} {'pay/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'retries':>8} {'failed':>7} {'orphaned':>9}")
+    for limit in (int(c) for c in args.concurrency.split(",")):
+        payments = args.payments if limit > 1 else min(args.payments, 200)
+        run_args = argparse.Namespace(**{**vars(args), "payments": payments})
+        elapsed, lat, stats, failed, orphaned = asyncio.run(run(run_args, limit))
+        print(
+            f"{limit:>6} {payments / elapsed:>9,.0f} {percentile(lat, 0.5) * 1e3:>8.1f} "
+            f"{percentile(lat, 0.99) * 1e3:>8.1f} {stats.retries:>8} {failed:>7} {orphaned:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Startup cost of the headless service vs the Tk app.
+
+    python benchmarks/bench_startup.py [--runs 7] [--top 12]
+
+Wall clock is the best of ``--runs`` fresh interpreters for: a bare
+interpreter, ``python -m cafe_service --check`` (build the core and
+exit) and ``import gui_tk``. The import profile comes from
+``-X importtime`` on ``import cafe_service``: total time against
+cafe_service.IMPORT_BUDGET_MS, the modules with the largest self time,
+and whether any of cafe_service.LAZY_MODULES were loaded.
+"""
+from __future__ import annotations
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from cafe_service import IMPORT_BUDGET_MS, LAZY_MODULES
+
+
+def wall(args: List[str], runs: int) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, check=True, capture_output=True)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def import_profile(module: str) -> Dict[str, Tuple[int, int]]:
+    """module -> (self us, cumulative us) from one ``-X importtime`` run."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stderr
+    profile = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            profile[name.strip()] = (int(self_us), int(cumulative))
+    return profile
+
+
+def best_profile(module: str, runs: int) -> Dict[str, Tuple[int, int]]:
+    best: Dict[str, Tuple[int, int]] = {}
+    for _ in range(runs):
+        for name, times in import_profile(module).items():
+            best[name] = min(best.get(name, times), times)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    print(f"{'startup':>32} {'wall ms':>8}")
+    base = wall(["-c", "pass"], args.runs)
+    rows = [
+        ("python (bare)", base),
+        ("python -m cafe_service --check", wall(["-m", "cafe_service", "--check"], args.runs)),
+    ]
+    try:
+        rows.append(("import gui_tk", wall(["-c", "import gui_tk"], args.runs)))
+    except subprocess.CalledProcessError:
+        rows.append(("import gui_tk (no tkinter)", float("nan")))
+    for name, t in rows:
+        print(f"{name:>32} {t * 1e3:>8.0f}")
+
+    profile = best_profile("cafe_service", args.runs)
+    total_ms = profile["cafe_service"][1] / 1e3
+    verdict = "within" if total_ms <= IMPORT_BUDGET_MS else "OVER"
+    print(f"\nimport cafe_service: {total_ms:.0f} ms ({verdict} budget of {IMPORT_BUDGET_MS} ms)")
+    loaded = [m for m in LAZY_MODULES if m in profile]
+    print(f"lazy modules loaded at import: {', '.join(loaded) or 'none'}")
+    print(f"\n{'module':>24} {'self ms':>8} {'cumul ms':>9}")
+    for name, (self_us, cumulative) in sorted(profile.items(), key=lambda kv: -kv[1][0])[:args.top]:
+        print(f"{name:>24} {self_us / 1e3:>8.1f} {cumulative / 1e3:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Hot-path benchmark suite with scaling curves and a regression check.
+
+    python benchmarks/bench_suite.py [--filter order.] [--repeat 3] [--runs 5] [--output results.json]
+                                     [--baseline benchmarks/baseline.json] [--threshold 0.3]
+                                     [--update-baseline] [--reference benchmarks/reference.json]
+                                     [--root DIR]
+
+Every case is timed at several sizes (lines per order, observers per
+order, items per menu, orders in the system, payments in the ledger) so
+the table shows how cost grows. A case is run in loops sized by
+timeit's autorange, ``--repeat`` times, and the best time per call is
+kept, in nanoseconds. Cases whose call adds state (creating orders,
+recording payments) instead time a fixed batch of calls on a fresh copy
+of the state for each repeat, so the size is what the calls actually
+see. Each size is measured ``--runs`` times, each time on freshly built
+state, and the runs take turns across cases so they are spread over the
+session; the median is reported and stored.
+
+Results are compared against ``--baseline`` when it exists: a size
+whose every run is more than ``--threshold`` slower than the baseline
+median is reported as a regression and the script exits with status 1.
+Timings only compare on the same machine, so refresh the stored
+baseline there with ``--update-baseline`` before relying on the check.
+The same state built twice can time 30-60% apart, which is why one run
+or one median is not trusted on its own.
+
+``--reference`` holds results for the tree the hot-path work started
+from, so slowdowns that are already in the baseline stay visible: they
+get their own column and are listed after the regression check, without
+failing it. ``--root`` imports the domain modules from another checkout
+and only reports; cases that tree cannot run (no payment ledger, say)
+are skipped. To refresh the reference:
+
+    git archive b174126 | tar -x -C /tmp/pre-series
+    python benchmarks/bench_suite.py --root /tmp/pre-series --output benchmarks/reference.json
+
+The cases stick to calls that tree already had, so both sides do the
+same work.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _root() -> str:
+    # --root has to be on sys.path before the domain modules are imported.
+    pre = argparse.ArgumentParser(add_help=False)
+    pre.add_argument("--root", default=os.path.dirname(HERE))
+    return os.path.abspath(pre.parse_known_args()[0].root)
+
+
+sys.path.insert(0, _root())
+
+from bill import Bill
+from menu import Menu
+from menu_items import DrinkItem, FoodItem
+from observers import OrderObserver
+from order import Order
+from order_system import OrderSystem
+from payment_service import PaymentService
+
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+DEFAULT_REFERENCE = os.path.join(HERE, "reference.json")
+TAX_RATE = 0.15
+# Calls per timed batch for the cases that add state.
+BATCH = 200
+
+
+def make_items(n: int) -> List:
+    # Every third item is food and every seventh is unavailable, so
+    # list_items(only_available=True) has real filtering to do.
+    return [
+        (FoodItem if i % 3 == 0 else DrinkItem)(
+            id=f"I{i}", name=f"Item {i}", description="", price=1 + (i * 37 % 900) / 100,
+            available=i % 7 != 0,
+        )
+        for i in range(n)
+    ]
+
+
+def make_order(lines: int) -> Order:
+    order = Order(order_id="O1")
+    for item in [i for i in make_items(2 * lines + 1) if i.available][:lines]:
+        order.add_item(item, 2)
+    return order
+
+
+class _Counter(OrderObserver):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def update(self, order: Order) -> None:
+        self.calls += 1
+
+
+# Each setup builds the state for one size and returns the call to time;
+# for batch cases it returns a factory that hands out a fresh copy of
+# that state with the call to time on it.
+
+def order_add_item(lines: int) -> Callable[[], None]:
+    order = make_order(lines)
+    items = itertools.cycle([line.item for line in order.get_lines()])
+    return lambda: order.add_item(next(items), 1)
+
+
+def order_add_item_observed(observers: int) -> Callable[[], None]:
+    order = make_order(3)
+    for _ in range(observers):
+        order.add_observer(_Counter())
+    items = itertools.cycle([line.item for line in order.get_lines()])
+    return lambda: order.add_item(next(items), 1)
+
+
+def order_add_remove_item(lines: int) -> Callable[[], None]:
+    order = make_order(lines)
+    extra = DrinkItem(id="EXTRA", name="Extra", description="", price=1.0)
+
+    def op() -> None:
+        order.add_item(extra, 1)
+        order.remove_item(extra.id)
+    return op
+
+
+def order_calculate_total(lines: int) -> Callable[[], None]:
+    return make_order(lines).calculate_total
+
+
+def order_notify_observers(observers: int) -> Callable[[], None]:
+    order = make_order(3)
+    for _ in range(observers):
+        order.add_observer(_Counter())
+    return order.notify_observers
+
+
+def menu_list_items(items: int) -> Callable[[], None]:
+    menu = Menu("M1", "Menu")
+    for item in make_items(items):
+        menu.add_item(item)
+    return lambda: menu.list_items(only_available=True)
+
+
+def bill_generate_from(lines: int) -> Callable[[], None]:
+    order = make_order(lines)
+    return lambda: Bill.generate_from(order, "B1", TAX_RATE)
+
+
+def bill_to_text(lines: int) -> Callable[[], None]:
+    order = make_order(lines)
+    bill = Bill.generate_from(order, "B1", TAX_RATE)
+    return lambda: bill.to_text(order)
+
+
+def payment_process_payment(payments: int) -> Callable[[], Callable[[], None]]:
+    from payment_ledger import PaymentLedger
+
+    service = PaymentService()
+    for i in range(payments):
+        service.process_payment(5.75, order_id=f"O{i}")
+    recorded = list(service.ledger)
+
+    def fresh() -> Callable[[], None]:
+        ledger = PaymentLedger()
+        for payment in recorded:
+            ledger.record(payment)
+        copy = PaymentService(ledger)
+        return lambda: copy.process_payment(5.75, order_id="O1")
+    return fresh
+
+
+def system_create_order(orders: int) -> Callable[[], Callable[[], None]]:
+    system = OrderSystem()
+    for _ in range(orders):
+        system.create_order(None)
+
+    def fresh() -> Callable[[], None]:
+        copy = OrderSystem(dict(system.orders))
+        return lambda: copy.create_order(None)
+    return fresh
+
+
+def system_get_order(orders: int) -> Callable[[], None]:
+    system = OrderSystem()
+    ids = itertools.cycle([system.create_order(None).order_id for _ in range(orders)])
+    return lambda: system.get_order(next(ids))
+
+
+# name -> (size parameter, sizes, setup, batch case)
+CASES: Dict[str, Tuple[str, Tuple[int, ...], Callable[[int], Callable], bool]] = {
+    "order.add_item": ("lines", (1, 10, 100), order_add_item, False),
+    "order.add_item_observed": ("observers", (1, 10), order_add_item_observed, False),
+    "order.add_remove_item": ("lines", (1, 10, 100), order_add_remove_item, False),
+    "order.calculate_total": ("lines", (1, 10, 100), order_calculate_total, False),
+    "order.notify_observers": ("observers", (0, 1, 10, 100), order_notify_observers, False),
+    "menu.list_items": ("items", (100, 1_000, 10_000), menu_list_items, False),
+    "bill.generate_from": ("lines", (1, 10, 100), bill_generate_from, False),
+    "bill.to_text": ("lines", (1, 10, 100), bill_to_text, False),
+    "payment.process_payment": ("payments", (0, 1_000, 100_000), payment_process_payment, True),
+    "system.create_order": ("orders", (0, 1_000, 100_000), system_create_order, True),
+    "system.get_order": ("orders", (1, 1_000, 100_000), system_get_order, False),
+}
+
+
+def measure(state: Callable, repeat: int, batch: bool) -> float:
+    if batch:
+        return min(timeit.Timer(state()).timeit(BATCH) for _ in range(repeat)) / BATCH * 1e9
+    timer = timeit.Timer(state)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat, loops)) / loops * 1e9
+
+
+def compare(samples: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, sizes in samples.items():
+        for size, runs in sizes.items():
+            base = baseline.get(name, {}).get(str(size))
+            fastest = min(runs)
+            if base is not None and fastest > base * (1 + threshold):
+                ns = statistics.median(runs)
+                regressions.append(
+                    f"{name}[{size}]: {base:,.0f} -> {ns:,.0f} ns ({ns / base - 1:+.0%}, fastest run {fastest / base - 1:+.0%})"
+                )
+    return regressions
+
+
+def load_results(path: str) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5, help="independent runs per size; the median is kept")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown, 0.3 = 30%%")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--reference", default=DEFAULT_REFERENCE, help="results for the pre-series tree")
+    parser.add_argument("--root", default=os.path.dirname(HERE), help="checkout to import the modules from")
+    args = parser.parse_args()
+    other_tree = _root() != os.path.dirname(HERE)
+    if other_tree and args.update_baseline:
+        parser.error("--update-baseline measures this tree; drop --root")
+
+    baseline: Dict = {}
+    reference: Dict = {}
+    if not other_tree:
+        if not args.update_baseline:
+            baseline = load_results(args.baseline)
+        reference = load_results(args.reference)
+
+    selected = {name: case for name, case in CASES.items() if args.filter in name}
+    samples: Dict[str, Dict[int, List[float]]] = {
+        name: {size: [] for size in case[1]} for name, case in selected.items()
+    }
+    # Each run goes through every case, so the samples of one size are
+    # spread over the whole session instead of taken back to back.
+    for run in range(args.runs):
+        print(f"run {run + 1}/{args.runs}", file=sys.stderr)
+        for name, (param, sizes, setup, batch) in list(selected.items()):
+            for size in sizes:
+                try:
+                    state = setup(size)
+                except ImportError as e:
+                    print(f"skipping {name}: {e}", file=sys.stderr)
+                    del selected[name], samples[name]
+                    break
+                samples[name][size].append(measure(state, args.repeat, batch))
+
+    def column(results: Dict, name: str, size: int, ns: float) -> Tuple[str, str]:
+        base = results.get(name, {}).get(str(size))
+        return (f"{base:,.0f}", f"{ns / base - 1:+.0%}") if base else ("-", "-")
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(
+        f"{'case':>24} {'param':>9} {'size':>7} {'ns/op':>10} {'scaling':>8}"
+        f" {'baseline':>10} {'change':>7} {'pre-series':>10} {'change':>7}"
+    )
+    for name, (param, sizes, setup, batch) in selected.items():
+        results[name] = {}
+        first = None
+        for size in sizes:
+            ns = statistics.median(samples[name][size])
+            results[name][str(size)] = round(ns, 1)
+            first = first or ns
+            base_text, change = column(baseline, name, size, ns)
+            ref_text, ref_change = column(reference, name, size, ns)
+            print(
+                f"{name:>24} {param:>9} {size:>7} {ns:>10,.0f} {ns / first:>7.1f}x"
+                f" {base_text:>10} {change:>7} {ref_text:>10} {ref_change:>7}"
+            )
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.baseline if args.update_baseline else None)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"wrote {path}")
+
+    # Reported only: these are what the baseline already accepted.
+    slower = compare(samples, reference, args.threshold)
+    if slower:
+        print(f"\n{len(slower)} case(s) over {args.threshold:.0%} slower than the pre-series reference:")
+        for line in slower:
+            print(f"  {line}")
+
+    regressions = compare(samples, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    if baseline:
+        print(f"\nno regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
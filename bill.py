@@ -1,32 +1,81 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
+from enums import Rounding
+from money import Money
 from order import Order
 
+# generate_batch remembers the rounding of at most this many distinct subtotals.
+BATCH_MEMO_SIZE = 4096
 
-@dataclass
+
+def _amounts(sub: Money, tax_rate: float, rounding: Optional[Rounding] = None) -> Tuple[Money, Money, Money]:
+    # The one rounding rule for bills: (sub_total, tax, total).
+    tax = sub.scaled(tax_rate, rounding)
+    return sub, tax, sub + tax
+
+
+@dataclass(slots=True)
 class Bill:
     bill_id: str
     issue_at: datetime
-    sub_total: float
-    tax: float
-    total: float
+    sub_total: Money
+    tax: Money
+    total: Money
 
     @staticmethod
-    def generate_from(order: Order, bill_id: str, tax_rate: float) -> "Bill":
-        sub = float(order.calculate_total())
-        tax = round(sub * float(tax_rate), 2)
-        total = round(sub + tax, 2)
+    def generate_from(
+        order: Order, bill_id: str, tax_rate: float, rounding: Optional[Rounding] = None
+    ) -> "Bill":
+        sub_total, tax, total = _amounts(order.calculate_total(), tax_rate, rounding)
         return Bill(
             bill_id=bill_id,
             issue_at=datetime.utcnow(),
-            sub_total=round(sub, 2),
+            sub_total=sub_total,
             tax=tax,
             total=total,
         )
 
+    @staticmethod
+    def generate_batch(
+        orders: Iterable[Order],
+        tax_rate: float,
+        bill_ids: Optional[Iterable[str]] = None,
+        issue_at: Optional[datetime] = None,
+        rounding: Optional[Rounding] = None,
+    ) -> Iterator["Bill"]:
+        """Lazily bill many orders with the same rounding as generate_from.
+
+        The batch shares one issue time, and the rounding of each distinct
+        subtotal is worked out once, which is most of the work when many
+        orders come to the same amount (catering runs, set menus). Bill ids
+        default to ``BILL-<order_id>``; ``bill_ids``, if given, must hold
+        exactly one id per order, or ValueError is raised when they differ.
+        """
+        issued = issue_at or datetime.utcnow()
+        ids = iter(bill_ids) if bill_ids is not None else None
+        amounts: Dict[int, Tuple[Money, Money, Money]] = {}
+        n = 0
+        for order in orders:
+            sub = order.calculate_total()
+            a = amounts.get(sub.cents)
+            if a is None:
+                if len(amounts) >= BATCH_MEMO_SIZE:
+                    amounts.clear()
+                a = amounts[sub.cents] = _amounts(sub, tax_rate, rounding)
+            if ids is None:
+                bill_id = f"BILL-{order.order_id}"
+            else:
+                bill_id = next(ids, None)
+                if bill_id is None:
+                    raise ValueError(f"bill_ids ran out after {n} orders")
+            n += 1
+            yield Bill(bill_id, issued, a[0], a[1], a[2])
+        if ids is not None and next(ids, None) is not None:
+            raise ValueError(f"More bill_ids than orders ({n})")
+
     def to_text(self, order: Order, cafe_name: str = "Local Café") -> str:
         lines = []
         lines.append(f"{cafe_name}")
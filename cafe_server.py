@@ -0,0 +1,345 @@
+from __future__ import annotations
+import asyncio
+import json
+import re
+from http import HTTPStatus
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from cafe_service import CafeService, bill_json, item_json, order_json, payment_json, refund_json
+from enums import OrderEventType
+from observers import OrderObserver
+from order import Order
+from order_event import OrderEvent
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0
+SSE_HEARTBEAT = 15.0
+SSE_QUEUE_SIZE = 256
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str = "") -> None:
+        super().__init__(message or status.phrase)
+        self.status = status
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "keep_alive")
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes) -> None:
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+        connection = headers.get("connection", "").lower()
+        # HTTP/1.1 keeps the connection open unless told otherwise; 1.0 the reverse.
+        self.keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+    def json(self, *required: str) -> Dict[str, Any]:
+        """The body as a JSON object; a missing ``required`` field is a 400."""
+        data: Any = {}
+        if self.body:
+            try:
+                data = json.loads(self.body)
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}") from None
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+        missing = [name for name in required if name not in data]
+        if missing:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"missing field: {missing[0]}")
+        return data
+
+
+class StatusEvents(OrderObserver):
+    """Fans order status changes out to server-sent-event subscribers.
+
+    Orders may change on any thread (e.g. a scheduler), so events are
+    handed to the event loop with call_soon_threadsafe. A subscriber whose
+    queue fills up is dropped rather than allowed to hold back the rest.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self._subscribers: Dict[asyncio.Queue, Optional[str]] = {}
+        self._ids = count(1)
+
+    def subscribe(self, order_id: Optional[str] = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(SSE_QUEUE_SIZE)
+        self._subscribers[queue] = order_id
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.pop(queue, None)
+
+    def close(self) -> None:
+        for queue in list(self._subscribers):
+            self.unsubscribe(queue)
+            queue.put_nowait(None)
+
+    def update(self, order: Order) -> None:
+        pass
+
+    def on_events(self, order: Order, events: List[OrderEvent]) -> None:
+        for ev in events:
+            if ev.kind == OrderEventType.STATUS_CHANGED:
+                data = {"order_id": order.order_id, "old": ev.old_status.value, "new": ev.new_status.value}
+                self.loop.call_soon_threadsafe(self._publish, data)
+
+    def _publish(self, data: Dict[str, Any]) -> None:
+        message = f"id: {next(self._ids)}\nevent: status\ndata: {json.dumps(data)}\n\n".encode()
+        for queue, order_id in list(self._subscribers.items()):
+            if order_id is not None and order_id != data["order_id"]:
+                continue
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Make room for the sentinel that tells the stream to close.
+                self.unsubscribe(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+
+Handler = Callable[..., Dict[str, Any]]
+
+
+class CafeServer:
+    """HTTP/1.1 JSON API over a CafeService, on asyncio streams.
+
+    Connections are kept alive and requests are answered strictly in
+    order, so clients may pipeline. GET /events streams status changes as
+    server-sent events. All handlers run on the event loop thread, so the
+    service needs no locking.
+
+        GET    /menu[?available=1]
+        POST   /orders
+        GET    /orders/{id}
+        POST   /orders/{id}/items              {"item_id": ..., "qty": ...}
+        PUT    /orders/{id}/items/{item_id}    {"qty": ...}
+        DELETE /orders/{id}/items/{item_id}
+        PUT    /orders/{id}/status             {"status": "Preparing"}
+        GET    /orders/{id}/bill
+        POST   /orders/{id}/pay
+        POST   /payments/{id}/refund           {"amount": "1.50"} (optional)
+        GET    /events[?order_id=...]
+    """
+
+    def __init__(self, service: CafeService, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.service = service
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.events: Optional[StatusEvents] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._streams: Set[asyncio.StreamWriter] = set()
+        self._routes: List[Tuple[str, "re.Pattern[str]", Handler]] = [
+            ("GET", re.compile(r"/menu"), self._menu),
+            ("POST", re.compile(r"/orders"), self._create_order),
+            ("GET", re.compile(r"/orders/([^/]+)"), self._get_order),
+            ("POST", re.compile(r"/orders/([^/]+)/items"), self._add_item),
+            ("PUT", re.compile(r"/orders/([^/]+)/items/([^/]+)"), self._set_qty),
+            ("DELETE", re.compile(r"/orders/([^/]+)/items/([^/]+)"), self._remove_item),
+            ("PUT", re.compile(r"/orders/([^/]+)/status"), self._set_status),
+            ("GET", re.compile(r"/orders/([^/]+)/bill"), self._bill),
+            ("POST", re.compile(r"/orders/([^/]+)/pay"), self._pay),
+            ("POST", re.compile(r"/payments/([^/]+)/refund"), self._refund),
+        ]
+
+    async def start(self) -> None:
+        self.events = StatusEvents(asyncio.get_running_loop())
+        self.service.observers.append(self.events)
+        self._server = await asyncio.start_server(
+            self._connection, self.host, self.port, limit=MAX_HEADER_BYTES
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self.events.close()
+            await asyncio.sleep(0)  # let event streams see the sentinel
+            for writer in list(self._streams):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self.events in self.service.observers:
+            self.service.observers.remove(self.events)
+
+    # -- connections -----------------------------------------------------
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._streams.add(writer)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except HTTPError as e:
+                    writer.write(self._response(e.status, {"error": str(e)}, keep_alive=False))
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                self.requests += 1
+                if request.method == "GET" and request.path == "/events":
+                    await self._stream_events(request, writer)
+                    break
+                status, payload = self._dispatch(request)
+                writer.write(self._response(status, payload, request.keep_alive))
+                # Pipelined requests already buffered are answered before
+                # waiting on the socket; drain only applies backpressure.
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._streams.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None  # clean close between requests
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE) from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line") from None
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        if "transfer-encoding" in headers:
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED, "chunked request bodies are not supported")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "bad Content-Length") from None
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target, version, headers, body)
+
+    def _dispatch(self, request: Request) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        allowed = False
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            try:
+                return HTTPStatus.OK, handler(request, *match.groups())
+            except HTTPError as e:
+                return e.status, {"error": str(e)}
+            except KeyError as e:
+                return HTTPStatus.NOT_FOUND, {"error": str(e.args[0]) if e.args else "not found"}
+            except (TypeError, ValueError, ArithmeticError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+            except Exception:
+                # The request failed as a whole; the connection carries on.
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": HTTPStatus.INTERNAL_SERVER_ERROR.phrase}
+        if allowed:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{request.method} not allowed on {request.path}"}
+        return HTTPStatus.NOT_FOUND, {"error": f"no route for {request.path}"}
+
+    @staticmethod
+    def _response(status: HTTPStatus, payload: Dict[str, Any], keep_alive: bool) -> bytes:
+        body = json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+        )
+        if not keep_alive:
+            head += "Connection: close\r\n"
+        return (head + "\r\n").encode("latin-1") + body
+
+    async def _stream_events(self, request: Request, writer: asyncio.StreamWriter) -> None:
+        queue = self.events.subscribe(request.query.get("order_id"))
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n: connected\n\n"
+        )
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    message = b": ping\n\n"
+                if message is None:
+                    break
+                writer.write(message)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.events.unsubscribe(queue)
+
+    # -- handlers ----------------------------------------------------------
+
+    def _menu(self, request: Request) -> Dict[str, Any]:
+        only_available = request.query.get("available", "") in ("1", "true")
+        return {"items": [item_json(i) for i in self.service.menu.list_items(only_available)]}
+
+    def _create_order(self, request: Request) -> Dict[str, Any]:
+        return {"order": order_json(self.service.create_order())}
+
+    def _get_order(self, request: Request, order_id: str) -> Dict[str, Any]:
+        return {"order": order_json(self.service.get_order(order_id))}
+
+    def _add_item(self, request: Request, order_id: str) -> Dict[str, Any]:
+        data = request.json("item_id")
+        order = self.service.add_item(order_id, data["item_id"], data.get("qty", 1))
+        return {"order": order_json(order)}
+
+    def _set_qty(self, request: Request, order_id: str, item_id: str) -> Dict[str, Any]:
+        return {"order": order_json(self.service.set_qty(order_id, item_id, request.json("qty")["qty"]))}
+
+    def _remove_item(self, request: Request, order_id: str, item_id: str) -> Dict[str, Any]:
+        return {"order": order_json(self.service.remove_item(order_id, item_id))}
+
+    def _set_status(self, request: Request, order_id: str) -> Dict[str, Any]:
+        return {"order": order_json(self.service.set_status(order_id, request.json("status")["status"]))}
+
+    def _bill(self, request: Request, order_id: str) -> Dict[str, Any]:
+        return {"bill": bill_json(self.service.bill(order_id), self.service.get_order(order_id))}
+
+    def _pay(self, request: Request, order_id: str) -> Dict[str, Any]:
+        return {"payment": payment_json(self.service.pay(order_id))}
+
+    def _refund(self, request: Request, payment_id: str) -> Dict[str, Any]:
+        return {"refund": refund_json(self.service.refund(payment_id, request.json().get("amount")))}
+
+
+def run(service: CafeService, host: str = "127.0.0.1", port: int = 8080) -> None:
+    async def main() -> None:
+        server = CafeServer(service, host, port)
+        await server.start()
+        print(f"listening on http://{server.host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
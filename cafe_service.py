@@ -0,0 +1,322 @@
+"""Headless cafe core: menu, orders, billing and payments, without Tk.
+
+    python -m cafe_service [--catalog menu.csv] [--snapshot menu.snap]
+                           [--db orders.db | --journal DIR] [--ledger payments.db]
+                           [--tax-rate 0.15] [--check | --http HOST:PORT]
+
+Reads one JSON command per line on stdin and writes one JSON reply per
+line, e.g. {"op": "add_item", "order_id": "...", "item_id": "D1", "qty": 2}.
+Ops: menu, create_order, get_order, add_item, set_qty, remove_item,
+set_status, bill, pay, refund. --check builds everything and exits,
+which is what the startup benchmark and budget test time. --http serves
+the same operations as an HTTP/JSON API instead (see cafe_server).
+
+Only the core modules are imported up front; storage backends, catalog
+parsing and snapshots are imported when an option asks for them.
+"""
+from __future__ import annotations
+import sys
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+from bill import Bill
+from demo_menu import seed_demo_menu
+from enums import OrderStatus, PaymentStatus
+from menu import Menu
+from menu_items import DrinkItem, FoodItem, MenuItem
+from observers import OrderObserver
+from order import Order
+from order_system import OrderSystem
+from money import ZERO
+from payment import Payment, Refund
+from payment_ledger import CAPTURED
+from payment_service import PaymentService
+
+if TYPE_CHECKING:
+    import argparse
+
+DEFAULT_TAX_RATE = 0.15
+
+# Startup contract, enforced by the test suite and reported by
+# benchmarks/bench_startup.py: importing this module stays within the
+# budget and never pulls in these modules.
+IMPORT_BUDGET_MS = 150
+LAZY_MODULES = ("tkinter", "asyncio", "sqlite3", "numpy", "csv", "hashlib", "mmap", "argparse", "json")
+
+
+def item_json(item: MenuItem) -> Dict[str, Any]:
+    data = {
+        "id": item.id,
+        "name": item.name,
+        "description": item.description,
+        "price": str(item.price),
+        "available": item.available,
+    }
+    if isinstance(item, FoodItem):
+        data["dietary_info"] = item.dietary_info
+    if isinstance(item, DrinkItem):
+        data["size"] = item.size
+        data["is_hot"] = item.is_hot
+    return data
+
+
+def order_json(order: Order) -> Dict[str, Any]:
+    return {
+        "order_id": order.order_id,
+        "status": order.status.value,
+        "created_at": order.created_at.isoformat(),
+        "lines": [
+            {"item_id": line.item.id, "name": line.item.name, "qty": line.qty,
+             "unit_price": str(line.unit_price), "line_total": str(line.line_total())}
+            for line in order.get_lines()
+        ],
+        "subtotal": str(order.calculate_total()),
+    }
+
+
+def bill_json(bill: Bill, order: Order) -> Dict[str, Any]:
+    return {
+        "bill_id": bill.bill_id,
+        "order_id": order.order_id,
+        "sub_total": str(bill.sub_total),
+        "tax": str(bill.tax),
+        "total": str(bill.total),
+        "text": bill.to_text(order),
+    }
+
+
+def payment_json(payment: Payment) -> Dict[str, Any]:
+    return {
+        "payment_id": payment.payment_id,
+        "order_id": payment.order_id,
+        "amount": str(payment.amount),
+        "refunded": str(payment.refunded),
+        "status": payment.status.value,
+        "paid_at": payment.paid_at.isoformat() if payment.paid_at else None,
+    }
+
+
+def refund_json(refund: Refund) -> Dict[str, Any]:
+    return {
+        "refund_id": refund.refund_id,
+        "payment_id": refund.payment_id,
+        "amount": str(refund.amount),
+        "refunded_at": refund.refunded_at.isoformat(),
+    }
+
+
+class CafeService:
+    """The operations CafeApp performs, on shared objects and without a UI.
+
+    Every method raises KeyError for unknown ids and ValueError for
+    invalid requests, like the classes underneath. ``observers`` are
+    attached to every order the service creates or touches.
+    """
+
+    def __init__(
+        self,
+        menu: Menu,
+        system: Optional[OrderSystem] = None,
+        payments: Optional[PaymentService] = None,
+        tax_rate: float = DEFAULT_TAX_RATE,
+        observers: Iterable[OrderObserver] = (),
+    ) -> None:
+        self.menu = menu
+        self.system = system if system is not None else OrderSystem()
+        self.payments = payments if payments is not None else PaymentService()
+        self.tax_rate = tax_rate
+        self.observers = list(observers)
+
+    def get_order(self, order_id: str) -> Order:
+        order = self.system.get_order(order_id)
+        # Orders can also come from storage, so attach on every lookup.
+        for obs in self.observers:
+            order.add_observer(obs)
+        return order
+
+    def create_order(self) -> Order:
+        order = self.system.create_order(None)
+        for obs in self.observers:
+            order.add_observer(obs)
+        return order
+
+    def add_item(self, order_id: str, item_id: str, qty: int = 1) -> Order:
+        order = self.get_order(order_id)
+        order.add_item(self.menu.get_item(item_id), int(qty))
+        return order
+
+    def set_qty(self, order_id: str, item_id: str, qty: int) -> Order:
+        order = self.get_order(order_id)
+        order.set_qty(item_id, int(qty))
+        return order
+
+    def remove_item(self, order_id: str, item_id: str) -> Order:
+        order = self.get_order(order_id)
+        order.remove_item(item_id)
+        return order
+
+    def set_status(self, order_id: str, status: str) -> Order:
+        order = self.get_order(order_id)
+        order.set_status(OrderStatus(status))
+        return order
+
+    def bill(self, order_id: str) -> Bill:
+        order = self.get_order(order_id)
+        return Bill.generate_from(order=order, bill_id=f"BILL-{order_id}", tax_rate=self.tax_rate)
+
+    def pay(self, order_id: str) -> Payment:
+        """Charge what the bill still owes after earlier payments and refunds.
+
+        Paying a settled order again returns its latest payment; an order
+        that now costs less than was paid must be refunded instead.
+        """
+        order = self.get_order(order_id)
+        captured = [p for p in self.payments.ledger.for_order(order_id) if p.status in CAPTURED]
+        paid = sum((p.amount - p.refunded for p in captured), ZERO)
+        due = self.bill(order_id).total - paid
+        if due < ZERO:
+            raise ValueError(f"Order {order_id} is overpaid by {-due}; refund it instead")
+        if not due:
+            if not captured:
+                raise ValueError("Cannot pay for an empty order")
+            return captured[-1]
+        payment = self.payments.process_payment(due, order_id=order_id)
+        if payment.status == PaymentStatus.PAID and order.status == OrderStatus.NEW:
+            order.set_status(OrderStatus.PREPARING)
+        return payment
+
+    def refund(self, payment_id: str, amount=None) -> Refund:
+        return self.payments.refund(payment_id, amount)
+
+    def close(self) -> None:
+        for resource in (self.system, self.payments.ledger):
+            close = getattr(resource, "close", None)
+            if close is not None:
+                close()
+
+    # -- JSON commands ------------------------------------------------------
+
+    def handle(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one JSON command; failures come back as {"ok": false, "error": ...}."""
+        op = command.get("op")
+        handler = _COMMANDS.get(op) if isinstance(op, str) else None
+        if handler is None:
+            return {"ok": False, "error": f"unknown op: {op!r}"}
+        args = {k: v for k, v in command.items() if k != "op"}
+        try:
+            return {"ok": True, **handler(self, **args)}
+        except KeyError as e:
+            return {"ok": False, "error": str(e.args[0]) if e.args else "not found"}
+        except (TypeError, ValueError, ArithmeticError) as e:
+            return {"ok": False, "error": str(e)}
+
+
+def _menu_cmd(service: CafeService, only_available: bool = False) -> Dict[str, Any]:
+    return {"items": [item_json(i) for i in service.menu.list_items(only_available)]}
+
+
+def _order_cmd(method: Callable[..., Order]) -> Callable[..., Dict[str, Any]]:
+    return lambda service, **kw: {"order": order_json(method(service, **kw))}
+
+
+def _bill_cmd(service: CafeService, order_id: str) -> Dict[str, Any]:
+    return {"bill": bill_json(service.bill(order_id), service.get_order(order_id))}
+
+
+_COMMANDS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "menu": _menu_cmd,
+    "create_order": _order_cmd(CafeService.create_order),
+    "get_order": _order_cmd(CafeService.get_order),
+    "add_item": _order_cmd(CafeService.add_item),
+    "set_qty": _order_cmd(CafeService.set_qty),
+    "remove_item": _order_cmd(CafeService.remove_item),
+    "set_status": _order_cmd(CafeService.set_status),
+    "bill": _bill_cmd,
+    "pay": lambda service, order_id: {"payment": payment_json(service.pay(order_id))},
+    "refund": lambda service, payment_id, amount=None: {"refund": refund_json(service.refund(payment_id, amount))},
+}
+
+
+def build_service(args: argparse.Namespace) -> CafeService:
+    # Backends are imported only when their option is used.
+    if args.catalog and args.snapshot:
+        from menu_catalog import load_cached
+        menu, _ = load_cached(args.catalog, args.snapshot)
+    elif args.catalog:
+        from menu_catalog import load_catalog
+        menu = Menu("MENU", "Menu")
+        load_catalog(menu, args.catalog)
+    elif args.snapshot:
+        menu = Menu.load_snapshot(args.snapshot)
+    else:
+        menu = seed_demo_menu(Menu(menu_id="M1", title="Local Café Menu"))
+
+    if args.db:
+        from sqlite_order_system import SqliteOrderSystem
+        system: OrderSystem = SqliteOrderSystem(args.db, menu=menu)
+    elif args.journal:
+        from order_journal import JournaledOrderSystem
+        system = JournaledOrderSystem(args.journal, menu=menu)
+    else:
+        system = OrderSystem()
+
+    if args.ledger:
+        from payment_ledger import SqlitePaymentLedger
+        payments = PaymentService(SqlitePaymentLedger(args.ledger))
+    else:
+        payments = PaymentService()
+    return CafeService(menu, system, payments, args.tax_rate)
+
+
+def serve_lines(service: CafeService, lines: TextIO, out: TextIO) -> int:
+    import json
+    n = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            command = json.loads(line)
+            reply = service.handle(command) if isinstance(command, dict) else {"ok": False, "error": "expected an object"}
+        except ValueError as e:
+            reply = {"ok": False, "error": f"invalid JSON: {e}"}
+        except Exception as e:
+            # A bug in one command must not end the session.
+            reply = {"ok": False, "error": f"internal error: {type(e).__name__}: {e}"}
+        out.write(json.dumps(reply) + "\n")
+        out.flush()
+        n += 1
+    return n
+
+
+def parse_args(argv: Optional[List[str]] = None) -> "argparse.Namespace":
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m cafe_service", description=__doc__.splitlines()[0])
+    parser.add_argument("--catalog", help="CSV or JSONL menu catalog")
+    parser.add_argument("--snapshot", help="binary menu snapshot (a cache of --catalog when both are given)")
+    store = parser.add_mutually_exclusive_group()
+    store.add_argument("--db", help="persist orders to this SQLite file")
+    store.add_argument("--journal", help="persist orders to a journal in this directory")
+    parser.add_argument("--ledger", help="persist payments to this SQLite file")
+    parser.add_argument("--tax-rate", type=float, default=DEFAULT_TAX_RATE)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="start up, report and exit")
+    mode.add_argument("--http", metavar="HOST:PORT", help="serve the HTTP/JSON API instead of stdin")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    service = build_service(args)
+    if args.check:
+        print(f'{{"ok": true, "menu_items": {len(service.menu)}}}')
+    elif args.http:
+        from cafe_server import run
+        host, _, port = args.http.rpartition(":")
+        run(service, host or "127.0.0.1", int(port))
+    else:
+        serve_lines(service, sys.stdin, sys.stdout)
+    service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
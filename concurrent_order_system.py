@@ -0,0 +1,42 @@
+from __future__ import annotations
+import threading
+from typing import List
+from uuid import uuid4
+
+from customer import Customer
+from enums import OrderStatus
+from order import Order
+from order_system import OrderSystem
+
+
+class ConcurrentOrderSystem(OrderSystem):
+    """OrderSystem shared by several terminals on separate threads.
+
+    Each order is guarded by one of ``stripes`` re-entrant locks, chosen by
+    hashing the order id, so unrelated orders rarely contend and the lock
+    count stays fixed however many orders exist. Order mutations, batch()
+    blocks and line reads take the order's lock. get_order() takes no lock
+    at all: it is a single dict lookup.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        if stripes <= 0:
+            raise ValueError("stripes must be > 0")
+        super().__init__()
+        self._stripes: List[threading.RLock] = [threading.RLock() for _ in range(stripes)]
+
+    def lock_for(self, order_id: str) -> threading.RLock:
+        return self._stripes[hash(order_id) % len(self._stripes)]
+
+    def create_order(self, customer: Customer) -> Order:
+        order_id = str(uuid4())
+        o = Order(order_id=order_id, status=OrderStatus.NEW, _lock=self.lock_for(order_id))
+        # A single dict store is atomic, so readers never see a half-built entry.
+        self.orders[o.order_id] = o
+        return o
+
+    def get_order(self, order_id: str) -> Order:
+        try:
+            return self.orders[order_id]
+        except KeyError:
+            raise KeyError(f"Order not found: {order_id}") from None
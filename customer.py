@@ -1,7 +1,8 @@
+from __future__ import annotations
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Customer:
     customer_id: str
     full_name: str
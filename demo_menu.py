@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from menu import Menu
+from menu_item_factory import MenuItemFactory
+
+
+def seed_demo_menu(menu: Menu) -> Menu:
+    drinks = [
+        ("D1", "Espresso", "Single espresso shot.", 2.50, "S", True),
+        ("D2", "Americano", "Espresso topped with hot water.", 3.00, "M", True),
+        ("D3", "Cappuccino", "Espresso with steamed milk and foam.", 3.50, "M", True),
+        ("D4", "Latte", "Espresso with steamed milk (light foam).", 3.80, "L", True),
+        ("D5", "Flat white", "Stronger coffee with velvety microfoam.", 3.70, "M", True),
+        ("D6", "Mocha", "Latte with chocolate.", 4.10, "L", True),
+        ("D7", "Matcha", "Matcha latte (green tea).", 4.20, "L", True),
+        ("D8", "Hot chocolate", "Rich chocolate drink.", 3.90, "L", True),
+    ]
+    for (item_id, name, desc, price, size, is_hot) in drinks:
+        menu.add_item(
+            MenuItemFactory.create_menu_item(
+                "drink",
+                id=item_id,
+                name=name,
+                description=desc,
+                price=price,
+                available=True,
+                size=size,
+                is_hot=is_hot,
+            )
+        )
+
+    foods = [
+        ("F1", "Sandwiches",
+         "Selection of sandwiches (ask for today's options).",
+         6.50, "Contains gluten"),
+        ("F2", "Paninis",
+         "Pressed panini (ask for fillings).",
+         7.00, "Contains gluten"),
+        ("F3", "Wraps",
+         "Fresh wraps (ask for fillings).",
+         6.80, "Contains gluten"),
+        ("F4", "Salads",
+         "Fresh salad bowl (ask for today's options).",
+         6.20, "Vegetarian options available"),
+        ("F5", "Soup of the day",
+         "Ask staff for today's soup.",
+         4.80, "May contain allergens"),
+        ("F6", "Craigoll the Bagel Special",
+         "Toasted bagel special (ask for today's filling).",
+         7.20, "Contains gluten"),
+    ]
+    for (item_id, name, desc, price, dietary_info) in foods:
+        menu.add_item(
+            MenuItemFactory.create_menu_item(
+                "food",
+                id=item_id,
+                name=name,
+                description=desc,
+                price=price,
+                available=True,
+                dietary_info=dietary_info,
+            )
+        )
+    return menu
@@ -12,3 +12,30 @@ class PaymentStatus(str, Enum):
     PENDING = "Pending"
     PAID = "Paid"
     FAILED = "Failed"
+    PARTIALLY_REFUNDED = "PartiallyRefunded"
+    REFUNDED = "Refunded"
+
+
+class OrderEventType(str, Enum):
+    LINE_ADDED = "LineAdded"
+    QTY_CHANGED = "QtyChanged"
+    LINE_REMOVED = "LineRemoved"
+    STATUS_CHANGED = "StatusChanged"
+
+
+class Backpressure(str, Enum):
+    BLOCK = "Block"
+    DROP = "Drop"
+
+
+class Durability(str, Enum):
+    SYNC = "Sync"
+    BATCHED = "Batched"
+    ASYNC = "Async"
+
+
+class Rounding(str, Enum):
+    HALF_EVEN = "HalfEven"
+    HALF_UP = "HalfUp"
+    UP = "Up"
+    DOWN = "Down"
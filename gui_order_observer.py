@@ -1,10 +1,12 @@
 from __future__ import annotations
+import math
 from observers import OrderObserver
-from typing import TYPE_CHECKING
-from enums import OrderStatus
+from typing import TYPE_CHECKING, List
+from enums import OrderEventType, OrderStatus
 
 if TYPE_CHECKING:
     from order import Order
+    from order_event import OrderEvent
     from gui_tk import CafeApp
 
 
@@ -20,12 +22,44 @@ class GuiOrderObserver(OrderObserver):
         except Exception:
             pass
 
+    def on_events(self, order: "Order", events: List["OrderEvent"]) -> None:
+        if not events:
+            self.update(order)
+            return
+        try:
+            table = self.app.order_table
+            for ev in events:
+                if ev.kind == OrderEventType.STATUS_CHANGED:
+                    continue
+                if ev.kind == OrderEventType.LINE_REMOVED:
+                    table.delete(ev.item_id)
+                    continue
+                values = self.app._order_row_values(order.get_line(ev.item_id))
+                if ev.kind == OrderEventType.LINE_ADDED:
+                    table.insert("", "end", iid=ev.item_id, values=values)
+                else:
+                    table.item(ev.item_id, values=values)
+        except Exception:
+            # The table and the order disagree (e.g. a line that was added and
+            # removed in one batch); fall back to a full rebuild.
+            self.update(order)
+            return
+        try:
+            self.app._refresh_totals()
+            self._update_status_label(order)
+        except Exception:
+            pass
+
     def _update_status_label(self, order: "Order") -> None:
         cust_name = self.app.customer.full_name if self.app.customer else ""
         if order.status == OrderStatus.NEW:
             text = f"Status: Order created ({cust_name})"
         elif order.status == OrderStatus.PREPARING:
-            text = "Preparing Order: Estimated 4 mins"
+            eta = self.app.kitchen.eta_seconds(order.order_id)
+            if eta is None:
+                text = "Preparing Order"
+            else:
+                text = f"Preparing Order: Estimated {max(1, math.ceil(eta / 60))} mins"
         elif order.status == OrderStatus.READY:
             text = "Order: Ready"
         elif order.status == OrderStatus.CANCELLED:
@@ -4,14 +4,22 @@ from uuid import uuid4
 
 from menu import Menu
 from menu_item_factory import MenuItemFactory
+from demo_menu import seed_demo_menu
 from customer import Customer
 from order_system import OrderSystem
 from bill import Bill
-from payment_service import PaymentService
+from async_payments import AsyncPaymentService, BackgroundPayments, FakeGateway
+from payment_ledger import PaymentLedger
 from gui_order_observer import GuiOrderObserver
+from menu_list_view import MenuListView
+from order_scheduler import OrderScheduler
+from kitchen_queue import KitchenQueue
+from services import KitchenDisplay
 
 MIN_PHONE_LEN = 8  
 MAX_PHONE_LEN = 15  
+SCHEDULER_TICK_MS = 250
+PAYMENT_POLL_MS = 50
 
 
 class CafeApp(tk.Tk):
@@ -21,9 +29,19 @@ class CafeApp(tk.Tk):
         self.geometry("980x650")
 
         self.menu = Menu(menu_id="M1", title="Local Café Menu")
-        self.system = None
+        # One OrderSystem for the window's lifetime, so earlier orders survive.
+        self.system = OrderSystem()
         self.customer = None
         self.order = None
+        # The kitchen queue decides when orders are READY; the scheduler
+        # handles auto-cancel of abandoned orders.
+        self.kitchen = KitchenQueue(stations=2)
+        self.kitchen_display = KitchenDisplay(self.kitchen, output=None)
+        self.scheduler = OrderScheduler(prep_time=None)
+        self.order_observer = None
+        # Payments run on their own event-loop thread so on_pay never blocks Tk.
+        self.payment_ledger = PaymentLedger()
+        self.payments = BackgroundPayments(AsyncPaymentService(FakeGateway(), ledger=self.payment_ledger))
 
         self.tax_rate_var = tk.DoubleVar(value=0.15)
 
@@ -32,65 +50,11 @@ class CafeApp(tk.Tk):
         self._refresh_menu_list()
         self._set_order_controls_enabled(False)
         self._validate_customer_fields()
+        self.after(SCHEDULER_TICK_MS, self._tick_scheduler)
 
     # Menu data 
     def _seed_demo_data(self):
-        drinks = [
-            ("D1", "Espresso", "Single espresso shot.", 2.50, "S", True),
-            ("D2", "Americano", "Espresso topped with hot water.", 3.00, "M", True),
-            ("D3", "Cappuccino", "Espresso with steamed milk and foam.", 3.50, "M", True),
-            ("D4", "Latte", "Espresso with steamed milk (light foam).", 3.80, "L", True),
-            ("D5", "Flat white", "Stronger coffee with velvety microfoam.", 3.70, "M", True),
-            ("D6", "Mocha", "Latte with chocolate.", 4.10, "L", True),
-            ("D7", "Matcha", "Matcha latte (green tea).", 4.20, "L", True),
-            ("D8", "Hot chocolate", "Rich chocolate drink.", 3.90, "L", True),
-        ]
-        for (item_id, name, desc, price, size, is_hot) in drinks:
-            self.menu.add_item(
-                MenuItemFactory.create_menu_item(
-                    "drink",
-                    id=item_id,
-                    name=name,
-                    description=desc,
-                    price=price,
-                    available=True,
-                    size=size,
-                    is_hot=is_hot,
-                )
-            )
-
-        foods = [
-            ("F1", "Sandwiches",
-             "Selection of sandwiches (ask for today's options).",
-             6.50, "Contains gluten"),
-            ("F2", "Paninis",
-             "Pressed panini (ask for fillings).",
-             7.00, "Contains gluten"),
-            ("F3", "Wraps",
-             "Fresh wraps (ask for fillings).",
-             6.80, "Contains gluten"),
-            ("F4", "Salads",
-             "Fresh salad bowl (ask for today's options).",
-             6.20, "Vegetarian options available"),
-            ("F5", "Soup of the day",
-             "Ask staff for today's soup.",
-             4.80, "May contain allergens"),
-            ("F6", "Craigoll the Bagel Special",
-             "Toasted bagel special (ask for today's filling).",
-             7.20, "Contains gluten"),
-        ]
-        for (item_id, name, desc, price, dietary_info) in foods:
-            self.menu.add_item(
-                MenuItemFactory.create_menu_item(
-                    "food",
-                    id=item_id,
-                    name=name,
-                    description=desc,
-                    price=price,
-                    available=True,
-                    dietary_info=dietary_info,
-                )
-            )
+        seed_demo_menu(self.menu)
 
     # UI layout 
     def _build_ui(self):
@@ -182,7 +146,17 @@ class CafeApp(tk.Tk):
         self.toggle_menu_btn.grid(row=0, column=2, sticky="ew")
 
         self.menu_list = tk.Listbox(left, height=18)
-        self.menu_list.grid(row=2, column=0, sticky="nsew", padx=8, pady=(0, 8))
+        self.menu_list.grid(row=2, column=0, sticky="nsew", padx=(8, 0), pady=(0, 8))
+        menu_scroll = ttk.Scrollbar(left, orient="vertical")
+        menu_scroll.grid(row=2, column=1, sticky="ns", padx=(0, 8), pady=(0, 8))
+        # Only the visible window of the catalog is rendered into the Listbox.
+        self.menu_view = MenuListView(
+            self.menu_list, self.menu, window=18, scrollbar=menu_scroll
+        )
+        menu_scroll.configure(command=self.menu_view.yview)
+        self.menu_list.bind("<<ListboxSelect>>", self.menu_view.on_select)
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.menu_list.bind(seq, self.menu_view.on_mousewheel)
 
         order_add = ttk.Frame(left)
         order_add.grid(row=3, column=0, sticky="ew", padx=8, pady=(0, 10))
@@ -326,11 +300,14 @@ class CafeApp(tk.Tk):
             return
 
         self.customer = Customer(customer_id=str(uuid4()), full_name=name, phone=phone)
-        self.system = OrderSystem()
         self.order = self.system.create_order(self.customer)
 
         # Attach GUI observer so any order change refreshes the UI
-        self.order.add_observer(GuiOrderObserver(self))
+        # Kitchen first, so the GUI sees the new ETA when the status changes.
+        self.order.add_observer(self.kitchen_display)
+        self.order_observer = GuiOrderObserver(self)
+        self.order.add_observer(self.order_observer)
+        self.scheduler.watch(self.order)
 
         self.customer_status_lbl.configure(text=f"Status: Active ({name})")
         self._set_order_controls_enabled(True)
@@ -350,7 +327,7 @@ class CafeApp(tk.Tk):
                 t, id=item_id, name=name, description="", price=price, available=True
             )
             self.menu.add_item(item)
-            self._refresh_menu_list()
+            self.menu_view.upsert(item.id)
             messagebox.showinfo("Menu", f"Added menu item: {item_id}")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -362,7 +339,7 @@ class CafeApp(tk.Tk):
             return
         try:
             self.menu.remove_item(item_id)
-            self._refresh_menu_list()
+            self.menu_view.remove(item_id)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -374,7 +351,7 @@ class CafeApp(tk.Tk):
         try:
             item = self.menu.get_item(item_id)
             self.menu.set_availability(item_id, not item.available)
-            self._refresh_menu_list()
+            self.menu_view.upsert(item_id)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -398,10 +375,8 @@ class CafeApp(tk.Tk):
             return
         try:
             item = self.menu.get_item(item_id)
+            # The observer patches the affected table row and the totals.
             self.order.add_item(item, qty)
-            # UI also refreshed by observer, but keep these for safety
-            self._refresh_order_table()
-            self._refresh_totals()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -415,19 +390,13 @@ class CafeApp(tk.Tk):
         item_id = self.order_table.item(selected[0], "values")[0]
         try:
             self.order.remove_item(item_id)
-            self._refresh_order_table()
-            self._refresh_totals()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def on_clear_order(self):
         if self.order is None:
             return
-        for line in list(self.order.get_lines()):
-            try:
-                self.order.remove_item(line.item.id)
-            except Exception:
-                pass
+        self.order.clear()
         self._refresh_order_table()
         self._refresh_totals()
         self.bill_text.configure(state="normal")
@@ -456,37 +425,50 @@ class CafeApp(tk.Tk):
         try:
             tax_rate = float(self.tax_rate_var.get())
             bill = Bill.generate_from(order=self.order, bill_id="BILL-PAY", tax_rate=tax_rate)
-            p = PaymentService().process_payment(bill.total)
-            messagebox.showinfo(
-                "Payment",
-                f"Payment {p.status.value}\nAmount: {p.amount:.2f}\nID: {p.payment_id}",
-            )
-
-            # Immediately mark as PREPARING and update UI via observer
-            from enums import OrderStatus
-            self.order.set_status(OrderStatus.PREPARING)
-
-            # After 1 minute (8000 ms), mark as READY.
-            self.after(8000, self._mark_order_ready)
-
+            # Keyed by order and amount: pressing Pay twice never charges
+            # twice, and a changed order is a new charge rather than a replay.
+            key = f"pay-{self.order.order_id}-{bill.total.cents}"
+            future = self.payments.submit(bill.total, idempotency_key=key, order_id=self.order.order_id)
+            self.pay_btn.configure(state="disabled")
+            self._await_payment(future, self.order)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-    def _mark_order_ready(self):
-        """Called by Tkinter after delay to mark order as ready."""
-        if self.order is None:
+    def _await_payment(self, future, order):
+        if not future.done():
+            self.after(PAYMENT_POLL_MS, self._await_payment, future, order)
+            return
+        if order is self.order:
+            self.pay_btn.configure(state="normal")
+        try:
+            p = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
             return
-        from enums import OrderStatus
-        self.order.set_status(OrderStatus.READY)
+        messagebox.showinfo(
+            "Payment",
+            f"Payment {p.status.value}\nAmount: {p.amount:.2f}\nID: {p.payment_id}",
+        )
+        from enums import OrderStatus, PaymentStatus
+        if p.status == PaymentStatus.PAID and order.status == OrderStatus.NEW:
+            # Mark as PREPARING; the kitchen queue moves it to READY.
+            order.set_status(OrderStatus.PREPARING)
+
+    def _tick_scheduler(self):
+        """Single periodic Tk callback that drives all scheduled transitions."""
+        try:
+            self.scheduler.tick()
+            self.kitchen.tick()
+            if self.order is not None and self.order_observer is not None:
+                from enums import OrderStatus
+                if self.order.status == OrderStatus.PREPARING:
+                    self.order_observer._update_status_label(self.order)
+        finally:
+            self.after(SCHEDULER_TICK_MS, self._tick_scheduler)
 
     # Refresh helpers 
     def _refresh_menu_list(self):
-        self.menu_list.delete(0, "end")
-        for item in self.menu.list_items(only_available=False):
-            flag = "Available" if item.available else "Unavailable"
-            self.menu_list.insert(
-                "end", f"{item.id} | {item.name} | {item.price:.2f} | {flag}"
-            )
+        self.menu_view.reload()
 
     def _refresh_order_table(self):
         for r in self.order_table.get_children():
@@ -495,17 +477,18 @@ class CafeApp(tk.Tk):
             return
         for line in self.order.get_lines():
             self.order_table.insert(
-                "",
-                "end",
-                values=(
-                    line.item.id,
-                    line.item.name,
-                    line.qty,
-                    f"{line.unit_price:.2f}",
-                    f"{line.line_total():.2f}",
-                ),
+                "", "end", iid=line.item.id, values=self._order_row_values(line)
             )
 
+    def _order_row_values(self, line):
+        return (
+            line.item.id,
+            line.item.name,
+            line.qty,
+            f"{line.unit_price:.2f}",
+            f"{line.line_total():.2f}",
+        )
+
     def _refresh_totals(self):
         if self.order is None:
             self.subtotal_lbl.config(text="Subtotal: 0.00")
@@ -513,10 +496,10 @@ class CafeApp(tk.Tk):
             self.total_lbl.config(text="Total: 0.00")
             return
         try:
-            sub = float(self.order.calculate_total())
+            sub = self.order.calculate_total()
             tax_rate = float(self.tax_rate_var.get())
-            tax = round(sub * tax_rate, 2)
-            total = round(sub + tax, 2)
+            tax = sub.scaled(tax_rate)
+            total = sub + tax
             self.subtotal_lbl.config(text=f"Subtotal: {sub:.2f}")
             self.tax_lbl.config(text=f"Tax: {tax:.2f}")
             self.total_lbl.config(text=f"Total: {total:.2f}")
@@ -528,11 +511,7 @@ class CafeApp(tk.Tk):
             self.total_lbl.config(text="Total: (invalid rate)")
 
     def _selected_menu_item_id(self):
-        sel = self.menu_list.curselection()
-        if not sel:
-            return None
-        row = self.menu_list.get(sel[0])
-        return row.split("|")[0].strip()
+        return self.menu_view.selected_id()
 
 
 if __name__ == "__main__":
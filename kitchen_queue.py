@@ -0,0 +1,225 @@
+from __future__ import annotations
+import heapq
+import itertools
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from enums import OrderStatus
+from menu_items import DrinkItem, FoodItem, MenuItem
+
+if TYPE_CHECKING:
+    from order import Order
+    from order_scheduler import Clock
+
+DEFAULT_PREP_SECONDS = {DrinkItem: 90.0, FoodItem: 240.0}
+
+
+class _Fenwick:
+    """Prefix sums over a growable array (point update, prefix query: O(log n))."""
+
+    def __init__(self, size: int = 64) -> None:
+        self._tree = [0.0] * (size + 1)
+        self._values = [0.0] * size
+
+    def add(self, index: int, delta: float) -> None:
+        if index >= len(self._values):
+            self._grow(index + 1)
+        self._values[index] += delta
+        i = index + 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> float:
+        """Sum of values[0:index]."""
+        total = 0.0
+        i = min(index, len(self._values))
+        tree = self._tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _grow(self, needed: int) -> None:
+        size = len(self._values)
+        while size < needed:
+            size *= 2
+        values = self._values + [0.0] * (size - len(self._values))
+        tree = [0.0] * (size + 1)
+        for i, v in enumerate(values, 1):
+            tree[i] += v
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._values, self._tree = values, tree
+
+
+class KitchenQueue:
+    """Priority queue of PREPARING orders worked by ``stations`` stations.
+
+    Orders are started lowest priority number first, then first come,
+    first served. Each priority level keeps a Fenwick tree of queued prep
+    time indexed by arrival, so the work queued ahead of any order comes
+    from a prefix sum. An ETA is therefore an O(log n) query and stays
+    current as orders join, leave or finish:
+
+        eta = now + (in-progress remaining + work ahead) / stations + own prep
+
+    With ``auto_complete`` an order is taken as done (and set READY) once
+    its estimated prep time has elapsed. Otherwise the kitchen reports
+    completion through complete().
+    """
+
+    def __init__(
+        self,
+        stations: int = 2,
+        prep_times: Optional[Dict[str, float]] = None,
+        clock: "Clock" = time.monotonic,
+        auto_complete: bool = True,
+    ) -> None:
+        if stations <= 0:
+            raise ValueError("stations must be > 0")
+        self.stations = stations
+        self.prep_times = dict(prep_times or {})
+        self.clock = clock
+        self.auto_complete = auto_complete
+        self._seq = itertools.count()
+        # order_id -> (priority, seq, prep seconds, order)
+        self._queued: Dict[str, Tuple[int, int, float, "Order"]] = {}
+        self._heap: List[Tuple[int, int, str]] = []
+        self._work: Dict[int, _Fenwick] = {}
+        self._work_total: Dict[int, float] = {}
+        # order_id -> (start, estimated finish, order)
+        self._active: Dict[str, Tuple[float, float, "Order"]] = {}
+
+    def prep_time_for(self, item: MenuItem) -> float:
+        if item.id in self.prep_times:
+            return self.prep_times[item.id]
+        for cls, seconds in DEFAULT_PREP_SECONDS.items():
+            if isinstance(item, cls):
+                return seconds
+        return 120.0
+
+    def order_prep_time(self, order: "Order") -> float:
+        return sum(self.prep_time_for(l.item) * l.qty for l in order.get_lines())
+
+    def enqueue(self, order: "Order", priority: int = 1) -> None:
+        if order.order_id in self._queued or order.order_id in self._active:
+            return
+        seq = next(self._seq)
+        prep = self.order_prep_time(order)
+        self._queued[order.order_id] = (priority, seq, prep, order)
+        heapq.heappush(self._heap, (priority, seq, order.order_id))
+        self._work.setdefault(priority, _Fenwick()).add(seq, prep)
+        self._work_total[priority] = self._work_total.get(priority, 0.0) + prep
+        self._start_ready(self.clock())
+
+    def refresh(self, order: "Order") -> bool:
+        """Re-estimate a queued or in-progress order after its lines changed.
+
+        Returns False if the kitchen does not have the order.
+        """
+        prep = self.order_prep_time(order)
+        if order.order_id in self._active:
+            start, _, _ = self._active[order.order_id]
+            self._active[order.order_id] = (start, start + prep, order)
+            return True
+        entry = self._queued.get(order.order_id)
+        if entry is None:
+            return False
+        priority, seq, old, _ = entry
+        self._queued[order.order_id] = (priority, seq, prep, order)
+        self._work[priority].add(seq, prep - old)
+        self._work_total[priority] += prep - old
+        return True
+
+    def remove(self, order_id: str) -> bool:
+        if order_id in self._active:
+            del self._active[order_id]
+            self._start_ready(self.clock())
+            return True
+        if order_id in self._queued:
+            self._dequeue(order_id)
+            return True
+        return False
+
+    def complete(self, order_id: str) -> None:
+        entry = self._active.pop(order_id, None)
+        if entry is None:
+            raise KeyError(f"Order not in preparation: {order_id}")
+        self._finish(entry[2])
+        self._start_ready(self.clock())
+
+    def tick(self) -> int:
+        """Advance to the clock's time; returns the number of orders completed."""
+        now = self.clock()
+        done = 0
+        if self.auto_complete:
+            while self._active:
+                order_id, (_, finish, order) = min(self._active.items(), key=lambda kv: kv[1][1])
+                if finish > now:
+                    break
+                del self._active[order_id]
+                self._finish(order)
+                self._start_ready(finish)
+                done += 1
+        self._start_ready(now)
+        return done
+
+    def eta(self, order_id: str) -> Optional[float]:
+        """Estimated completion time on the clock, or None if unknown."""
+        now = self.clock()
+        if order_id in self._active:
+            return max(now, self._active[order_id][1])
+        entry = self._queued.get(order_id)
+        if entry is None:
+            return None
+        priority, seq, prep, _ = entry
+        ahead = self._work[priority].prefix(seq)
+        for p, total in self._work_total.items():
+            if p < priority:
+                ahead += total
+        free = len(self._active) < self.stations
+        if free and ahead <= 1e-9:
+            return now + prep
+        return now + (self._in_progress_remaining(now) + ahead) / self.stations + prep
+
+    def eta_seconds(self, order_id: str) -> Optional[float]:
+        eta = self.eta(order_id)
+        return None if eta is None else max(0.0, eta - self.clock())
+
+    def queued(self) -> int:
+        return len(self._queued)
+
+    def in_progress(self) -> int:
+        return len(self._active)
+
+    def _in_progress_remaining(self, now: float) -> float:
+        return sum(max(0.0, finish - now) for _, finish, _ in self._active.values())
+
+    def _start_ready(self, at: float) -> None:
+        while len(self._active) < self.stations and self._heap:
+            _, seq, order_id = heapq.heappop(self._heap)
+            entry = self._queued.get(order_id)
+            if entry is None or entry[1] != seq:
+                continue  # removed while queued
+            prep, order = self._queued[order_id][2], self._queued[order_id][3]
+            self._dequeue(order_id)
+            self._active[order_id] = (at, at + prep, order)
+
+    def _dequeue(self, order_id: str) -> None:
+        priority, seq, prep, _ = self._queued.pop(order_id)
+        self._work[priority].add(seq, -prep)
+        self._work_total[priority] -= prep
+        if not self._queued:
+            # Start the indexes afresh whenever the queue drains, which
+            # bounds their size and clears accumulated float error.
+            self._seq = itertools.count()
+            self._heap.clear()
+            self._work.clear()
+            self._work_total.clear()
+
+    def _finish(self, order: "Order") -> None:
+        if order.status == OrderStatus.PREPARING:
+            order.set_status(OrderStatus.READY)
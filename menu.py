@@ -1,6 +1,11 @@
 from __future__ import annotations
-from typing import Dict, List
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import FrozenInstanceError, replace
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
 from menu_items import MenuItem
+from money import as_money
+from menu_search import MenuSearchIndex
 
 
 class Menu:
@@ -8,19 +13,112 @@ class Menu:
         self.menu_id = menu_id
         self.title = title
         self._items: Dict[str, MenuItem] = {}
+        # Secondary indexes, maintained by add_item/remove_item/set_availability/
+        # set_price. Ordered lists hold (seq, id) so results keep catalog order.
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        self._available: List[Tuple[int, str]] = []
+        self._available_ids: Set[str] = set()
+        self._by_type: Dict[type, List[Tuple[int, str]]] = {}
+        self._type_ids: Dict[type, Set[str]] = {}
+        self._by_price: List[Tuple[float, int, str]] = []
+        self._price_key: Dict[str, Tuple[float, int, str]] = {}
+        self._search = MenuSearchIndex()
+        # Set for snapshot-loaded menus: the search index is only filled
+        # with the snapshot's items on the first search().
+        self._search_pending = False
+
+    def __len__(self) -> int:
+        return len(self._items)
 
     def add_item(self, item: MenuItem) -> None:
+        if item.id in self._items:
+            self._unindex(self._items[item.id])
+        else:
+            self._seq[item.id] = self._next_seq
+            self._next_seq += 1
         self._items[item.id] = item
+        self._index(item)
+        self._search.add(item)
+
+    def add_items(self, items: Iterable[MenuItem]) -> int:
+        """Bulk add_item: new items are appended to the indexes and the
+        price index is re-sorted once, instead of an insort per item."""
+        n = 0
+        prices: List[Tuple[float, int, str]] = []
+        try:
+            for item in items:
+                n += 1
+                if item.id in self._items:
+                    self._merge_prices(prices)
+                    prices = []
+                    self.add_item(item)
+                    continue
+                price = float(item.price)
+                seq = self._seq[item.id] = self._next_seq
+                self._next_seq += 1
+                self._items[item.id] = item
+                # New seqs are the largest so far, so these lists stay sorted.
+                key = (seq, item.id)
+                if item.available:
+                    self._available.append(key)
+                    self._available_ids.add(item.id)
+                for cls in self._indexed_types(item):
+                    self._by_type.setdefault(cls, []).append(key)
+                    self._type_ids.setdefault(cls, set()).add(item.id)
+                price_key = (price, seq, item.id)
+                prices.append(price_key)
+                self._price_key[item.id] = price_key
+                self._search.add(item)
+        finally:
+            # Items added before a failing one stay, fully indexed.
+            self._merge_prices(prices)
+        return n
+
+    def _merge_prices(self, keys: List[Tuple[float, int, str]]) -> None:
+        if keys:
+            self._by_price.extend(keys)
+            self._by_price.sort()
 
     def remove_item(self, item_id: str) -> None:
         if item_id not in self._items:
             raise KeyError(f"Menu item not found: {item_id}")
+        self._unindex(self._items[item_id])
         del self._items[item_id]
+        del self._seq[item_id]
+        self._search.remove(item_id)
 
     def set_availability(self, item_id: str, available: bool) -> None:
         if item_id not in self._items:
             raise KeyError(f"Menu item not found: {item_id}")
-        self._items[item_id].available = available
+        self._set_field(item_id, "available", available)
+        if (item_id in self._available_ids) == available:
+            return
+        key = (self._seq[item_id], item_id)
+        if available:
+            insort(self._available, key)
+            self._available_ids.add(item_id)
+        else:
+            del self._available[bisect_left(self._available, key)]
+            self._available_ids.discard(item_id)
+
+    def set_price(self, item_id: str, price: float) -> None:
+        if item_id not in self._items:
+            raise KeyError(f"Menu item not found: {item_id}")
+        price = as_money(price)
+        old = self._price_key[item_id]
+        del self._by_price[bisect_left(self._by_price, old)]
+        self._set_field(item_id, "price", price)
+        key = (float(price), old[1], item_id)
+        insort(self._by_price, key)
+        self._price_key[item_id] = key
+
+    def _set_field(self, item_id: str, name: str, value) -> None:
+        # Frozen items are swapped for an updated copy instead.
+        try:
+            setattr(self._items[item_id], name, value)
+        except FrozenInstanceError:
+            self._items[item_id] = replace(self._items[item_id], **{name: value})
 
     def get_item(self, item_id: str) -> MenuItem:
         if item_id not in self._items:
@@ -28,7 +126,179 @@ class Menu:
         return self._items[item_id]
 
     def list_items(self, only_available: bool = False) -> List[MenuItem]:
-        items = list(self._items.values())
         if only_available:
-            items = [i for i in items if i.available]
-        return items
+            return [self._items[i] for _, i in self._available]
+        return list(self._items.values())
+
+    def search(self, text: str, limit: int = 20) -> List[MenuItem]:
+        if self._search_pending:
+            for item in self._items.values():
+                self._search.add(item)
+            self._search_pending = False
+        return [self._items[i] for i, _ in self._search.search(text, limit)]
+
+    def query(
+        self,
+        item_type: Optional[Type[MenuItem]] = None,
+        only_available: bool = False,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        order_by_price: bool = False,
+        where: Optional[Callable[[MenuItem], bool]] = None,
+    ) -> List[MenuItem]:
+        """Filtered listing driven by the secondary indexes.
+
+        Price bounds are inclusive and results are in catalog order unless
+        ``order_by_price`` is set. The smallest candidate set (price range,
+        type list or available list) is scanned and the other filters are
+        O(1) lookups, so cost follows the size of that set rather than the
+        catalog. ``order_by_price`` always scans the price range. ``where``
+        is applied last for attributes without an index (e.g. ``is_hot``).
+        """
+        bounded = min_price is not None or max_price is not None
+        lo_price = float("-inf") if min_price is None else float(min_price)
+        hi_price = float("inf") if max_price is None else float(max_price)
+        lo = bisect_left(self._by_price, (lo_price,)) if bounded else 0
+        hi = bisect_right(self._by_price, (hi_price, float("inf"))) if bounded else len(self._by_price)
+
+        type_keys = None if item_type is None else self._by_type.get(item_type, [])
+        if order_by_price:
+            scan = "price"
+        else:
+            # Listed by preference: min() keeps the first on a tie, and the
+            # price range is the only candidate that needs re-sorting.
+            sizes = []
+            if type_keys is not None:
+                sizes.append(("type", len(type_keys)))
+            if only_available:
+                sizes.append(("available", len(self._available)))
+            if bounded:
+                sizes.append(("price", hi - lo))
+            sizes.append(("all", len(self._items)))
+            scan = min(sizes, key=itemgetter(1))[0]
+
+        type_ids = None if item_type is None else self._type_ids.get(item_type, set())
+        ids: Iterable[str]
+        if scan == "price":
+            keys = self._by_price[lo:hi]
+            if not order_by_price:
+                keys.sort(key=itemgetter(1))  # back to catalog (seq) order
+            ids = (i for _, _, i in keys)
+            bounded = False
+        elif scan == "type":
+            ids = (i for _, i in type_keys)
+            type_ids = None
+        elif scan == "available":
+            ids = (i for _, i in self._available)
+            only_available = False
+        else:
+            ids = self._items.keys()
+
+        out = []
+        for i in ids:
+            if type_ids is not None and i not in type_ids:
+                continue
+            if only_available and i not in self._available_ids:
+                continue
+            if bounded and not lo_price <= self._price_key[i][0] <= hi_price:
+                continue
+            item = self._items[i]
+            if where is not None and not where(item):
+                continue
+            out.append(item)
+        return out
+
+    def save_snapshot(self, path: str, source_hash: bytes = b"") -> None:
+        """Write a binary snapshot for load_snapshot (see menu_snapshot)."""
+        from menu_snapshot import write_snapshot
+        write_snapshot(self, path, source_hash)
+
+    @classmethod
+    def load_snapshot(cls, path: str, source_hash: Optional[bytes] = None) -> "Menu":
+        """Open a snapshot written by save_snapshot.
+
+        The indexes are filled straight from the fixed-size records; items
+        are only built on first access, and the search index on the first
+        search(). Raises SnapshotError if the file is damaged, of another
+        version, or (when ``source_hash`` is given) was written from
+        different source data.
+        """
+        from menu_snapshot import Snapshot
+        return cls._from_snapshot(Snapshot(path, source_hash))
+
+    @classmethod
+    def _from_snapshot(cls, snap) -> "Menu":
+        from menu_snapshot import FLAG_AVAILABLE, LazyItems, class_of
+        menu = cls(snap.string(0), snap.string(1))
+        ids = snap.ids()
+        # Built column-wise: seq is the row number, so every ordered index
+        # comes out sorted without insort, and the price order is stored.
+        rows = dict(zip(ids, range(len(ids))))
+        keys = list(zip(range(len(ids)), ids))
+        menu._seq = dict(rows)
+        menu._available = [k for k, f in zip(keys, snap.flags) if f & FLAG_AVAILABLE]
+        menu._available_ids = {i for _, i in menu._available}
+        present = set(snap.codes)
+        by_class: Dict[type, Set[int]] = {}
+        for code in present:
+            for c in cls._indexed_types_of(class_of(code)):
+                by_class.setdefault(c, set()).add(code)
+        for c, wanted in by_class.items():
+            bucket = keys if wanted == present else [k for k, code in zip(keys, snap.codes) if code in wanted]
+            menu._by_type[c] = list(bucket)
+            menu._type_ids[c] = {i for _, i in bucket}
+        price_keys = [(c / 100, seq, i) for c, (seq, i) in zip(snap.prices, keys)]
+        menu._price_key = dict(zip(ids, price_keys))
+        menu._by_price = [price_keys[row] for row in snap.by_price]
+        menu._next_seq = len(rows)
+        menu._items = LazyItems(snap, rows, menu._seq)
+        menu._search_pending = True
+        return menu
+
+    def _index(self, item: MenuItem) -> None:
+        seq = self._seq[item.id]
+        key = (seq, item.id)
+        if item.available:
+            insort(self._available, key)
+            self._available_ids.add(item.id)
+        for cls in self._indexed_types(item):
+            insort(self._by_type.setdefault(cls, []), key)
+            self._type_ids.setdefault(cls, set()).add(item.id)
+        price_key = (float(item.price), seq, item.id)
+        insort(self._by_price, price_key)
+        self._price_key[item.id] = price_key
+
+    def _unindex(self, item: MenuItem) -> None:
+        seq = self._seq[item.id]
+        key = (seq, item.id)
+        if item.id in self._available_ids:
+            del self._available[bisect_left(self._available, key)]
+            self._available_ids.discard(item.id)
+        for cls in self._indexed_types(item):
+            bucket = self._by_type[cls]
+            del bucket[bisect_left(bucket, key)]
+            self._type_ids[cls].discard(item.id)
+        del self._by_price[bisect_left(self._by_price, self._price_key.pop(item.id))]
+
+    @staticmethod
+    def _indexed_types(item: MenuItem) -> List[type]:
+        return Menu._indexed_types_of(type(item))
+
+    @staticmethod
+    def _indexed_types_of(item_cls: type) -> List[type]:
+        return [c for c in item_cls.__mro__ if issubclass(c, MenuItem)]
+
+
+def stored_item(menu: Optional[Menu], item_id: str, name: str, unit_price: float) -> MenuItem:
+    """Item for a persisted order line, at the price the line was sold at."""
+    item = None
+    if menu is not None:
+        try:
+            item = menu.get_item(item_id)
+        except KeyError:
+            item = None
+    if item is None:
+        return MenuItem(id=item_id, name=name, description="", price=unit_price)
+    if float(item.price) != unit_price:
+        return replace(item, price=unit_price)
+    return item
@@ -0,0 +1,180 @@
+from __future__ import annotations
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from menu import Menu
+from menu_item_factory import MenuItemFactory
+from menu_items import DrinkItem, FoodItem, MenuItem
+from menu_snapshot import SnapshotError, source_digest
+
+Source = Union[str, "os.PathLike[str]", IO[str]]
+
+# Column order for CSV export; JSONL records use the same keys.
+COLUMNS = ("type", "id", "name", "description", "price", "available", "dietary_info", "size", "is_hot")
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+@dataclass(slots=True)
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class CatalogReport:
+    loaded: int = 0
+    errors: List[RowError] = field(default_factory=list)
+
+
+def _format(source: Any, fmt: Optional[str]) -> str:
+    if fmt is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+        fmt = FORMATS.get(os.path.splitext(str(name))[1].lower())
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown catalog format: {fmt!r} (expected 'csv' or 'jsonl')")
+    return fmt
+
+
+def _rows(f: IO[str], fmt: str) -> Iterator[Tuple[int, Any]]:
+    # (line number, row) pairs; a row that cannot be parsed is yielded as
+    # the error message instead of a dict.
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"invalid JSON: {e}"
+            continue
+        yield line_no, row if isinstance(row, dict) else "expected a JSON object"
+
+
+def iter_catalog(
+    source: Source, fmt: Optional[str] = None, chunk_size: int = 1000
+) -> Iterator[Tuple[List[MenuItem], List[RowError]]]:
+    """Read a CSV or JSONL catalog in chunks of ``chunk_size`` rows.
+
+    Yields (items, errors) per chunk; only one chunk of raw rows is held
+    at a time. ``source`` is a path or an open text file.
+    """
+    fmt = _format(source, fmt)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8") as f:
+            yield from _chunks(f, fmt, chunk_size)
+    else:
+        yield from _chunks(source, fmt, chunk_size)
+
+
+def _chunks(f: IO[str], fmt: str, chunk_size: int) -> Iterator[Tuple[List[MenuItem], List[RowError]]]:
+    lines: List[int] = []
+    rows: List[Dict[str, Any]] = []
+    errors: List[RowError] = []
+    for line_no, row in _rows(f, fmt):
+        if isinstance(row, str):
+            errors.append(RowError(line_no, row))
+            continue
+        lines.append(line_no)
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            yield _build(lines, rows, errors)
+            lines, rows, errors = [], [], []
+    if rows or errors:
+        yield _build(lines, rows, errors)
+
+
+def _build(lines: List[int], rows: List[Dict[str, Any]], errors: List[RowError]):
+    items, bad = MenuItemFactory.create_batch(rows)
+    errors.extend(RowError(lines[i], message) for i, message in bad)
+    errors.sort(key=lambda e: e.line)
+    return items, errors
+
+
+def load_catalog(
+    menu: Menu, source: Source, fmt: Optional[str] = None, chunk_size: int = 1000
+) -> CatalogReport:
+    """Stream a catalog into ``menu``; rows that fail validation are reported, not loaded."""
+    report = CatalogReport()
+
+    def items() -> Iterator[MenuItem]:
+        for chunk, errors in iter_catalog(source, fmt, chunk_size):
+            report.errors.extend(errors)
+            yield from chunk
+
+    # One add_items call for the whole stream, so the price index is
+    # sorted once rather than once per chunk.
+    report.loaded = menu.add_items(items())
+    return report
+
+
+def load_cached(
+    catalog: str, snapshot: str, menu_id: str = "MENU", title: str = "Menu"
+) -> Tuple[Menu, Optional[CatalogReport]]:
+    """Menu for a catalog file, through a binary snapshot cache.
+
+    The snapshot is used when its source hash matches the catalog's
+    SHA-256; otherwise the catalog is loaded and the snapshot rewritten.
+    The report is None when the snapshot was used.
+    """
+    digest = source_digest(catalog)
+    try:
+        return Menu.load_snapshot(snapshot, digest), None
+    except (OSError, SnapshotError):
+        pass
+    menu = Menu(menu_id, title)
+    report = load_catalog(menu, catalog)
+    menu.save_snapshot(snapshot, digest)
+    return menu, report
+
+
+def _type_name(item: MenuItem) -> str:
+    if isinstance(item, FoodItem):
+        return "food"
+    if isinstance(item, DrinkItem):
+        return "drink"
+    return "item"
+
+
+def _record(item: MenuItem) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"type": _type_name(item)}
+    for name in COLUMNS[1:]:
+        value = getattr(item, name, None)
+        if value is not None:
+            record[name] = str(value) if name == "price" else value
+    return record
+
+
+def export_catalog(items: Iterable[MenuItem], dest: Source, fmt: Optional[str] = None) -> int:
+    """Write items as CSV or JSONL, one row at a time; returns the row count.
+
+    Prices are written as exact decimal strings ("3.50"), so a round trip
+    through load_catalog gives back the same cents.
+    """
+    fmt = _format(dest, fmt)
+    if isinstance(dest, (str, os.PathLike)):
+        with open(dest, "w", newline="", encoding="utf-8") as f:
+            return _write(items, f, fmt)
+    return _write(items, dest, fmt)
+
+
+def _write(items: Iterable[MenuItem], f: IO[str], fmt: str) -> int:
+    n = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        for item in items:
+            writer.writerow(_record(item))
+            n += 1
+    else:
+        for item in items:
+            f.write(json.dumps(_record(item), separators=(",", ":")))
+            f.write("\n")
+            n += 1
+    return n
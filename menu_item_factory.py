@@ -1,9 +1,50 @@
 from __future__ import annotations
-from typing import Any
+from dataclasses import MISSING, fields
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Tuple, Type
 from menu_items import MenuItem, FoodItem, DrinkItem
+from money import Money
+
+_TRUE = {"1", "true", "yes", "y", "t"}
+_FALSE = {"0", "false", "no", "n", "f"}
+
+
+def parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"not a boolean: {value!r}")
+
+
+def parse_price(value: Any) -> Money:
+    if isinstance(value, bool):
+        raise ValueError(f"not a price: {value!r}")
+    price = Money(value.strip() if isinstance(value, str) else value)
+    if price.cents < 0:
+        raise ValueError(f"negative price: {value!r}")
+    return price
+
+
+# Annotation (a string, under postponed evaluation) -> row value parser.
+_PARSERS: Dict[str, Callable[[Any], Any]] = {"str": str, "bool": parse_bool, "Money": parse_price}
+
+Schema = Tuple[Dict[str, Callable[[Any], Any]], Tuple[str, ...]]
 
 
 class MenuItemFactory:
+    TYPES: Dict[str, Type[MenuItem]] = {
+        "food": FoodItem,
+        "fooditem": FoodItem,
+        "drink": DrinkItem,
+        "drinkitem": DrinkItem,
+        "item": MenuItem,
+        "menuitem": MenuItem,
+    }
+    _schemas: Dict[Type[MenuItem], Schema] = {}
+
     @staticmethod
     def create_menu_item(type: str, **kwargs: Any) -> MenuItem:
         t = type.strip().lower()
@@ -12,3 +53,56 @@ class MenuItemFactory:
         if t in ("drink", "drinkitem"):
             return DrinkItem(**kwargs)
         raise ValueError(f"Unknown menu item type: {type}")
+
+    @classmethod
+    def create_batch(cls, rows: Iterable[Mapping[str, Any]]) -> Tuple[List[MenuItem], List[Tuple[int, str]]]:
+        """Build items from raw rows (e.g. CSV or JSON records).
+
+        Each row names its ``type`` and holds field values as text or
+        JSON scalars, which are parsed per field. Bad rows do not stop the
+        batch: they are returned as (row index, message) pairs.
+        """
+        items: List[MenuItem] = []
+        errors: List[Tuple[int, str]] = []
+        for i, row in enumerate(rows):
+            try:
+                items.append(cls._from_row(row))
+            except (TypeError, ValueError) as e:
+                errors.append((i, str(e)))
+        return items, errors
+
+    @classmethod
+    def _from_row(cls, row: Mapping[str, Any]) -> MenuItem:
+        type_name = row.get("type")
+        item_cls = cls.TYPES.get(str(type_name or "").strip().lower())
+        if item_cls is None:
+            raise ValueError(f"Unknown menu item type: {type_name}")
+        parsers, required = cls._schema(item_cls)
+        kwargs: Dict[str, Any] = {}
+        for key, value in row.items():
+            if key == "type" or value is None:
+                continue
+            parser = parsers.get(key)
+            if value == "" and parser is not str:
+                # Blank CSV cell: a column another item type uses, or a default.
+                continue
+            if parser is None:
+                raise ValueError(f"unexpected field {key!r} for {item_cls.__name__}")
+            try:
+                kwargs[key] = parser(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{key}: {e}") from None
+        missing = [name for name in required if name not in kwargs]
+        if missing:
+            raise ValueError(f"missing field(s): {', '.join(missing)}")
+        return item_cls(**kwargs)
+
+    @classmethod
+    def _schema(cls, item_cls: Type[MenuItem]) -> Schema:
+        schema = cls._schemas.get(item_cls)
+        if schema is None:
+            fs = fields(item_cls)
+            parsers = {f.name: _PARSERS[f.type] for f in fs}
+            required = tuple(f.name for f in fs if f.default is MISSING and f.default_factory is MISSING)
+            schema = cls._schemas[item_cls] = (parsers, required)
+        return schema
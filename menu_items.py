@@ -1,22 +1,60 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import FrozenInstanceError, dataclass, fields
+from typing import Any
 
+from money import Money
 
-@dataclass
+
+@dataclass(slots=True)
 class MenuItem:
     id: str
     name: str
     description: str
-    price: float
+    price: Money  # floats are accepted and converted
     available: bool = True
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.price, Money):
+            # object.__setattr__ so frozen variants can convert too.
+            object.__setattr__(self, "price", Money(self.price))
+
 
-@dataclass
+@dataclass(slots=True)
 class FoodItem(MenuItem):
     dietary_info: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class DrinkItem(MenuItem):
     size: str = "M"
     is_hot: bool = True
+
+
+class _Frozen:
+    # Fields can be set once, by __init__, while their slot is still empty.
+    # Kept as a mixin because a frozen dataclass cannot subclass the mutable
+    # ones above, and the frozen variants must still pass isinstance checks.
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if hasattr(self, name):
+            raise FrozenInstanceError(f"cannot assign to field {name!r}")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, f.name) for f in fields(self)))
+
+
+class FrozenMenuItem(_Frozen, MenuItem):
+    __slots__ = ()
+
+
+class FrozenFoodItem(_Frozen, FoodItem):
+    __slots__ = ()
+
+
+class FrozenDrinkItem(_Frozen, DrinkItem):
+    __slots__ = ()
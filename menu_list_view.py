@@ -0,0 +1,170 @@
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from menu import Menu
+from menu_items import MenuItem
+
+
+class MenuListView:
+    """Keeps a Listbox in step with a Menu, rendering only a window of rows.
+
+    The full row order lives in ``_ids``; the Listbox only ever holds the
+    ``window`` rows starting at ``_offset`` (``_rendered``), so patching a
+    row or scrolling costs the window size, not the catalog size.
+    Removing a row leaves a hole (None) in ``_ids`` rather than shifting
+    it, so ``_pos`` maps ids to fixed slots; holes are compacted away once
+    they make up half the list.
+    """
+
+    def __init__(self, listbox: Any, menu: Menu, window: int = 18, scrollbar: Any = None):
+        if window <= 0:
+            raise ValueError("window must be > 0")
+        self.listbox = listbox
+        self.menu = menu
+        self.window = window
+        self.scrollbar = scrollbar
+        self._ids: List[Optional[str]] = []
+        self._pos: Dict[str, int] = {}
+        self._holes = 0
+        self._rendered: List[str] = []
+        self._offset = 0
+        self._selected: Optional[str] = None
+
+    @staticmethod
+    def row_text(item: MenuItem) -> str:
+        flag = "Available" if item.available else "Unavailable"
+        return f"{item.id} | {item.name} | {item.price:.2f} | {flag}"
+
+    def reload(self) -> None:
+        self._ids = [item.id for item in self.menu.list_items(only_available=False)]
+        self._pos = {item_id: i for i, item_id in enumerate(self._ids)}
+        self._holes = 0
+        self._offset = 0
+        self._render()
+
+    def upsert(self, item_id: str) -> None:
+        if item_id in self._rendered:
+            row = self._rendered.index(item_id)
+            with self._editable():
+                self.listbox.delete(row)
+                self.listbox.insert(row, self.row_text(self.menu.get_item(item_id)))
+            self._restore_selection()
+            return
+        if item_id in self._pos:
+            return  # known but scrolled out of view; rendered on demand
+        self._pos[item_id] = len(self._ids)
+        self._ids.append(item_id)
+        if len(self._rendered) < self.window and len(self._ids) - 1 >= self._offset:
+            with self._editable():
+                self.listbox.insert("end", self.row_text(self.menu.get_item(item_id)))
+            self._rendered.append(item_id)
+        self._update_scrollbar()
+
+    def remove(self, item_id: str) -> None:
+        slot = self._pos.pop(item_id, None)
+        if slot is None:
+            return
+        self._ids[slot] = None
+        self._holes += 1
+        if self._selected == item_id:
+            self._selected = None
+        if self._holes * 2 > len(self._ids):
+            self._compact()
+        if item_id in self._rendered:
+            self._render()
+        else:
+            self._update_scrollbar()
+
+    def selected_id(self) -> Optional[str]:
+        # Only a row the user can see counts; the remembered selection is
+        # just for restoring the highlight after scrolling back.
+        sel = self.listbox.curselection()
+        if not sel or sel[0] >= len(self._rendered):
+            return None
+        self._selected = self._rendered[sel[0]]
+        return self._selected
+
+    def on_select(self, _event: Any = None) -> None:
+        self.selected_id()
+
+    def scroll_to(self, offset: int) -> None:
+        offset = max(0, min(offset, self._last_offset()))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def yview(self, *args: Any) -> None:
+        # Scrollbar command protocol: ("moveto", fraction) or ("scroll", n, what).
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self._ids)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.window if args[2] == "pages" else 1)
+            self.scroll_to(self._skip(self._offset, step))
+
+    def on_mousewheel(self, event: Any) -> str:
+        delta = getattr(event, "delta", 0)
+        if not delta:
+            delta = 120 if getattr(event, "num", 0) == 4 else -120
+        self.scroll_to(self._skip(self._offset, -3 if delta > 0 else 3))
+        return "break"
+
+    def _skip(self, slot: int, rows: int) -> int:
+        # Move ``rows`` visible rows from ``slot``, stepping over holes.
+        step = 1 if rows > 0 else -1
+        for _ in range(abs(rows)):
+            slot += step
+            while 0 <= slot < len(self._ids) and self._ids[slot] is None:
+                slot += step
+        return slot
+
+    def _last_offset(self) -> int:
+        # The slot that shows a full window of rows ending at the last one.
+        return max(0, self._skip(len(self._ids), -self.window))
+
+    def _compact(self) -> None:
+        self._offset -= self._ids[:self._offset].count(None)
+        self._ids = [item_id for item_id in self._ids if item_id is not None]
+        self._pos = {item_id: i for i, item_id in enumerate(self._ids)}
+        self._holes = 0
+
+    def _render(self) -> None:
+        self._rendered = []
+        slot = self._offset
+        while slot < len(self._ids) and len(self._rendered) < self.window:
+            if self._ids[slot] is not None:
+                self._rendered.append(self._ids[slot])
+            slot += 1
+        with self._editable():
+            self.listbox.delete(0, "end")
+            for item_id in self._rendered:
+                self.listbox.insert("end", self.row_text(self.menu.get_item(item_id)))
+        self._restore_selection()
+        self._update_scrollbar()
+
+    def _restore_selection(self) -> None:
+        if self._selected in self._rendered:
+            self.listbox.selection_set(self._rendered.index(self._selected))
+
+    def _update_scrollbar(self) -> None:
+        if self.scrollbar is None:
+            return
+        total = len(self._ids)
+        if not total:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self.window) / total))
+
+    @contextmanager
+    def _editable(self) -> Iterator[None]:
+        # A disabled Listbox silently ignores insert/delete, so lift it briefly.
+        state = str(self.listbox.cget("state"))
+        if state == "disabled":
+            self.listbox.configure(state="normal")
+        try:
+            yield
+        finally:
+            if state == "disabled":
+                self.listbox.configure(state="disabled")
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Set, Tuple
+
+from menu_items import MenuItem
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    # Insert, delete, substitute or swap two adjacent characters.
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if i == la:
+        return True
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return i + 1 < la and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class MenuSearchIndex:
+    """Inverted index over menu item names, descriptions and dietary info.
+
+    Each query token matches terms exactly, by prefix, or within one edit
+    (looked up through a deletion index, so no vocabulary scan). Every
+    query token must match; results are ranked by field weight, match
+    quality and inverse document frequency.
+    """
+
+    FIELD_WEIGHTS = (("name", 3.0), ("dietary_info", 2.0), ("description", 1.0))
+    EXACT, PREFIX, FUZZY = 1.0, 0.6, 0.4
+    MIN_PREFIX_LEN = 2
+    MIN_FUZZY_LEN = 4
+
+    def __init__(self, max_expansions: int = 64):
+        self.max_expansions = max_expansions
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._vocab: List[str] = []
+        self._deletes: Dict[str, Set[str]] = {}
+        self._ranked: Dict[str, List[Tuple[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def add(self, item: MenuItem) -> None:
+        if item.id in self._doc_terms:
+            self.remove(item.id)
+        terms: Dict[str, float] = {}
+        for attr, weight in self.FIELD_WEIGHTS:
+            for tok in tokenize(str(getattr(item, attr, "") or "")):
+                terms[tok] = terms.get(tok, 0.0) + weight
+        self._doc_terms[item.id] = terms
+        for term, weight in terms.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                insort(self._vocab, term)
+                if len(term) >= self.MIN_FUZZY_LEN:
+                    for d in _deletes(term):
+                        self._deletes.setdefault(d, set()).add(term)
+            posting[item.id] = weight
+            self._ranked.pop(term, None)
+
+    def remove(self, item_id: str) -> None:
+        terms = self._doc_terms.pop(item_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            posting = self._postings[term]
+            del posting[item_id]
+            self._ranked.pop(term, None)
+            if posting:
+                continue
+            del self._postings[term]
+            del self._vocab[bisect_left(self._vocab, term)]
+            if len(term) >= self.MIN_FUZZY_LEN:
+                for d in _deletes(term):
+                    bucket = self._deletes[d]
+                    bucket.discard(term)
+                    if not bucket:
+                        del self._deletes[d]
+
+    def search(self, text: str, limit: int = 20) -> List[Tuple[str, float]]:
+        tokens = list(dict.fromkeys(tokenize(text)))
+        if not tokens or not self._doc_terms:
+            return []
+        expansions = [self._expand(tok) for tok in tokens]
+        if not all(expansions):
+            return []
+        if len(expansions) == 1 and len(expansions[0]) == 1:
+            (term, quality), = expansions[0].items()
+            factor = quality * self._idf(term)
+            return [(i, w * factor) for i, w in self._ranked_posting(term)[:limit]]
+
+        # Narrow to items matching every token with set operations first,
+        # then score only the survivors.
+        candidates: Any = None
+        for exp in sorted(expansions, key=self._expansion_size):
+            if len(exp) == 1:
+                ids = self._postings[next(iter(exp))].keys()
+            else:
+                ids = set().union(*(self._postings[t].keys() for t in exp))
+            candidates = ids if candidates is None else ids & candidates
+            if not candidates:
+                return []
+
+        scores = dict.fromkeys(candidates, 0.0)
+        for exp in expansions:
+            if len(exp) == 1:
+                (term, quality), = exp.items()
+                posting, factor = self._postings[term], quality * self._idf(term)
+                for i in candidates:
+                    scores[i] += posting[i] * factor
+                continue
+            weighted = [(self._postings[t], q * self._idf(t)) for t, q in exp.items()]
+            for i in candidates:
+                scores[i] += max(p.get(i, 0.0) * f for p, f in weighted)
+        return heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def _expand(self, tok: str) -> Dict[str, float]:
+        expansions: Dict[str, float] = {}
+        if tok in self._postings:
+            expansions[tok] = self.EXACT
+        if len(tok) >= self.MIN_PREFIX_LEN:
+            i = bisect_left(self._vocab, tok)
+            while (
+                i < len(self._vocab)
+                and self._vocab[i].startswith(tok)
+                and len(expansions) < self.max_expansions
+            ):
+                expansions.setdefault(self._vocab[i], self.PREFIX)
+                i += 1
+        if len(tok) >= self.MIN_FUZZY_LEN:
+            for term in self._fuzzy_terms(tok):
+                expansions.setdefault(term, self.FUZZY)
+        return expansions
+
+    def _expansion_size(self, exp: Dict[str, float]) -> int:
+        return sum(len(self._postings[t]) for t in exp)
+
+    def _idf(self, term: str) -> float:
+        return math.log(1.0 + len(self._doc_terms) / len(self._postings[term]))
+
+    def _ranked_posting(self, term: str) -> List[Tuple[str, float]]:
+        # Weight-ordered copy of a posting, rebuilt lazily after it changes.
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ranked = sorted(self._postings[term].items(), key=lambda kv: (-kv[1], kv[0]))
+            self._ranked[term] = ranked
+        return ranked
+
+    def _fuzzy_terms(self, tok: str) -> Set[str]:
+        candidates = set(self._deletes.get(tok, ()))
+        for d in _deletes(tok):
+            if d in self._postings:
+                candidates.add(d)
+            candidates.update(self._deletes.get(d, ()))
+        candidates.discard(tok)
+        return {t for t in candidates if _within_one_edit(tok, t)}
@@ -0,0 +1,273 @@
+from __future__ import annotations
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import TYPE_CHECKING, Dict, List, Optional, Type
+
+from menu_items import (
+    DrinkItem,
+    FoodItem,
+    FrozenDrinkItem,
+    FrozenFoodItem,
+    FrozenMenuItem,
+    MenuItem,
+)
+from money import Money
+
+if TYPE_CHECKING:
+    from menu import Menu
+
+# Layout, all little-endian, one column per field so each loads with a
+# single copy and row i of any column is at a fixed offset:
+#   header
+#   price      n_items x i64, cents
+#   offsets    (n_strings + 1) x u32, into the string blob
+#   id, name, description, extra
+#              n_items x u32 each, string numbers
+#   by_price   n_items x u32, row numbers sorted by (price, row)
+#   code       n_items x u8, item class
+#   flags      n_items x u8
+#   strings    UTF-8 blob, deduplicated; strings 0 and 1 are menu id and title
+# body_hash is SHA-256 of everything after the header. source_hash is
+# whatever the writer was given (e.g. a hash of the catalog it came from).
+MAGIC = b"CAFEMENU"
+VERSION = 1
+HEADER = struct.Struct("<8sHxxII32s32s4x")
+STRING_COLUMNS = ("id", "name", "description", "extra")
+FLAG_AVAILABLE = 1
+FLAG_HOT = 2
+
+# Order matters: the code is the index.
+_CLASSES: List[Type[MenuItem]] = [
+    MenuItem, FoodItem, DrinkItem, FrozenMenuItem, FrozenFoodItem, FrozenDrinkItem,
+]
+_CODES = {cls: i for i, cls in enumerate(_CLASSES)}
+
+
+def class_of(code: int) -> Type[MenuItem]:
+    return _CLASSES[code]
+
+
+class SnapshotError(ValueError):
+    """The file is not a usable snapshot: bad magic or version, damaged, or stale."""
+
+
+def source_digest(path: str, chunk_size: int = 1 << 20) -> bytes:
+    """SHA-256 of a file, read in chunks; used as a snapshot's source_hash."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def _le(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _column(buf, typecode: str, start: int, count: int) -> array:
+    values = array(typecode)
+    values.frombytes(buf[start:start + count * values.itemsize])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _extra(item: MenuItem) -> str:
+    if isinstance(item, FoodItem):
+        return item.dietary_info
+    if isinstance(item, DrinkItem):
+        return item.size
+    return ""
+
+
+def write_snapshot(menu: "Menu", path: str, source_hash: bytes = b"") -> None:
+    strings: Dict[str, int] = {}
+    blob: List[bytes] = []
+    offsets = array("I", [0])
+
+    def intern(text: str) -> int:
+        i = strings.get(text)
+        if i is None:
+            raw = text.encode("utf-8")
+            i = strings[text] = len(blob)
+            blob.append(raw)
+            offsets.append(offsets[-1] + len(raw))
+        return i
+
+    intern(menu.menu_id)
+    intern(menu.title)
+    items = menu.list_items()
+    # Ids first, so they sit together at the front of the blob.
+    ids = array("I", (intern(item.id) for item in items))
+    names = array("I", (intern(item.name) for item in items))
+    descriptions = array("I", (intern(item.description) for item in items))
+    extras = array("I", (intern(_extra(item)) for item in items))
+    prices = array("q", (item.price.cents for item in items))
+    codes = array("B")
+    flags = array("B")
+    for item in items:
+        code = _CODES.get(type(item))
+        if code is None:
+            raise SnapshotError(f"Cannot snapshot {type(item).__name__} items")
+        codes.append(code)
+        flags.append((FLAG_AVAILABLE if item.available else 0) | (FLAG_HOT if getattr(item, "is_hot", False) else 0))
+    by_price = array("I", sorted(range(len(items)), key=lambda row: (prices[row], row)))
+    body = b"".join([
+        _le(prices), _le(offsets), _le(ids), _le(names), _le(descriptions), _le(extras), _le(by_price),
+        codes.tobytes(), flags.tobytes(), *blob,
+    ])
+    header = HEADER.pack(
+        MAGIC, VERSION, len(items), len(blob), source_hash.ljust(32, b"\0")[:32], hashlib.sha256(body).digest()
+    )
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Snapshot:
+    """Read side of a snapshot file, mapped read-only.
+
+    The fixed-width columns are copied out on open; strings stay in the
+    mapping and are decoded on request.
+    """
+
+    def __init__(self, path: str, source_hash: Optional[bytes] = None) -> None:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise SnapshotError(f"{path}: truncated snapshot")
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, n_strings, stored_source, body_hash = HEADER.unpack_from(self._buf)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"{path}: not a version {VERSION} menu snapshot")
+        if source_hash is not None and stored_source != source_hash.ljust(32, b"\0")[:32]:
+            raise SnapshotError(f"{path}: snapshot is stale (source hash differs)")
+        with memoryview(self._buf) as view:
+            if hashlib.sha256(view[HEADER.size:]).digest() != body_hash:
+                raise SnapshotError(f"{path}: snapshot is damaged (content hash mismatch)")
+        self.n_items = n
+        pos = HEADER.size
+        self.prices = _column(self._buf, "q", pos, n)
+        pos += 8 * n
+        self._offsets = _column(self._buf, "I", pos, n_strings + 1)
+        pos += 4 * (n_strings + 1)
+        columns = {}
+        for name in STRING_COLUMNS + ("by_price",):
+            columns[name] = _column(self._buf, "I", pos, n)
+            pos += 4 * n
+        self._ids, self._names, self._descriptions, self._extras = (columns[c] for c in STRING_COLUMNS)
+        self.by_price = columns["by_price"]
+        self.codes = self._buf[pos:pos + n]
+        self.flags = self._buf[pos + n:pos + 2 * n]
+        self._blob = pos + 2 * n
+
+    def string(self, i: int) -> str:
+        start = self._blob + self._offsets[i]
+        return str(self._buf[start:self._blob + self._offsets[i + 1]], "utf-8")
+
+    def ids(self) -> List[str]:
+        """Every item id, in row order."""
+        if not self.n_items:
+            return []
+        # The ids were interned first, so they are one contiguous run of
+        # the blob; decode it once and slice when it is plain ASCII.
+        first, last = min(self._ids), max(self._ids)
+        offsets, base = self._offsets, self._offsets[first]
+        run = self._buf[self._blob + base:self._blob + offsets[last + 1]]
+        if not run.isascii():
+            return [self.string(i) for i in self._ids]
+        text = run.decode("ascii")
+        return [text[offsets[i] - base:offsets[i + 1] - base] for i in self._ids]
+
+    def item(self, row: int) -> MenuItem:
+        cls = _CLASSES[self.codes[row]]
+        flags = self.flags[row]
+        s = self.string
+        args = (
+            s(self._ids[row]), s(self._names[row]), s(self._descriptions[row]),
+            Money.from_cents(self.prices[row]), bool(flags & FLAG_AVAILABLE),
+        )
+        if issubclass(cls, FoodItem):
+            return cls(*args, dietary_info=s(self._extras[row]))
+        if issubclass(cls, DrinkItem):
+            return cls(*args, size=s(self._extras[row]), is_hot=bool(flags & FLAG_HOT))
+        return cls(*args)
+
+
+class LazyItems(dict):
+    """Menu._items for a menu loaded from a snapshot.
+
+    Holds built items like a plain dict; ids not built yet map to their
+    snapshot record in ``_rows`` and are built on first access. Anything
+    that walks every item builds the rest first, in catalog order.
+    """
+
+    def __init__(self, snapshot: Snapshot, rows: Dict[str, int], seq: Dict[str, int]) -> None:
+        super().__init__()
+        self._snapshot: Optional[Snapshot] = snapshot
+        self._rows = rows
+        self._seq = seq
+
+    def __missing__(self, key: str) -> MenuItem:
+        row = self._rows.pop(key)
+        item = self._snapshot.item(row)
+        dict.__setitem__(self, key, item)
+        return item
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._rows
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self._rows)
+
+    def __setitem__(self, key: str, value: MenuItem) -> None:
+        self._rows.pop(key, None)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if self._rows.pop(key, None) is None:
+            dict.__delitem__(self, key)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+    def __iter__(self):
+        self.build_all()
+        return dict.__iter__(self)
+
+    def keys(self):
+        self.build_all()
+        return dict.keys(self)
+
+    def values(self):
+        self.build_all()
+        return dict.values(self)
+
+    def items(self):
+        self.build_all()
+        return dict.items(self)
+
+    def build_all(self) -> None:
+        # Items built one by one arrive in access order, so the dict is
+        # re-sorted even when nothing is left to build. The snapshot is
+        # dropped afterwards, which also unmaps the file.
+        if self._snapshot is None:
+            return
+        built = dict(dict.items(self))
+        for key, row in self._rows.items():
+            built[key] = self._snapshot.item(row)
+        self._rows.clear()
+        self._snapshot = None
+        seq = self._seq
+        dict.clear(self)
+        dict.update(self, sorted(built.items(), key=lambda kv: seq[kv[0]]))
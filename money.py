@@ -0,0 +1,241 @@
+from __future__ import annotations
+from decimal import Decimal
+from fractions import Fraction
+from typing import Any, Dict, Optional, Tuple, Union
+
+from enums import Rounding
+
+# Used wherever no rounding mode is passed in; assign another Rounding to
+# change it process-wide. Banker's rounding keeps half-cent cases from
+# drifting upwards over many bills.
+DEFAULT_ROUNDING = Rounding.HALF_EVEN
+
+Number = Union[int, float, str, Decimal, Fraction]
+_HALF_EVEN, _HALF_UP, _UP = Rounding.HALF_EVEN, Rounding.HALF_UP, Rounding.UP
+
+
+def div_round(n: int, d: int, rounding: Optional[Rounding] = None) -> int:
+    """n / d rounded to an integer (d > 0), symmetric around zero."""
+    q, r = divmod(n if n >= 0 else -n, d)
+    if r:
+        mode = rounding or DEFAULT_ROUNDING
+        if mode is _HALF_EVEN:
+            r += r
+            if r > d or (r == d and q & 1):
+                q += 1
+        elif mode is _HALF_UP:
+            if r + r >= d:
+                q += 1
+        elif mode is _UP:
+            q += 1
+    return q if n >= 0 else -q
+
+
+_RATIOS: Dict[Any, Tuple[int, int]] = {}
+
+
+def _ratio(value: Union[float, str, Decimal, Fraction]) -> Tuple[int, int]:
+    # Exact decimal ratio of a rate or amount as written (0.0725 -> 29/400).
+    ratio = _RATIOS.get(value)
+    if ratio is None:
+        f = Fraction(repr(value) if isinstance(value, float) else value)
+        ratio = (f.numerator, f.denominator)
+        if len(_RATIOS) < 1024:
+            _RATIOS[value] = ratio
+    return ratio
+
+
+def scale_cents(cents: int, rate: Any, rounding: Optional[Rounding] = None) -> int:
+    """``cents * rate`` rounded to whole cents; the integer core of Money.scaled."""
+    if rate.__class__ is int:
+        return cents * rate
+    num, d = _RATIOS.get(rate) or _ratio(rate)
+    n = cents * num
+    if n >= 0 and (rounding or DEFAULT_ROUNDING) is _HALF_EVEN:
+        # Inline fast path for the default mode.
+        q = n // d
+        r = 2 * (n - q * d)
+        return q + 1 if r > d or (r == d and q & 1) else q
+    return div_round(n, d, rounding)
+
+
+def to_cents(amount: Any, rounding: Optional[Rounding] = None) -> int:
+    """Whole cents for a Money, int, float, str, Decimal or Fraction amount."""
+    if isinstance(amount, Money):
+        return amount.cents
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, float):
+        scaled = amount * 100
+        cents = round(scaled)
+        if abs(scaled - cents) < 1e-6:
+            return cents
+        num, den = _ratio(amount)
+    elif isinstance(amount, str):
+        units, _, frac = amount.strip().partition(".")
+        if units.isdecimal() and len(frac) <= 2 and (frac.isdecimal() or not frac):
+            # Plain "12" / "12.5" / "12.50", as written by catalogs and exports.
+            return int(units) * 100 + (int(frac.ljust(2, "0")) if frac else 0)
+        f = Fraction(amount)
+        num, den = f.numerator, f.denominator
+    elif isinstance(amount, (Decimal, Fraction)):
+        f = Fraction(amount)
+        num, den = f.numerator, f.denominator
+    else:
+        raise TypeError(f"Cannot convert {type(amount).__name__} to Money")
+    return div_round(num * 100, den, rounding)
+
+
+def as_money(amount: Any) -> "Money":
+    return amount if isinstance(amount, Money) else Money(amount)
+
+
+_new = object.__new__
+
+
+class Money:
+    """Fixed-point amount held as integer cents.
+
+    Constructors take the same floats the rest of the code always used
+    (``Money(2.50)``) and Money compares, hashes and formats like the
+    equivalent float, so it can be passed wherever a price was. Sums and
+    integer multiples are exact; only scaling by a rate (tax) rounds, with
+    banker's rounding unless another Rounding is given.
+    """
+
+    __slots__ = ("cents",)
+
+    def __init__(self, amount: Number = 0, rounding: Optional[Rounding] = None) -> None:
+        self.cents = to_cents(amount, rounding)
+
+    @staticmethod
+    def from_cents(cents: int) -> "Money":
+        m = _new(Money)
+        m.cents = cents
+        return m
+
+    def scaled(self, rate: Union[float, str, Decimal, Fraction], rounding: Optional[Rounding] = None) -> "Money":
+        """This amount times ``rate`` (e.g. a tax rate), rounded to the cent."""
+        m = _new(Money)
+        m.cents = scale_cents(self.cents, rate, rounding)
+        return m
+
+    def split(self, parts: int, rounding: Optional[Rounding] = None) -> "Money":
+        return Money.from_cents(div_round(self.cents, parts, rounding))
+
+    # -- arithmetic ------------------------------------------------------
+
+    # The exact-class checks come first and build the result directly:
+    # Money + Money and Money * int are what every bill and line total does.
+
+    def __add__(self, other: Any) -> "Money":
+        m = _new(Money)
+        if other.__class__ is Money:
+            m.cents = self.cents + other.cents
+        elif isinstance(other, (int, float)):
+            m.cents = self.cents + to_cents(other)
+        else:
+            return NotImplemented
+        return m
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> "Money":
+        m = _new(Money)
+        if other.__class__ is Money:
+            m.cents = self.cents - other.cents
+        elif isinstance(other, (int, float)):
+            m.cents = self.cents - to_cents(other)
+        else:
+            return NotImplemented
+        return m
+
+    def __rsub__(self, other: Any) -> "Money":
+        if isinstance(other, (int, float)):
+            return Money.from_cents(to_cents(other) - self.cents)
+        return NotImplemented
+
+    def __mul__(self, other: Any) -> "Money":
+        if other.__class__ is int:
+            m = _new(Money)
+            m.cents = self.cents * other
+            return m
+        if isinstance(other, int):
+            return Money.from_cents(self.cents * other)
+        if isinstance(other, float):
+            return self.scaled(other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other: Any) -> "Money":
+        if isinstance(other, int) and other > 0:
+            return self.split(other)
+        if isinstance(other, (int, float)):
+            return self.scaled(1 / other)
+        return NotImplemented
+
+    def __neg__(self) -> "Money":
+        return Money.from_cents(-self.cents)
+
+    def __abs__(self) -> "Money":
+        return Money.from_cents(abs(self.cents))
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    # -- float compatibility ----------------------------------------------
+
+    def __float__(self) -> float:
+        return self.cents / 100
+
+    def __round__(self, ndigits: Optional[int] = None) -> Union[int, float]:
+        return round(self.cents / 100, ndigits)
+
+    def __format__(self, spec: str) -> str:
+        return format(self.cents / 100, spec) if spec else str(self)
+
+    def __str__(self) -> str:
+        sign = "-" if self.cents < 0 else ""
+        units, cents = divmod(abs(self.cents), 100)
+        return f"{sign}{units}.{cents:02d}"
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+    def __hash__(self) -> int:
+        # Equal to hash() of the float it compares equal to.
+        return hash(self.cents / 100)
+
+    def _cmp(self, other: Any) -> Optional[Tuple[Union[int, float], Union[int, float]]]:
+        if isinstance(other, Money):
+            return self.cents, other.cents
+        if isinstance(other, (int, float)):
+            return self.cents / 100, other
+        return None
+
+    def __eq__(self, other: Any) -> bool:
+        pair = self._cmp(other)
+        return NotImplemented if pair is None else pair[0] == pair[1]
+
+    def __lt__(self, other: Any) -> bool:
+        pair = self._cmp(other)
+        return NotImplemented if pair is None else pair[0] < pair[1]
+
+    def __le__(self, other: Any) -> bool:
+        pair = self._cmp(other)
+        return NotImplemented if pair is None else pair[0] <= pair[1]
+
+    def __gt__(self, other: Any) -> bool:
+        pair = self._cmp(other)
+        return NotImplemented if pair is None else pair[0] > pair[1]
+
+    def __ge__(self, other: Any) -> bool:
+        pair = self._cmp(other)
+        return NotImplemented if pair is None else pair[0] >= pair[1]
+
+    def __reduce__(self):
+        return (Money.from_cents, (self.cents,))
+
+
+ZERO = Money.from_cents(0)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+
+from enums import Backpressure
+from observers import OrderObserver
+
+if TYPE_CHECKING:
+    from order import Order
+    from order_event import OrderEvent
+
+
+@dataclass
+class DispatchStats:
+    delivered: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    errors: int = 0
+    last_error: Optional[BaseException] = None
+
+
+class QueuedObserver(OrderObserver):
+    """Runs the wrapped observer from its own bounded queue on a worker thread."""
+
+    def __init__(
+        self,
+        inner: OrderObserver,
+        maxsize: int = 256,
+        coalesce: bool = False,
+        backpressure: Backpressure = Backpressure.BLOCK,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be > 0")
+        self.inner = inner
+        self.maxsize = maxsize
+        self.coalesce = coalesce
+        self.backpressure = backpressure
+        self.stats = DispatchStats()
+        self._cond = threading.Condition()
+        self._queue: Deque[Tuple["Order", List["OrderEvent"]]] = deque()
+        # With coalescing on, the queued entry for each order is merged into.
+        self._by_order: Dict[str, Tuple["Order", List["OrderEvent"]]] = {}
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"observer-{type(inner).__name__}", daemon=True
+        )
+        self._thread.start()
+
+    def update(self, order: "Order") -> None:
+        self.on_events(order, [])
+
+    def on_events(self, order: "Order", events: List["OrderEvent"]) -> None:
+        with self._cond:
+            # Re-checked after every wait: another producer may have queued
+            # this order while we were blocked.
+            while True:
+                if self._closed:
+                    raise RuntimeError("Observer queue is closed")
+                if self.coalesce and order.order_id in self._by_order:
+                    self._by_order[order.order_id][1].extend(events)
+                    self.stats.coalesced += 1
+                    return
+                if len(self._queue) < self.maxsize:
+                    break
+                if self.backpressure == Backpressure.DROP:
+                    self.stats.dropped += 1
+                    return
+                self._cond.wait()
+            entry = (order, list(events))
+            self._queue.append(entry)
+            if self.coalesce:
+                self._by_order[order.order_id] = entry
+            self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                self._busy = True
+            try:
+                with self._cond:
+                    order, events = self._queue.popleft()
+                    if self.coalesce:
+                        self._by_order.pop(order.order_id, None)
+                    self._cond.notify_all()
+                self.inner.on_events(order, events)
+                self.stats.delivered += 1
+            except Exception as e:
+                self.stats.errors += 1
+                self.stats.last_error = e
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+class ObserverDispatcher:
+    """Wraps observers in QueuedObservers sharing one set of policies."""
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        coalesce: bool = False,
+        backpressure: Backpressure = Backpressure.BLOCK,
+    ) -> None:
+        self.maxsize = maxsize
+        self.coalesce = coalesce
+        self.backpressure = backpressure
+        self._queued: List[QueuedObserver] = []
+
+    def wrap(self, observer: OrderObserver) -> QueuedObserver:
+        q = QueuedObserver(observer, self.maxsize, self.coalesce, self.backpressure)
+        self._queued.append(q)
+        return q
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return all(q.flush(timeout) for q in list(self._queued))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        for q in self._queued:
+            q.close(timeout)
+        self._queued.clear()
+
+    def stats(self) -> Dict[OrderObserver, DispatchStats]:
+        return {q.inner: q.stats for q in self._queued}
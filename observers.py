@@ -1,7 +1,17 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    from order import Order
+    from order_event import OrderEvent
+
 
 class OrderObserver(ABC):
     @abstractmethod
     def update(self, order: "Order") -> None:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    def on_events(self, order: "Order", events: List["OrderEvent"]) -> None:
+        # Observers that can apply deltas override this; the rest get update().
+        self.update(order)
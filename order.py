@@ -1,22 +1,68 @@
 from __future__ import annotations
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
 from enums import OrderStatus
 from menu_items import MenuItem
+from money import Money
+from order_event import OrderEvent
 from order_line import OrderLine
 from observers import OrderObserver
 
+F = TypeVar("F", bound=Callable[..., Any])
 
-@dataclass
+# Orders are unlocked unless an OrderSystem hands them a (re-entrant) lock.
+_NO_LOCK = nullcontext()
+
+
+def _locked(fn: F) -> F:
+    # Observers are called once the lock is released, never while it is held.
+    @wraps(fn)
+    def wrapper(self: "Order", *args: Any, **kwargs: Any) -> Any:
+        if self._lock is _NO_LOCK and not self._observers and not self._notify_pending:
+            # Single-till order nobody observes: no lock to release first
+            # and nothing to deliver, so skip the bookkeeping.
+            return fn(self, *args, **kwargs)
+        try:
+            with self._lock:
+                self._lock_depth += 1
+                try:
+                    return fn(self, *args, **kwargs)
+                finally:
+                    self._lock_depth -= 1
+        finally:
+            if self._notify_pending:
+                self._deliver()
+    return wrapper  # type: ignore[return-value]
+
+
+@dataclass(slots=True)
 class Order:
     order_id: str
     created_at: datetime = field(default_factory=datetime.utcnow)
     status: OrderStatus = OrderStatus.NEW
-    _lines: List[OrderLine] = field(default_factory=list)
+    # Debug mode: every total read is checked against a full recompute.
+    check_totals: bool = False
+    # Insertion-ordered index of lines keyed by item id.
+    _lines: Dict[str, OrderLine] = field(default_factory=dict)
     _observers: List[OrderObserver] = field(default_factory=list)
+    # Running totals in integer cents, kept up to date by the mutation methods below.
+    _line_totals: Dict[str, int] = field(default_factory=dict, repr=False)
+    _subtotal: int = field(default=0, repr=False)
+    _item_count: int = field(default=0, repr=False)
+    # Notifications raised inside batch() are held back until the outermost exit.
+    _batch_depth: int = field(default=0, repr=False)
+    _notify_pending: bool = field(default=False, repr=False)
+    _pending_events: List[OrderEvent] = field(default_factory=list, repr=False)
+    _lock: Any = field(default=_NO_LOCK, repr=False, compare=False)
+    # Nesting of _locked calls, and whether a thread is running observers.
+    _lock_depth: int = field(default=0, repr=False, compare=False)
+    _delivering: bool = field(default=False, repr=False, compare=False)
 
+    @_locked
     def add_item(self, item: MenuItem, qty: int) -> None:
         if not item.available:
             raise ValueError(f"Item '{item.name}' is not available.")
@@ -25,42 +71,230 @@ class Order:
 
         existing = self._find_line(item.id)
         if existing:
+            old_qty = existing.qty
             existing.qty += qty
+            self._update_line_total(existing, qty)
+            # Events are only built when an observer or a batch will see them.
+            if self._observers or self._batch_depth:
+                self.notify_observers([OrderEvent.qty_changed(self.order_id, item.id, old_qty, existing.qty)])
         else:
-            self._lines.append(OrderLine(item=item, qty=qty))
-        self.notify_observers()
+            line = OrderLine(item=item, qty=qty)
+            self._lines[item.id] = line
+            self._update_line_total(line, qty)
+            if self._observers or self._batch_depth:
+                self.notify_observers([OrderEvent.line_added(self.order_id, item.id, qty)])
 
+    @_locked
     def remove_item(self, item_id: str) -> None:
-        before = len(self._lines)
-        self._lines = [l for l in self._lines if l.item.id != item_id]
-        if len(self._lines) == before:
+        removed = self._lines.pop(item_id, None)
+        if removed is None:
             raise KeyError(f"Item not found in order: {item_id}")
-        self.notify_observers()
+        self._drop_line_total(removed)
+        if self._observers or self._batch_depth:
+            self.notify_observers([OrderEvent.line_removed(self.order_id, item_id, removed.qty)])
 
+    @_locked
+    def remove_items(self, item_ids: Iterable[str]) -> None:
+        ids = list(dict.fromkeys(item_ids))
+        missing = [i for i in ids if i not in self._lines]
+        if missing:
+            raise KeyError(f"Item not found in order: {missing[0]}")
+        if not ids:
+            return
+        listening = bool(self._observers or self._batch_depth)
+        events = []
+        for item_id in ids:
+            removed = self._lines.pop(item_id)
+            self._drop_line_total(removed)
+            if listening:
+                events.append(OrderEvent.line_removed(self.order_id, item_id, removed.qty))
+        if listening:
+            self.notify_observers(events)
+
+    @_locked
+    def clear(self) -> None:
+        if not self._lines:
+            return
+        listening = bool(self._observers or self._batch_depth)
+        if listening:
+            events = [
+                OrderEvent.line_removed(self.order_id, item_id, line.qty)
+                for item_id, line in self._lines.items()
+            ]
+        self._lines = {}
+        self._line_totals = {}
+        self._subtotal = 0
+        self._item_count = 0
+        if listening:
+            self.notify_observers(events)
+
+    @_locked
+    def set_qty(self, item_id: str, qty: int) -> None:
+        if qty <= 0:
+            raise ValueError("qty must be > 0")
+        line = self._find_line(item_id)
+        if line is None:
+            raise KeyError(f"Item not found in order: {item_id}")
+        old_qty = line.qty
+        line.qty = qty
+        self._update_line_total(line, qty - old_qty)
+        if self._observers or self._batch_depth:
+            self.notify_observers([OrderEvent.qty_changed(self.order_id, item_id, old_qty, qty)])
+
+    @_locked
     def set_status(self, status: OrderStatus) -> None:
+        old = self.status
         self.status = status
-        self.notify_observers()
+        if self._observers or self._batch_depth:
+            self.notify_observers([OrderEvent.status_changed(self.order_id, old, status)])
+
+    def calculate_total(self) -> Money:
+        if self.check_totals:
+            self.verify_totals()
+        return Money.from_cents(self._subtotal)
+
+    def item_count(self) -> int:
+        if self.check_totals:
+            self.verify_totals()
+        return self._item_count
+
+    def line_total(self, item_id: str) -> Money:
+        if item_id not in self._line_totals:
+            raise KeyError(f"Item not found in order: {item_id}")
+        return Money.from_cents(self._line_totals[item_id])
 
-    def calculate_total(self) -> float:
-        return sum(l.line_total() for l in self._lines)
+    @_locked
+    def verify_totals(self) -> None:
+        expected = sum(l.line_cents() for l in self._lines.values())
+        count = sum(l.qty for l in self._lines.values())
+        if self._subtotal != expected or self._item_count != count:
+            raise RuntimeError(
+                f"Cached totals out of sync for order {self.order_id}: "
+                f"subtotal={self._subtotal!r} expected={expected!r}, "
+                f"items={self._item_count} expected={count}"
+            )
 
+    @_locked
     def add_observer(self, obs: OrderObserver) -> None:
         if obs not in self._observers:
             self._observers.append(obs)
 
+    @_locked
     def remove_observer(self, obs: OrderObserver) -> None:
         if obs in self._observers:
             self._observers.remove(obs)
 
-    def notify_observers(self) -> None:
-        for obs in list(self._observers):
-            obs.update(self)
+    def notify_observers(self, events: Optional[List[OrderEvent]] = None) -> None:
+        with self._lock:
+            if events:
+                self._pending_events.extend(events)
+            self._notify_pending = True
+            claimed = self._claim_pending()
+        if claimed is not None:
+            self._run_observers(*claimed)
+
+    def _deliver(self) -> None:
+        with self._lock:
+            claimed = self._claim_pending()
+        if claimed is not None:
+            self._run_observers(*claimed)
+
+    def _claim_pending(self) -> Optional[Tuple[List[OrderEvent], List[OrderObserver]]]:
+        # Called with the lock held. Inside a batch or a locked method the
+        # events wait for the outermost exit; while another thread is
+        # delivering, that thread picks them up.
+        if self._delivering or self._lock_depth or self._batch_depth or not self._notify_pending:
+            return None
+        pending, self._pending_events = self._pending_events, []
+        self._notify_pending = False
+        self._delivering = True
+        return pending, list(self._observers)
+
+    def _run_observers(self, pending: List[OrderEvent], observers: List[OrderObserver]) -> None:
+        # Observers run outside the lock, so a slow or blocking observer
+        # holds up neither this order nor the others sharing its lock. One
+        # thread delivers at a time and drains what others queue meanwhile,
+        # so every observer still sees the events in order.
+        try:
+            while True:
+                for obs in observers:
+                    obs.on_events(self, pending)
+                with self._lock:
+                    self._delivering = False
+                    claimed = self._claim_pending()
+                if claimed is None:
+                    return
+                pending, observers = claimed
+        except BaseException:
+            with self._lock:
+                self._delivering = False
+            raise
 
+    @contextmanager
+    def batch(self) -> Iterator["Order"]:
+        """Group mutations into one notification; roll them back if the block raises."""
+        with self._lock:
+            snapshot = self._snapshot()
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._restore(snapshot)
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._notify_pending = False
+                raise
+            self._batch_depth -= 1
+        self._deliver()
+
+    @_locked
     def get_lines(self) -> List[OrderLine]:
-        return list(self._lines)
+        return list(self._lines.values())
+
+    def get_line(self, item_id: str) -> OrderLine:
+        if item_id not in self._lines:
+            raise KeyError(f"Item not found in order: {item_id}")
+        return self._lines[item_id]
 
     def _find_line(self, item_id: str) -> Optional[OrderLine]:
-        for line in self._lines:
-            if line.item.id == item_id:
-                return line
-        return None
+        return self._lines.get(item_id)
+
+    def _load_line(self, item: MenuItem, qty: int) -> None:
+        # Rebuild a stored line without availability checks or notifications.
+        line = OrderLine(item=item, qty=qty)
+        self._lines[item.id] = line
+        self._update_line_total(line, qty)
+
+    def _snapshot(self) -> tuple:
+        qtys = {item_id: line.qty for item_id, line in self._lines.items()}
+        return (
+            self.status,
+            len(self._pending_events),
+            dict(self._lines),
+            qtys,
+            dict(self._line_totals),
+            self._subtotal,
+            self._item_count,
+        )
+
+    def _restore(self, snapshot: tuple) -> None:
+        status, n_events, lines, qtys, line_totals, subtotal, item_count = snapshot
+        del self._pending_events[n_events:]
+        for item_id, line in lines.items():
+            line.qty = qtys[item_id]
+        self.status = status
+        self._lines = lines
+        self._line_totals = line_totals
+        self._subtotal = subtotal
+        self._item_count = item_count
+
+    def _update_line_total(self, line: OrderLine, qty_delta: int) -> None:
+        old = self._line_totals.get(line.item.id, 0)
+        new = line.line_cents()
+        self._line_totals[line.item.id] = new
+        self._subtotal += new - old
+        self._item_count += qty_delta
+
+    def _drop_line_total(self, line: OrderLine) -> None:
+        self._subtotal -= self._line_totals.pop(line.item.id, 0)
+        self._item_count -= line.qty
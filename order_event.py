@@ -0,0 +1,34 @@
+from __future__ import annotations
+from typing import NamedTuple, Optional
+
+from enums import OrderEventType, OrderStatus
+
+
+class OrderEvent(NamedTuple):
+    # A NamedTuple rather than a frozen dataclass: events are built on
+    # every observed mutation, and this is several times cheaper to create.
+    kind: OrderEventType
+    order_id: str
+    item_id: Optional[str] = None
+    old_qty: int = 0
+    new_qty: int = 0
+    old_status: Optional[OrderStatus] = None
+    new_status: Optional[OrderStatus] = None
+
+    @staticmethod
+    def line_added(order_id: str, item_id: str, qty: int) -> "OrderEvent":
+        return OrderEvent(OrderEventType.LINE_ADDED, order_id, item_id, 0, qty)
+
+    @staticmethod
+    def qty_changed(order_id: str, item_id: str, old_qty: int, new_qty: int) -> "OrderEvent":
+        return OrderEvent(OrderEventType.QTY_CHANGED, order_id, item_id, old_qty, new_qty)
+
+    @staticmethod
+    def line_removed(order_id: str, item_id: str, old_qty: int) -> "OrderEvent":
+        return OrderEvent(OrderEventType.LINE_REMOVED, order_id, item_id, old_qty, 0)
+
+    @staticmethod
+    def status_changed(order_id: str, old: OrderStatus, new: OrderStatus) -> "OrderEvent":
+        return OrderEvent(
+            OrderEventType.STATUS_CHANGED, order_id, old_status=old, new_status=new
+        )
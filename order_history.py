@@ -0,0 +1,212 @@
+from __future__ import annotations
+import os
+from array import array
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for OrderHistory
+    np = None
+
+from enums import OrderStatus
+from money import to_cents
+
+if TYPE_CHECKING:
+    from order import Order
+
+FINISHED = (OrderStatus.READY, OrderStatus.CANCELLED)
+STATUSES = list(OrderStatus)
+_STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+
+# column -> (array typecode for appends, NumPy dtype)
+COLUMNS = {
+    "order": ("q", "int64"),
+    "item": ("q", "int32"),
+    "qty": ("q", "int32"),
+    "price_cents": ("q", "int64"),
+    "ts": ("q", "int64"),
+    "status": ("b", "int8"),
+}
+
+
+def _epoch(dt: datetime) -> int:
+    # Order timestamps are naive UTC.
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def _select(col: "np.ndarray", keep: Optional["np.ndarray"]) -> "np.ndarray":
+    return col if keep is None else col[keep]
+
+
+class OrderHistory:
+    """Columnar, NumPy-backed store of finished order lines.
+
+    Every order line becomes one row of parallel arrays: order index, item
+    index, qty, unit price in cents, timestamp (epoch seconds) and order
+    status. Item and order ids are interned in side tables, and each
+    order's status is also kept per order, so orders without lines still
+    count in orders_by_status(). Appends go to
+    stdlib arrays and are folded into the NumPy columns on the next query,
+    so queries are whole-array operations (masks, bincount, argpartition)
+    rather than loops over Order objects.
+    """
+
+    def __init__(self) -> None:
+        if np is None:
+            raise ImportError("OrderHistory requires numpy (pip install numpy)")
+        self.item_ids: List[str] = []
+        self.order_ids: List[str] = []
+        self._item_index: Dict[str, int] = {}
+        self._order_index: Dict[str, int] = {}
+        # Status code per order, parallel to order_ids.
+        self._order_status = array("b")
+        self._cols: Dict[str, "np.ndarray"] = {n: np.empty(0, dtype) for n, (_, dtype) in COLUMNS.items()}
+        self._pending: Dict[str, array] = {n: array(code) for n, (code, _) in COLUMNS.items()}
+        self._revenue: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self._cols["qty"]) + len(self._pending["qty"])
+
+    def add(self, order: "Order", at: Optional[datetime] = None) -> bool:
+        """Append the order's lines; returns False if it is not finished or already stored."""
+        if order.status not in FINISHED or order.order_id in self._order_index:
+            return False
+        o = self._order_index[order.order_id] = len(self.order_ids)
+        self.order_ids.append(order.order_id)
+        ts = _epoch(at or order.created_at)
+        status = _STATUS_CODE[order.status]
+        self._order_status.append(status)
+        p = self._pending
+        for line in order.get_lines():
+            p["order"].append(o)
+            p["item"].append(self._intern_item(line.item.id))
+            p["qty"].append(line.qty)
+            p["price_cents"].append(to_cents(line.item.price))
+            p["ts"].append(ts)
+            p["status"].append(status)
+        return True
+
+    def add_orders(self, orders: Iterable["Order"]) -> int:
+        return sum(self.add(o) for o in orders)
+
+    def columns(self) -> Dict[str, "np.ndarray"]:
+        if len(self._pending["qty"]):
+            for name, (_, dtype) in COLUMNS.items():
+                buf = self._pending[name]
+                self._cols[name] = np.concatenate((self._cols[name], np.asarray(buf, dtype=dtype)))
+                del buf[:]
+            self._revenue = None
+        return self._cols
+
+    # -- queries ---------------------------------------------------------
+
+    def mask(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        statuses: Sequence[OrderStatus] = (OrderStatus.READY,),
+    ) -> "np.ndarray":
+        """Rows with ``since <= ts < until`` whose order has one of ``statuses``."""
+        cols = self.columns()
+        wanted = np.zeros(len(STATUSES), dtype=bool)
+        wanted[[_STATUS_CODE[s] for s in statuses]] = True
+        keep = wanted[cols["status"]]
+        if since is not None:
+            keep &= cols["ts"] >= _epoch(since)
+        if until is not None:
+            keep &= cols["ts"] < _epoch(until)
+        return keep
+
+    def revenue_cents(self, where: Optional["np.ndarray"] = None) -> "np.ndarray":
+        """Per-row revenue (qty * unit price), optionally restricted to ``where``."""
+        cols = self.columns()
+        if self._revenue is None:
+            self._revenue = cols["qty"].astype("int64") * cols["price_cents"]
+        return _select(self._revenue, where)
+
+    def total_revenue(self, **filters) -> int:
+        return int(self.revenue_cents(self._rows(**filters)).sum())
+
+    def by_item(self, value: str = "revenue", **filters) -> Dict[str, int]:
+        """Revenue (cents) or units per item id."""
+        sums = self._item_sums(self._rows(**filters), value)
+        nonzero = np.flatnonzero(sums)
+        return {self.item_ids[i]: int(sums[i]) for i in nonzero}
+
+    def top_items(self, n: int = 10, value: str = "qty", **filters) -> List[Tuple[str, int]]:
+        sums = self._item_sums(self._rows(**filters), value)
+        n = min(n, len(sums))
+        if n <= 0:
+            return []
+        top = np.argpartition(-sums, n - 1)[:n]
+        # Highest first, ties broken by item id.
+        ranked = sorted(top.tolist(), key=lambda i: (-int(sums[i]), self.item_ids[i]))
+        return [(self.item_ids[i], int(sums[i])) for i in ranked if sums[i] > 0]
+
+    def revenue_by_hour(self, **filters) -> List[Tuple[datetime, int]]:
+        keep = self._rows(**filters)
+        hours = _select(self.columns()["ts"], keep) // 3600
+        if not len(hours):
+            return []
+        first = int(hours.min())
+        sums = np.bincount(hours - first, weights=self.revenue_cents(keep))
+        return [
+            (datetime.fromtimestamp((first + h) * 3600, timezone.utc).replace(tzinfo=None), int(round(sums[h])))
+            for h in np.flatnonzero(sums).tolist()
+        ]
+
+    def orders_by_status(self) -> Dict[OrderStatus, int]:
+        codes = np.asarray(self._order_status, dtype="int8")
+        counts = np.bincount(codes, minlength=len(STATUSES))
+        return {s: int(counts[i]) for i, s in enumerate(STATUSES) if counts[i]}
+
+    def _rows(self, **filters) -> Optional["np.ndarray"]:
+        # None when the filters keep every row, which spares a full copy per column.
+        keep = self.mask(**filters)
+        return None if keep.all() else keep
+
+    def _item_sums(self, keep: Optional["np.ndarray"], value: str) -> "np.ndarray":
+        cols = self.columns()
+        if value == "revenue":
+            weights = self.revenue_cents(keep)
+        elif value == "qty":
+            weights = _select(cols["qty"], keep)
+        else:
+            raise ValueError(f"Unknown value: {value}")
+        sums = np.bincount(_select(cols["item"], keep), weights=weights, minlength=len(self.item_ids))
+        return np.rint(sums).astype("int64")
+
+    def _intern_item(self, item_id: str) -> int:
+        i = self._item_index.get(item_id)
+        if i is None:
+            i = self._item_index[item_id] = len(self.item_ids)
+            self.item_ids.append(item_id)
+        return i
+
+    # -- .npy files ------------------------------------------------------
+
+    def save(self, directory: str) -> None:
+        """Write one ``<column>.npy`` per column plus the id tables."""
+        os.makedirs(directory, exist_ok=True)
+        for name, col in self.columns().items():
+            np.save(os.path.join(directory, f"{name}.npy"), col)
+        np.save(os.path.join(directory, "item_ids.npy"), np.array(self.item_ids, dtype=str))
+        np.save(os.path.join(directory, "order_ids.npy"), np.array(self.order_ids, dtype=str))
+        np.save(os.path.join(directory, "order_status.npy"), np.asarray(self._order_status, dtype="int8"))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> "OrderHistory":
+        """Read a saved store; ``mmap`` maps the columns instead of reading them."""
+        history = cls()
+        mode = "r" if mmap else None
+        for name in COLUMNS:
+            history._cols[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+        history.item_ids = np.load(os.path.join(directory, "item_ids.npy")).tolist()
+        history.order_ids = np.load(os.path.join(directory, "order_ids.npy")).tolist()
+        history._order_status = array("b", np.load(os.path.join(directory, "order_status.npy")).tolist())
+        history._item_index = {item_id: i for i, item_id in enumerate(history.item_ids)}
+        history._order_index = {order_id: i for i, order_id in enumerate(history.order_ids)}
+        return history
@@ -0,0 +1,350 @@
+from __future__ import annotations
+import glob
+import math
+import mmap
+import os
+import struct
+import zlib
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+from customer import Customer
+from enums import OrderEventType, OrderStatus, PaymentStatus
+from menu import stored_item
+from money import Money
+from observers import OrderObserver
+from order import Order
+from order_system import OrderSystem
+from payment import Payment
+
+if TYPE_CHECKING:
+    from menu import Menu
+    from order_event import OrderEvent
+
+# Record types.
+REC_CREATE = 1
+REC_ADD_LINE = 2
+REC_SET_QTY = 3
+REC_REMOVE_LINE = 4
+REC_STATUS = 5
+REC_PAYMENT = 6
+
+# Every record is: payload length, CRC32 of payload, record type, payload.
+HEADER = struct.Struct("<IIB")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_F64 = struct.Struct("<d")
+_U8 = struct.Struct("<B")
+
+SNAPSHOT_MAGIC = b"CAFESNP1"
+# Magic, then the last journal generation the snapshot already covers.
+SNAPSHOT_HEADER = struct.Struct("<8sI")
+
+_ORDER_STATUSES = list(OrderStatus)
+_PAYMENT_STATUSES = list(PaymentStatus)
+_ORDER_STATUS_CODE = {s: i for i, s in enumerate(_ORDER_STATUSES)}
+_PAYMENT_STATUS_CODE = {s: i for i, s in enumerate(_PAYMENT_STATUSES)}
+
+
+def _str(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return _U16.pack(len(raw)) + raw
+
+
+def encode_record(kind: int, payload: bytes) -> bytes:
+    return HEADER.pack(len(payload), zlib.crc32(payload), kind) + payload
+
+
+def encode_create(order_id: str, created_at: datetime, status: OrderStatus) -> bytes:
+    payload = _str(order_id) + _F64.pack(created_at.timestamp()) + _U8.pack(_ORDER_STATUS_CODE[status])
+    return encode_record(REC_CREATE, payload)
+
+
+def encode_add_line(order_id: str, item_id: str, name: str, unit_price: float, qty: int) -> bytes:
+    payload = _str(order_id) + _str(item_id) + _str(name) + _F64.pack(float(unit_price)) + _U32.pack(qty)
+    return encode_record(REC_ADD_LINE, payload)
+
+
+def encode_set_qty(order_id: str, item_id: str, qty: int) -> bytes:
+    return encode_record(REC_SET_QTY, _str(order_id) + _str(item_id) + _U32.pack(qty))
+
+
+def encode_remove_line(order_id: str, item_id: str) -> bytes:
+    return encode_record(REC_REMOVE_LINE, _str(order_id) + _str(item_id))
+
+
+def encode_status(order_id: str, status: OrderStatus) -> bytes:
+    return encode_record(REC_STATUS, _str(order_id) + _U8.pack(_ORDER_STATUS_CODE[status]))
+
+
+def encode_payment(order_id: str, payment: Payment) -> bytes:
+    paid_at = payment.paid_at.timestamp() if payment.paid_at else math.nan
+    payload = (
+        _str(order_id)
+        + _str(payment.payment_id)
+        + _str(payment.order_id or "")
+        + _F64.pack(float(payment.amount))
+        + _U8.pack(_PAYMENT_STATUS_CODE[payment.status])
+        + _F64.pack(paid_at)
+        + _F64.pack(float(payment.refunded))
+    )
+    return encode_record(REC_PAYMENT, payload)
+
+
+# Payload layout per record type: leading UTF-8 strings (u16 length
+# prefixed), then fixed-width fields.
+_LAYOUT = {
+    REC_CREATE: (1, struct.Struct("<dB")),
+    REC_ADD_LINE: (3, struct.Struct("<dI")),
+    REC_SET_QTY: (2, _U32),
+    REC_REMOVE_LINE: (2, None),
+    REC_STATUS: (1, _U8),
+    REC_PAYMENT: (3, struct.Struct("<dBdd")),
+}
+
+
+def iter_records(buf, start: int = 0) -> Iterator[Tuple[int, tuple, int]]:
+    """Decode (type, fields, end offset) records, stopping at a torn or corrupt tail."""
+    pos, end = start, len(buf)
+    hsize = HEADER.size
+    unpack_header = HEADER.unpack_from
+    layout = _LAYOUT
+    crc32 = zlib.crc32
+    while pos + hsize <= end:
+        length, crc, kind = unpack_header(buf, pos)
+        body = pos + hsize
+        nxt = body + length
+        if nxt > end or kind not in layout:
+            return
+        payload = buf[body:nxt]
+        if crc32(payload) != crc:
+            return
+        n_str, tail = layout[kind]
+        fields = []
+        p = 0
+        for _ in range(n_str):
+            n = payload[p] | (payload[p + 1] << 8)
+            p += 2
+            fields.append(str(payload[p:p + n], "utf-8"))
+            p += n
+        if tail is not None:
+            fields.extend(tail.unpack_from(payload, p))
+        pos = nxt
+        yield kind, tuple(fields), pos
+
+
+class _JournalObserver(OrderObserver):
+    def __init__(self, system: "JournaledOrderSystem") -> None:
+        self.system = system
+
+    def update(self, order: Order) -> None:
+        # No deltas available: journal the order's full current state.
+        records = [encode_status(order.order_id, order.status)]
+        for item_id in list(self.system._journaled_lines.get(order.order_id, ())):
+            records.append(encode_remove_line(order.order_id, item_id))
+        for line in order.get_lines():
+            records.append(
+                encode_add_line(order.order_id, line.item.id, line.item.name, line.unit_price, line.qty)
+            )
+        self.system._append(records)
+        self.system._journaled_lines[order.order_id] = {l.item.id for l in order.get_lines()}
+
+    def on_events(self, order: Order, events: List["OrderEvent"]) -> None:
+        if not events:
+            self.update(order)
+            return
+        oid = order.order_id
+        known = self.system._journaled_lines.setdefault(oid, set())
+        records = []
+        for ev in events:
+            if ev.kind == OrderEventType.STATUS_CHANGED:
+                records.append(encode_status(oid, ev.new_status))
+            elif ev.kind == OrderEventType.LINE_REMOVED:
+                records.append(encode_remove_line(oid, ev.item_id))
+                known.discard(ev.item_id)
+            elif ev.kind == OrderEventType.LINE_ADDED:
+                line = order._find_line(ev.item_id)
+                item = line.item if line is not None else None
+                name = item.name if item is not None else ""
+                price = line.unit_price if line is not None else 0.0
+                records.append(encode_add_line(oid, ev.item_id, name, price, ev.new_qty))
+                known.add(ev.item_id)
+            else:
+                records.append(encode_set_qty(oid, ev.item_id, ev.new_qty))
+        self.system._append(records)
+
+
+class JournaledOrderSystem(OrderSystem):
+    """OrderSystem that journals order events to an append-only log.
+
+    ``directory`` holds ``snapshot.bin`` and ``journal.<generation>.log``
+    files. Opening the directory recovers state: the snapshot is loaded,
+    then every later journal generation is replayed through a read-only
+    mmap. snapshot() rotates to a new generation, writes a fresh snapshot
+    atomically and deletes the journals it covers. It also runs on its own
+    every ``snapshot_every`` records.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        menu: Optional["Menu"] = None,
+        snapshot_every: int = 100_000,
+        fsync: bool = False,
+    ) -> None:
+        super().__init__()
+        self.directory = directory
+        self.menu = menu
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.payments: Dict[str, List[Payment]] = {}
+        self.records_since_snapshot = 0
+        self._journaled_lines: Dict[str, set] = {}
+        self._observer = _JournalObserver(self)
+        os.makedirs(directory, exist_ok=True)
+        self._generation = self._recover()
+        self._log = open(self._journal_path(self._generation), "ab")
+
+    def create_order(self, customer: Customer) -> Order:
+        o = Order(order_id=str(uuid4()), status=OrderStatus.NEW)
+        self.orders[o.order_id] = o
+        self._append([encode_create(o.order_id, o.created_at, o.status)])
+        o.add_observer(self._observer)
+        return o
+
+    def record_payment(self, order_id: str, payment: Payment) -> None:
+        self.get_order(order_id)
+        self.payments.setdefault(order_id, []).append(payment)
+        self._append([encode_payment(order_id, payment)])
+
+    def snapshot(self) -> None:
+        covered = self._generation
+        self._log.close()
+        self._generation += 1
+        self._log = open(self._journal_path(self._generation), "ab")
+
+        tmp = os.path.join(self.directory, "snapshot.bin.tmp")
+        with open(tmp, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, covered))
+            for order in self.orders.values():
+                f.write(encode_create(order.order_id, order.created_at, order.status))
+                for line in order.get_lines():
+                    f.write(encode_add_line(
+                        order.order_id, line.item.id, line.item.name, line.unit_price, line.qty
+                    ))
+                for payment in self.payments.get(order.order_id, ()):
+                    f.write(encode_payment(order.order_id, payment))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._snapshot_path())
+        for gen, path in self._journal_files():
+            if gen <= covered:
+                os.remove(path)
+        self.records_since_snapshot = 0
+
+    def close(self) -> None:
+        self._log.close()
+
+    def _append(self, records: List[bytes]) -> None:
+        if not records:
+            return
+        self._log.write(b"".join(records))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self.records_since_snapshot += len(records)
+        if self.snapshot_every and self.records_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.directory, "snapshot.bin")
+
+    def _journal_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal.{generation:08d}.log")
+
+    def _journal_files(self) -> List[Tuple[int, str]]:
+        out = []
+        for path in glob.glob(os.path.join(self.directory, "journal.*.log")):
+            out.append((int(os.path.basename(path).split(".")[1]), path))
+        return sorted(out)
+
+    def _recover(self) -> int:
+        # Replay into plain tuples/dicts first; Orders are built once at the end.
+        state: Dict[str, list] = {}
+        covered = -1
+        if os.path.exists(self._snapshot_path()):
+            with open(self._snapshot_path(), "rb") as f:
+                data = f.read()
+            magic, covered = SNAPSHOT_HEADER.unpack_from(data, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"Not an order snapshot: {self._snapshot_path()}")
+            _replay(state, iter_records(data, SNAPSHOT_HEADER.size))
+        generation = covered + 1
+        for gen, path in self._journal_files():
+            if gen <= covered:
+                continue
+            generation = gen
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                valid = _replay(state, iter_records(mm))
+            if valid < os.path.getsize(path):
+                # Drop a torn tail so new records are not appended after garbage.
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+        self._materialize(state)
+        return generation
+
+    def _materialize(self, state: Dict[str, list]) -> None:
+        menu = self.menu
+        for order_id, (ts, status, lines, payments) in state.items():
+            order = Order(
+                order_id=order_id,
+                created_at=datetime.fromtimestamp(ts),
+                status=_ORDER_STATUSES[status],
+            )
+            for item_id, (name, price, qty) in lines.items():
+                order._load_line(stored_item(menu, item_id, name, price), qty)
+            order.add_observer(self._observer)
+            self.orders[order_id] = order
+            self._journaled_lines[order_id] = set(lines)
+            if payments:
+                self.payments[order_id] = [
+                    Payment(
+                        payment_id=payment_id,
+                        amount=amount,
+                        paid_at=None if math.isnan(paid_at) else datetime.fromtimestamp(paid_at),
+                        status=_PAYMENT_STATUSES[pstatus],
+                        order_id=payment_order_id or None,
+                        refunded=Money(refunded),
+                    )
+                    for payment_id, payment_order_id, amount, pstatus, paid_at, refunded in payments
+                ]
+
+
+def _replay(state: Dict[str, list], records: Iterator[Tuple[int, tuple, int]]) -> int:
+    # state[order_id] = [created_ts, status_code, {item_id: [name, price, qty]}, [payment fields]]
+    end = 0
+    for kind, f, end in records:
+        if kind == REC_CREATE:
+            state[f[0]] = [f[1], f[2], {}, []]
+            continue
+        entry = state.get(f[0])
+        if entry is None:
+            continue
+        if kind == REC_ADD_LINE:
+            lines = entry[2]
+            lines.pop(f[1], None)
+            lines[f[1]] = [f[2], f[3], f[4]]
+        elif kind == REC_SET_QTY:
+            line = entry[2].get(f[1])
+            if line is not None:
+                line[2] = f[2]
+        elif kind == REC_REMOVE_LINE:
+            entry[2].pop(f[1], None)
+        elif kind == REC_STATUS:
+            entry[1] = f[1]
+        elif kind == REC_PAYMENT:
+            entry[3].append(f[1:])
+    return end
@@ -1,16 +1,23 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from menu_items import MenuItem
+from money import Money, as_money, to_cents
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderLine:
     item: MenuItem
     qty: int
 
     @property
-    def unit_price(self) -> float:
-        return float(self.item.price)
+    def unit_price(self) -> Money:
+        return as_money(self.item.price)
 
-    def line_total(self) -> float:
-        return self.unit_price * self.qty
+    def line_cents(self) -> int:
+        try:
+            return self.item.price.cents * self.qty
+        except AttributeError:  # a plain number assigned to price
+            return to_cents(self.item.price) * self.qty
+
+    def line_total(self) -> Money:
+        return Money.from_cents(self.line_cents())
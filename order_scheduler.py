@@ -0,0 +1,153 @@
+from __future__ import annotations
+import heapq
+import itertools
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from enums import OrderEventType, OrderStatus
+from observers import OrderObserver
+
+if TYPE_CHECKING:
+    from order import Order
+    from order_event import OrderEvent
+
+Clock = Callable[[], float]
+
+
+class ManualClock:
+    """Clock for tests: time only moves when advance() is called."""
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class OrderScheduler(OrderObserver):
+    """Headless timers for order status transitions.
+
+    Each watched order has at most one pending transition, kept in a heap
+    keyed by due time. Rescheduling or cancelling only bumps the order's
+    timer version; stale heap entries are skipped when popped and the heap
+    is compacted once they outnumber live timers. Nothing fires on its
+    own: tick() runs every due transition, so the owner (a Tk ``after``
+    loop, a service thread or a test) decides how often it is called.
+
+    Watched orders follow NEW -> CANCELLED after ``abandon_after`` seconds
+    without activity, and PREPARING -> READY ``prep_time`` seconds after
+    they start preparing (pass ``prep_time=None`` when something else,
+    such as a KitchenQueue, decides when orders are ready).
+    """
+
+    def __init__(
+        self,
+        clock: Clock = time.monotonic,
+        prep_time: Optional[float] = 8.0,
+        abandon_after: float = 1800.0,
+    ) -> None:
+        self.clock = clock
+        self.prep_time = prep_time
+        self.abandon_after = abandon_after
+        self._heap: List[Tuple[float, int, str, int]] = []
+        # order_id -> (version, order, allowed from-statuses, target status)
+        self._timers: Dict[str, Tuple[int, "Order", Tuple[OrderStatus, ...], OrderStatus]] = {}
+        self._versions = itertools.count()
+        self._seq = itertools.count()
+
+    def watch(self, order: "Order") -> None:
+        order.add_observer(self)
+        self._reconcile(order)
+
+    def unwatch(self, order: "Order") -> None:
+        order.remove_observer(self)
+        self.cancel(order.order_id)
+
+    def schedule(
+        self,
+        order: "Order",
+        to_status: OrderStatus,
+        delay: float,
+        from_statuses: Optional[Tuple[OrderStatus, ...]] = None,
+    ) -> None:
+        """Replace the order's pending transition with one due in ``delay`` seconds."""
+        version = next(self._versions)
+        allowed = from_statuses if from_statuses is not None else (order.status,)
+        self._timers[order.order_id] = (version, order, allowed, to_status)
+        heapq.heappush(self._heap, (self.clock() + delay, next(self._seq), order.order_id, version))
+        self._maybe_compact()
+
+    def cancel(self, order_id: str) -> bool:
+        return self._timers.pop(order_id, None) is not None
+
+    def pending(self) -> int:
+        return len(self._timers)
+
+    def due_at(self, order_id: str) -> Optional[float]:
+        timer = self._timers.get(order_id)
+        if timer is None:
+            return None
+        for due, _, oid, version in self._heap:
+            if oid == order_id and version == timer[0]:
+                return due
+        return None
+
+    def next_due(self) -> Optional[float]:
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    def tick(self) -> int:
+        """Apply every transition that is due; returns how many fired."""
+        now = self.clock()
+        fired = 0
+        while True:
+            self._drop_stale_head()
+            if not self._heap or self._heap[0][0] > now:
+                return fired
+            _, _, order_id, _ = heapq.heappop(self._heap)
+            _, order, allowed, to_status = self._timers.pop(order_id)
+            # Skip transitions overtaken by a manual status change.
+            if order.status in allowed:
+                order.set_status(to_status)
+                fired += 1
+
+    def update(self, order: "Order") -> None:
+        self._reconcile(order)
+
+    def on_events(self, order: "Order", events: List["OrderEvent"]) -> None:
+        if not events:
+            self._reconcile(order)
+            return
+        status_changed = any(e.kind == OrderEventType.STATUS_CHANGED for e in events)
+        if status_changed or order.status == OrderStatus.NEW:
+            # Status moves re-plan; line activity keeps a NEW order alive.
+            self._reconcile(order, restart=True)
+
+    def _reconcile(self, order: "Order", restart: bool = False) -> None:
+        timer = self._timers.get(order.order_id)
+        if order.status == OrderStatus.NEW:
+            if restart or timer is None or timer[3] != OrderStatus.CANCELLED:
+                self.schedule(order, OrderStatus.CANCELLED, self.abandon_after)
+        elif order.status == OrderStatus.PREPARING and self.prep_time is not None:
+            if timer is None or timer[3] != OrderStatus.READY:
+                self.schedule(order, OrderStatus.READY, self.prep_time)
+        else:
+            self.cancel(order.order_id)
+
+    def _drop_stale_head(self) -> None:
+        heap, timers = self._heap, self._timers
+        while heap:
+            _, _, order_id, version = heap[0]
+            timer = timers.get(order_id)
+            if timer is not None and timer[0] == version:
+                return
+            heapq.heappop(heap)
+
+    def _maybe_compact(self) -> None:
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._timers):
+            live = {oid: t[0] for oid, t in self._timers.items()}
+            self._heap = [e for e in self._heap if live.get(e[2]) == e[3]]
+            heapq.heapify(self._heap)
@@ -4,11 +4,26 @@ from datetime import datetime
 from typing import Optional
 
 from enums import PaymentStatus
+from money import ZERO, Money
 
 
-@dataclass
+@dataclass(slots=True)
 class Payment:
     payment_id: str
-    amount: float
+    amount: Money  # floats are accepted and converted
     paid_at: Optional[datetime] = None
     status: PaymentStatus = PaymentStatus.PENDING
+    order_id: Optional[str] = None
+    refunded: Money = ZERO
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.amount, Money):
+            self.amount = Money(self.amount)
+
+
+@dataclass(slots=True)
+class Refund:
+    refund_id: str
+    payment_id: str
+    amount: Money
+    refunded_at: datetime
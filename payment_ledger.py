@@ -0,0 +1,260 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Generic, Iterator, List, Optional, TypeVar
+from uuid import uuid4
+
+from enums import PaymentStatus
+from money import ZERO, Money, as_money
+from payment import Payment, Refund
+
+T = TypeVar("T")
+
+# Payments whose amount was captured; refunds are netted against these.
+CAPTURED = (PaymentStatus.PAID, PaymentStatus.PARTIALLY_REFUNDED, PaymentStatus.REFUNDED)
+REFUNDABLE = (PaymentStatus.PAID, PaymentStatus.PARTIALLY_REFUNDED)
+
+
+class _TimeIndex(Generic[T]):
+    # Values kept sorted by timestamp in parallel lists. Entries nearly
+    # always arrive in time order, so adding is an append; range lookups
+    # are two bisects plus a slice.
+
+    def __init__(self) -> None:
+        self._keys: List[float] = []
+        self._values: List[T] = []
+
+    def add(self, ts: float, value: T) -> None:
+        if not self._keys or ts >= self._keys[-1]:
+            self._keys.append(ts)
+            self._values.append(value)
+        else:
+            i = bisect_right(self._keys, ts)
+            self._keys.insert(i, ts)
+            self._values.insert(i, value)
+
+    def between(self, start: Optional[float], end: Optional[float]) -> List[T]:
+        lo = 0 if start is None else bisect_left(self._keys, start)
+        hi = len(self._keys) if end is None else bisect_left(self._keys, end)
+        return self._values[lo:hi]
+
+
+def _ts(when: Optional[datetime]) -> Optional[float]:
+    return None if when is None else when.timestamp()
+
+
+class PaymentLedger:
+    """In-memory record of payments and the refunds made against them.
+
+    Payments are indexed by payment_id, by order id and by time, and
+    refunds by payment and by time, so lookups and refunds are O(1) and
+    range queries cost O(log n + k) for k matching entries. Time ranges
+    are half-open, ``start <= t < end``; either bound may be None.
+    """
+
+    def __init__(self) -> None:
+        self._payments: Dict[str, Payment] = {}
+        self._by_order: Dict[str, List[Payment]] = {}
+        self._refunds: Dict[str, List[Refund]] = {}
+        self._payment_times: _TimeIndex[Payment] = _TimeIndex()
+        self._refund_times: _TimeIndex[Refund] = _TimeIndex()
+
+    def __len__(self) -> int:
+        return len(self._payments)
+
+    def __contains__(self, payment_id: str) -> bool:
+        return payment_id in self._payments
+
+    def __iter__(self) -> Iterator[Payment]:
+        return iter(self._payments.values())
+
+    def record(self, payment: Payment, order_id: Optional[str] = None) -> Payment:
+        known = self._payments.get(payment.payment_id)
+        if known is payment:
+            return payment
+        if known is not None:
+            raise ValueError(f"Payment already recorded: {payment.payment_id}")
+        # Stored before it is indexed, so a failed write leaves no trace.
+        prior_order_id = payment.order_id
+        if order_id is not None:
+            payment.order_id = order_id
+        ts = (payment.paid_at or datetime.utcnow()).timestamp()
+        try:
+            self._store_payment(payment, ts)
+        except BaseException:
+            payment.order_id = prior_order_id
+            raise
+        self._index_payment(payment, ts)
+        return payment
+
+    def get(self, payment_id: str) -> Payment:
+        payment = self._payments.get(payment_id)
+        if payment is None:
+            raise KeyError(f"Payment not found: {payment_id}")
+        return payment
+
+    def for_order(self, order_id: str) -> List[Payment]:
+        return list(self._by_order.get(order_id, ()))
+
+    def refunds_for(self, payment_id: str) -> List[Refund]:
+        return list(self._refunds.get(payment_id, ()))
+
+    def refundable(self, payment_id: str) -> Money:
+        payment = self.get(payment_id)
+        return payment.amount - payment.refunded if payment.status in REFUNDABLE else ZERO
+
+    def refund(
+        self,
+        payment_id: str,
+        amount=None,
+        refund_id: Optional[str] = None,
+        at: Optional[datetime] = None,
+    ) -> Refund:
+        """Refund ``amount`` (default: everything not yet refunded) of a payment."""
+        payment = self.get(payment_id)
+        if payment.status not in REFUNDABLE:
+            raise ValueError(f"Payment {payment_id} cannot be refunded ({payment.status.value})")
+        remaining = payment.amount - payment.refunded
+        amount = remaining if amount is None else as_money(amount)
+        if amount <= ZERO or amount > remaining:
+            raise ValueError(f"Refund amount must be in (0, {remaining}], got {amount}")
+        refund = Refund(
+            refund_id=refund_id or str(uuid4()),
+            payment_id=payment_id,
+            amount=amount,
+            refunded_at=at or datetime.utcnow(),
+        )
+        prior = payment.refunded, payment.status
+        payment.refunded = payment.refunded + amount
+        payment.status = (
+            PaymentStatus.REFUNDED if payment.refunded == payment.amount else PaymentStatus.PARTIALLY_REFUNDED
+        )
+        try:
+            self._store_refund(refund, payment)
+        except BaseException:
+            payment.refunded, payment.status = prior
+            raise
+        self._index_refund(refund)
+        return refund
+
+    # -- range queries ----------------------------------------------------
+
+    def payments_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Payment]:
+        return self._payment_times.between(_ts(start), _ts(end))
+
+    def refunds_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Refund]:
+        return self._refund_times.between(_ts(start), _ts(end))
+
+    def captured_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Money:
+        cents = sum(p.amount.cents for p in self.payments_between(start, end) if p.status in CAPTURED)
+        return Money.from_cents(cents)
+
+    def refunded_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Money:
+        return Money.from_cents(sum(r.amount.cents for r in self.refunds_between(start, end)))
+
+    def net_between(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Money:
+        """Captured minus refunded in the range, for reconciliation against settlements."""
+        return self.captured_between(start, end) - self.refunded_between(start, end)
+
+    # -- indexing and storage ---------------------------------------------
+
+    def _index_payment(self, payment: Payment, ts: float) -> None:
+        self._payments[payment.payment_id] = payment
+        if payment.order_id is not None:
+            self._by_order.setdefault(payment.order_id, []).append(payment)
+        self._payment_times.add(ts, payment)
+
+    def _index_refund(self, refund: Refund) -> None:
+        self._refunds.setdefault(refund.payment_id, []).append(refund)
+        self._refund_times.add(refund.refunded_at.timestamp(), refund)
+
+    def _store_payment(self, payment: Payment, ts: float) -> None:
+        pass
+
+    def _store_refund(self, refund: Refund, payment: Payment) -> None:
+        pass
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payments (
+    payment_id     TEXT PRIMARY KEY,
+    order_id       TEXT,
+    amount_cents   INTEGER NOT NULL,
+    refunded_cents INTEGER NOT NULL,
+    status         TEXT NOT NULL,
+    paid_at        TEXT,
+    ts             REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refunds (
+    refund_id    TEXT PRIMARY KEY,
+    payment_id   TEXT NOT NULL REFERENCES payments(payment_id),
+    amount_cents INTEGER NOT NULL,
+    refunded_at  TEXT NOT NULL
+);
+"""
+
+SQL_INSERT_PAYMENT = (
+    "INSERT INTO payments (payment_id, order_id, amount_cents, refunded_cents, status, paid_at, ts) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_INSERT_REFUND = "INSERT INTO refunds (refund_id, payment_id, amount_cents, refunded_at) VALUES (?, ?, ?, ?)"
+SQL_SET_REFUNDED = "UPDATE payments SET refunded_cents = ?, status = ? WHERE payment_id = ?"
+SQL_SELECT_PAYMENTS = (
+    "SELECT payment_id, order_id, amount_cents, refunded_cents, status, paid_at, ts FROM payments ORDER BY rowid"
+)
+SQL_SELECT_REFUNDS = "SELECT refund_id, payment_id, amount_cents, refunded_at FROM refunds ORDER BY rowid"
+
+
+class SqlitePaymentLedger(PaymentLedger):
+    """PaymentLedger persisted to SQLite.
+
+    Every payment and refund is committed before the call returns. The
+    indexes are rebuilt from the database on open, so queries never go
+    to disk.
+    """
+
+    def __init__(self, path: str) -> None:
+        import sqlite3  # only this backend needs it; keeps the core import light
+        super().__init__()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._load()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _store_payment(self, payment: Payment, ts: float) -> None:
+        paid_at = payment.paid_at.isoformat() if payment.paid_at else None
+        with self._conn:
+            self._conn.execute(
+                SQL_INSERT_PAYMENT,
+                (payment.payment_id, payment.order_id, payment.amount.cents, payment.refunded.cents,
+                 payment.status.value, paid_at, ts),
+            )
+
+    def _store_refund(self, refund: Refund, payment: Payment) -> None:
+        with self._conn:
+            self._conn.execute(
+                SQL_INSERT_REFUND,
+                (refund.refund_id, refund.payment_id, refund.amount.cents, refund.refunded_at.isoformat()),
+            )
+            self._conn.execute(SQL_SET_REFUNDED, (payment.refunded.cents, payment.status.value, payment.payment_id))
+
+    def _load(self) -> None:
+        for payment_id, order_id, amount, refunded, status, paid_at, ts in self._conn.execute(SQL_SELECT_PAYMENTS):
+            payment = Payment(
+                payment_id=payment_id,
+                amount=Money.from_cents(amount),
+                paid_at=datetime.fromisoformat(paid_at) if paid_at else None,
+                status=PaymentStatus(status),
+                order_id=order_id,
+                refunded=Money.from_cents(refunded),
+            )
+            self._index_payment(payment, ts)
+        for refund_id, payment_id, amount, refunded_at in self._conn.execute(SQL_SELECT_REFUNDS):
+            self._index_refund(
+                Refund(refund_id, payment_id, Money.from_cents(amount), datetime.fromisoformat(refunded_at))
+            )
@@ -1,22 +1,25 @@
 from __future__ import annotations
 from datetime import datetime
+from typing import Optional
 from uuid import uuid4
 
 from enums import PaymentStatus
-from payment import Payment
+from money import as_money
+from payment import Payment, Refund
+from payment_ledger import PaymentLedger
 
 
 class PaymentService:
-    def process_payment(self, amount: float) -> Payment:
+    def __init__(self, ledger: Optional[PaymentLedger] = None) -> None:
+        self.ledger = ledger if ledger is not None else PaymentLedger()
+
+    def process_payment(self, amount: float, order_id: Optional[str] = None) -> Payment:
         # Simple simulation: always succeeds (can be extended later).
-        p = Payment(payment_id=str(uuid4()), amount=float(amount))
+        p = Payment(payment_id=str(uuid4()), amount=as_money(amount))
         p.status = PaymentStatus.PAID
         p.paid_at = datetime.utcnow()
-        return p
+        return self.ledger.record(p, order_id)
 
-    def refund(self, payment_id: str) -> Payment:
-        # Placeholder for a real refund workflow.
-        p = Payment(payment_id=payment_id, amount=0.0)
-        p.status = PaymentStatus.PAID
-        p.paid_at = datetime.utcnow()
-        return p
+    def refund(self, payment_id: str, amount=None) -> Refund:
+        """Refund part (``amount``) or all of a recorded payment."""
+        return self.ledger.refund(payment_id, amount)
@@ -1,18 +1,158 @@
 from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+
+from enums import OrderEventType, OrderStatus
+from kitchen_queue import KitchenQueue
+from money import Money, to_cents
 from observers import OrderObserver
 from order import Order
+from order_event import OrderEvent
 
 
 class KitchenDisplay(OrderObserver):
+    # ``output`` receives each display line; None keeps the kitchen queue
+    # in step without showing anything (the GUI shows ETAs itself).
+    def __init__(
+        self,
+        kitchen: Optional[KitchenQueue] = None,
+        output: Optional[Callable[[str], None]] = print,
+    ) -> None:
+        self.kitchen = kitchen if kitchen is not None else KitchenQueue()
+        self.output = output
+
     def update(self, order: Order) -> None:
+        # PREPARING orders join the kitchen queue, or are re-estimated when
+        # their lines change; finished or cancelled ones leave it.
+        if order.status == OrderStatus.PREPARING:
+            if not self.kitchen.refresh(order):
+                self.kitchen.enqueue(order)
+        elif order.status in (OrderStatus.READY, OrderStatus.CANCELLED):
+            self.kitchen.remove(order.order_id)
+        if self.output is None:
+            return
+        eta = self.kitchen.eta_seconds(order.order_id)
+        eta_text = f" eta={eta:.0f}s" if eta is not None else ""
         # Simple console “display”
-        print(f"[KitchenDisplay] Order {order.order_id} status={order.status.value} items={len(order.get_lines())}")
+        self.output(f"[KitchenDisplay] Order {order.order_id} status={order.status.value} items={len(order.get_lines())}{eta_text}")
 
     def show(self, order_id: str, status) -> None:
-        print(f"[KitchenDisplay] Order {order_id} -> {status}")
+        if self.output is not None:
+            self.output(f"[KitchenDisplay] Order {order_id} -> {status}")
 
 
 class BillingService(OrderObserver):
     def update(self, order: Order) -> None:
         # Could trigger bill recalculation or UI update in a real system
         print(f"[BillingService] Order {order.order_id} changed; subtotal={order.calculate_total():.2f}")
+
+
+SOLD = (OrderStatus.PREPARING, OrderStatus.READY)
+
+
+class AnalyticsObserver(OrderObserver):
+    """Live sales counters kept up to date from order deltas.
+
+    Orders count as sold once paid (PREPARING or READY). Line events move
+    the counters by their qty delta; a status change into or out of the
+    sold states adds or takes back that order's lines. Reads are O(1).
+    """
+
+    def __init__(self) -> None:
+        self._status_counts: Dict[OrderStatus, int] = {s: 0 for s in OrderStatus}
+        self._revenue = 0  # cents
+        self._sold_orders = 0
+        self._units: Dict[str, int] = {}
+        # order_id -> (status, {item_id: [qty, unit price in cents]}) as last seen
+        self._orders: Dict[str, Tuple[OrderStatus, Dict[str, list]]] = {}
+
+    def watch(self, order: Order) -> None:
+        order.add_observer(self)
+        if order.order_id not in self._orders:
+            self._track(order)
+
+    def update(self, order: Order) -> None:
+        self._untrack(order.order_id)
+        self._track(order)
+
+    def on_events(self, order: Order, events: List[OrderEvent]) -> None:
+        if not events or order.order_id not in self._orders:
+            self.update(order)
+            return
+        status, lines = self._orders[order.order_id]
+        for ev in events:
+            if ev.kind == OrderEventType.STATUS_CHANGED:
+                self._move(order.order_id, status, ev.new_status, lines)
+                status = ev.new_status
+                continue
+            entry = lines.get(ev.item_id)
+            if entry is None:
+                line = order._find_line(ev.item_id)
+                entry = lines[ev.item_id] = [0, to_cents(line.item.price) if line is not None else 0]
+            if status in SOLD:
+                self._add_units(ev.item_id, ev.new_qty - ev.old_qty, entry[1])
+            entry[0] = ev.new_qty
+            if not ev.new_qty:
+                del lines[ev.item_id]
+        self._orders[order.order_id] = (status, lines)
+
+    # -- reads -----------------------------------------------------------
+
+    def orders_with_status(self, status: OrderStatus) -> int:
+        return self._status_counts[status]
+
+    def status_counts(self) -> Dict[OrderStatus, int]:
+        return dict(self._status_counts)
+
+    def revenue(self) -> Money:
+        return Money.from_cents(self._revenue)
+
+    def units_sold(self, item_id: str) -> int:
+        return self._units.get(item_id, 0)
+
+    def sold_orders(self) -> int:
+        return self._sold_orders
+
+    def average_ticket(self) -> Money:
+        return self.revenue().split(self._sold_orders) if self._sold_orders else Money.from_cents(0)
+
+    # -- bookkeeping -----------------------------------------------------
+
+    def _track(self, order: Order) -> None:
+        lines = {l.item.id: [l.qty, to_cents(l.item.price)] for l in order.get_lines()}
+        self._status_counts[order.status] += 1
+        if order.status in SOLD:
+            self._sold_orders += 1
+        self._orders[order.order_id] = (order.status, lines)
+        if order.status in SOLD:
+            for item_id, (qty, price) in lines.items():
+                self._add_units(item_id, qty, price)
+
+    def _untrack(self, order_id: str) -> None:
+        known = self._orders.pop(order_id, None)
+        if known is None:
+            return
+        status, lines = known
+        self._status_counts[status] -= 1
+        if status in SOLD:
+            self._sold_orders -= 1
+            for item_id, (qty, price) in lines.items():
+                self._add_units(item_id, -qty, price)
+
+    def _move(self, order_id: str, old: OrderStatus, new: OrderStatus, lines: Dict[str, list]) -> None:
+        self._status_counts[old] -= 1
+        self._status_counts[new] += 1
+        was, now = old in SOLD, new in SOLD
+        if was == now:
+            return
+        sign = 1 if now else -1
+        self._sold_orders += sign
+        for item_id, (qty, price) in lines.items():
+            self._add_units(item_id, sign * qty, price)
+
+    def _add_units(self, item_id: str, delta: int, unit_cents: int) -> None:
+        units = self._units.get(item_id, 0) + delta
+        if units:
+            self._units[item_id] = units
+        else:
+            self._units.pop(item_id, None)
+        self._revenue += delta * unit_cents
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from customer import Customer
+from enums import Durability, OrderEventType, OrderStatus
+from menu import stored_item
+from observers import OrderObserver
+from order import Order
+from order_system import OrderSystem
+
+if TYPE_CHECKING:
+    from menu import Menu
+    from order_event import OrderEvent
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    order_id    TEXT PRIMARY KEY,
+    customer_id TEXT,
+    created_at  TEXT NOT NULL,
+    status      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS order_lines (
+    order_id   TEXT NOT NULL REFERENCES orders(order_id),
+    item_id    TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    unit_price REAL NOT NULL,
+    qty        INTEGER NOT NULL,
+    seq        INTEGER NOT NULL,
+    PRIMARY KEY (order_id, item_id)
+);
+"""
+
+# Fixed SQL text, so sqlite3's per-connection statement cache keeps each one prepared.
+SQL_INSERT_ORDER = "INSERT OR REPLACE INTO orders (order_id, customer_id, created_at, status) VALUES (?, ?, ?, ?)"
+SQL_SET_STATUS = "UPDATE orders SET status = ? WHERE order_id = ?"
+SQL_UPSERT_LINE = (
+    "INSERT INTO order_lines (order_id, item_id, name, unit_price, qty, seq) VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (order_id, item_id) DO UPDATE SET qty = excluded.qty, unit_price = excluded.unit_price"
+)
+SQL_DELETE_LINE = "DELETE FROM order_lines WHERE order_id = ? AND item_id = ?"
+SQL_DELETE_LINES = "DELETE FROM order_lines WHERE order_id = ?"
+SQL_SELECT_ORDER = "SELECT created_at, status FROM orders WHERE order_id = ?"
+SQL_SELECT_LINES = "SELECT item_id, name, unit_price, qty FROM order_lines WHERE order_id = ? ORDER BY seq"
+SQL_SELECT_IDS = "SELECT order_id FROM orders"
+SQL_MAX_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM order_lines"
+
+SYNCHRONOUS = {
+    Durability.SYNC: "FULL",
+    Durability.BATCHED: "NORMAL",
+    Durability.ASYNC: "OFF",
+}
+
+Op = Tuple[str, tuple]
+
+
+class _PersistObserver(OrderObserver):
+    def __init__(self, system: "SqliteOrderSystem") -> None:
+        self.system = system
+
+    def update(self, order: Order) -> None:
+        self.system._write(self.system._rewrite_ops(order))
+
+    def on_events(self, order: Order, events: List["OrderEvent"]) -> None:
+        if not events:
+            self.update(order)
+            return
+        ops: List[Op] = []
+        for ev in events:
+            if ev.kind == OrderEventType.STATUS_CHANGED:
+                ops.append((SQL_SET_STATUS, (ev.new_status.value, order.order_id)))
+            elif ev.kind == OrderEventType.LINE_REMOVED:
+                ops.append((SQL_DELETE_LINE, (order.order_id, ev.item_id)))
+            else:
+                line = order._find_line(ev.item_id)
+                if line is None:
+                    # Added and removed again inside one batch.
+                    continue
+                ops.append((SQL_UPSERT_LINE, self.system._line_params(order, line, ev.new_qty)))
+        self.system._write(ops)
+
+
+class SqliteOrderSystem(OrderSystem):
+    """OrderSystem persisted to SQLite (WAL mode).
+
+    Orders live in memory as usual; their mutations reach the database
+    through an observer. With Durability.SYNC each change is committed on
+    the caller's thread, and a failed write raises sqlite3.Error there.
+    BATCHED and ASYNC hand changes to a background writer that commits
+    them in batches, with SQLite ``synchronous`` set to NORMAL or OFF
+    respectively; their failures are counted in ``write_errors``. Call
+    flush() to wait for the writer.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        menu: Optional["Menu"] = None,
+        durability: Durability = Durability.BATCHED,
+        batch_size: int = 512,
+        flush_interval: float = 0.05,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.menu = menu
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_errors = 0
+        self.last_write_error: Optional[BaseException] = None
+        self._observer = _PersistObserver(self)
+        self._conn = self._connect()
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._seq = self._conn.execute(SQL_MAX_SEQ).fetchone()[0]
+        self._queue: "queue.Queue[Optional[List[Op]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if durability != Durability.SYNC:
+            self._writer = threading.Thread(target=self._run_writer, name="sqlite-writer", daemon=True)
+            self._writer.start()
+
+    def create_order(self, customer: Customer) -> Order:
+        o = Order(order_id=str(uuid4()), status=OrderStatus.NEW)
+        customer_id = getattr(customer, "customer_id", None)
+        self._write([(SQL_INSERT_ORDER, (o.order_id, customer_id, o.created_at.isoformat(), o.status.value))])
+        self.orders[o.order_id] = o
+        o.add_observer(self._observer)
+        return o
+
+    def get_order(self, order_id: str) -> Order:
+        if order_id in self.orders:
+            return self.orders[order_id]
+        order = self._load(order_id)
+        if order is None:
+            raise KeyError(f"Order not found: {order_id}")
+        self.orders[order_id] = order
+        return order
+
+    def load_all(self) -> Dict[str, Order]:
+        for (order_id,) in self._conn.execute(SQL_SELECT_IDS).fetchall():
+            self.get_order(order_id)
+        return self.orders
+
+    def flush(self) -> None:
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self._conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.durability]}")
+        return conn
+
+    def _line_params(self, order: Order, line, qty: int) -> tuple:
+        self._seq += 1
+        return (order.order_id, line.item.id, line.item.name, float(line.unit_price), qty, self._seq)
+
+    def _rewrite_ops(self, order: Order) -> List[Op]:
+        ops: List[Op] = [
+            (SQL_SET_STATUS, (order.status.value, order.order_id)),
+            (SQL_DELETE_LINES, (order.order_id,)),
+        ]
+        for line in order.get_lines():
+            ops.append((SQL_UPSERT_LINE, self._line_params(order, line, line.qty)))
+        return ops
+
+    def _write(self, ops: List[Op]) -> None:
+        if not ops:
+            return
+        if self._writer is None:
+            self._apply(self._conn, ops)
+        else:
+            self._queue.put(ops)
+
+    def _apply(self, conn: sqlite3.Connection, ops: List[Op]) -> None:
+        try:
+            with conn:
+                # Runs of the same statement go through executemany.
+                i = 0
+                while i < len(ops):
+                    sql = ops[i][0]
+                    j = i
+                    while j < len(ops) and ops[j][0] == sql:
+                        j += 1
+                    conn.executemany(sql, [params for _, params in ops[i:j]])
+                    i = j
+        except sqlite3.Error as e:
+            self.write_errors += 1
+            self.last_write_error = e
+            if self.durability == Durability.SYNC:
+                raise
+
+    def _run_writer(self) -> None:
+        conn = self._connect()
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            batches = [first]
+            deadline = time.monotonic() + self.flush_interval
+            pending = len(first) if first else 0
+            while first is not None and pending < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batches.append(nxt)
+                if nxt is None:
+                    break
+                pending += len(nxt)
+            ops = [op for b in batches if b for op in b]
+            stop = any(b is None for b in batches)
+            self._apply(conn, ops)
+            for _ in batches:
+                self._queue.task_done()
+        conn.close()
+
+    def _load(self, order_id: str) -> Optional[Order]:
+        row = self._conn.execute(SQL_SELECT_ORDER, (order_id,)).fetchone()
+        if row is None:
+            return None
+        created_at, status = row
+        order = Order(
+            order_id=order_id,
+            created_at=datetime.fromisoformat(created_at),
+            status=OrderStatus(status),
+        )
+        for item_id, name, unit_price, qty in self._conn.execute(SQL_SELECT_LINES, (order_id,)):
+            order._load_line(stored_item(self.menu, item_id, name, unit_price), qty)
+        order.add_observer(self._observer)
+        return order